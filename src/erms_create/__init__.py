@@ -20,9 +20,27 @@ Basic usage:
     >>> erms.save_to_file("my_case.xml")
 """
 
-# Import main classes for convenient access
-from .core import Erms, Control, Aggregation, Record  # Ändrat från erms_core till core
-from .svk_arende import SVKErms, SVKCase, SVKRecord    # Ändrat från erms_svk_arende
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core import Erms, Control, Aggregation, Record
+    from .svk_arende import SVKErms, SVKCase, SVKRecord
+
+# Main classes are imported on first access, so that short-lived processes
+# (the CLI, worker pools) only pay for the modules they use
+_LAZY = {
+    "Erms": ".core",
+    "Control": ".core",
+    "Aggregation": ".core",
+    "Record": ".core",
+    "SVKErms": ".svk_arende",
+    "SVKCase": ".svk_arende",
+    "SVKRecord": ".svk_arende",
+}
+
+# Subpackages that were bound as attributes when the package imported them eagerly
+_SUBMODULES = ("core", "svk_arende", "validation")
 
 # Version info
 __version__ = "1.0.0"
@@ -70,6 +88,8 @@ def create_simple_case(case_number: str, title: str, archive_creator: str,
         ... )
         >>> erms.save_to_file("my_case.xml")
     """
+    from .svk_arende import SVKErms
+
     erms = SVKErms()
     case = erms.create_simple_case(
         case_number=case_number,
@@ -81,4 +101,18 @@ def create_simple_case(case_number: str, title: str, archive_creator: str,
     return erms, case
 
 # Add convenience function to exports
-__all__.append("create_simple_case")
\ No newline at end of file
+__all__.append("create_simple_case")
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return import_module("." + name, __name__)
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | set(_SUBMODULES))
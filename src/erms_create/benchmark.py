@@ -0,0 +1,347 @@
+"""
+ERMS Create Benchmarks
+======================
+
+Throughput and memory benchmarks for building, validating and serializing
+SVK deliveries with synthetic workloads.
+
+Each scenario (shape x number of cases) runs these steps in order on one
+document: add_case, add_record_svk, get_statistics, validate, serialize,
+plus an add_in_element micro benchmark. Every step reports operations per
+second, bytes per second (where bytes are produced), the peak RSS of the
+process and, unless disabled, the memory allocated by the step as traced
+by tracemalloc (in a separate run, so tracing does not skew the timings).
+tracemalloc only sees Python objects; lxml trees are allocated by libxml2
+and show up in the RSS figure instead.
+
+Results are plain JSON, so runs from different versions can be compared
+with compare_results().
+
+measure_import_times() starts a fresh interpreter per module and reports
+the import time from -X importtime and the wall time of the whole process,
+i.e. what every CLI invocation and every spawned worker pays at startup.
+
+Usage:
+    erms-create bench --cases 1000 10000 -o results.json
+    erms-create bench --cases 1000 10000 --baseline results.json
+    erms-create bench --imports
+"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List
+from lxml import etree
+from . import __version__
+from .core import namespaces as ns
+from .core.utils import add_in_element
+from .svk_arende.svk_erms import SVKErms
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Workload shapes: records per case and how many cases a scale gives
+SHAPES = {
+    "many-small": {"records_per_case": 1, "case_divisor": 1},
+    "few-large": {"records_per_case": 100, "case_divisor": 100},
+}
+
+DEFAULT_SCALES = (1000, 10000)
+
+STEPS = ("add_case", "add_record_svk", "get_statistics", "validate", "serialize",
+         "add_in_element")
+
+# Relative slowdown reported as a regression by compare_results()
+DEFAULT_TOLERANCE = 0.10
+
+# Modules whose startup cost measure_import_times() reports by default
+IMPORT_MODULES = ("erms_create", "erms_create.cli", "erms_create.validation",
+                  "erms_create.svk_arende.svk_erms")
+
+_DIARY_CODES = "ABCDEFGHIJKLMNOPRSTUVXYZÅÄÖ"
+_NUMBERS_PER_YEAR = 9999
+_YEARS = 35
+
+
+def case_number(index: int) -> str:
+    """Unique valid case number for a running index (up to about 9 million)"""
+    number = index % _NUMBERS_PER_YEAR + 1
+    year = 1990 + (index // _NUMBERS_PER_YEAR) % _YEARS
+    code = _DIARY_CODES[index // (_NUMBERS_PER_YEAR * _YEARS) % len(_DIARY_CODES)]
+    return f"{code} {year}-{number:04d}"
+
+
+def peak_rss() -> int:
+    """Peak resident set size of the process in bytes (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Scenario:
+    """One document built step by step"""
+
+    def __init__(self, cases: int, records_per_case: int):
+        self.cases = cases
+        self.records_per_case = records_per_case
+        self.erms = SVKErms()
+        self.case_objects = []
+
+    def add_case(self):
+        add_case = self.erms.add_case
+        for index in range(self.cases):
+            case = add_case(case_number(index), f"Ärende {index}", "Sunne pastorat",
+                            "1234567890")
+            case.set_status_svk("closed")
+            case.add_case_agents(creator="Anna Andersson", responsible_person="Per Persson")
+            case.add_required_dates("2024-01-15T10:00:00", "2024-03-01T12:00:00")
+            self.case_objects.append(case)
+        return self.cases, None
+
+    def add_record_svk(self):
+        for case in self.case_objects:
+            number = case.object_id.text
+            for index in range(1, self.records_per_case + 1):
+                record = case.add_record_svk(f"{number}:{index}", f"Handling {index}")
+                record.set_direction("incoming")
+                record.add_document_agents(sender="Kommunen")
+                record.add_required_dates("2024-01-15T10:00:00", "2024-01-15T10:00:00")
+        return self.cases * self.records_per_case, None
+
+    def get_statistics(self):
+        self.erms.get_statistics()
+        return 1, None
+
+    def validate(self):
+        self.erms.validate()
+        return 1, None
+
+    def serialize(self):
+        data = self.erms.to_xml_string().encode("utf-8")
+        return 1, len(data)
+
+    def add_in_element(self):
+        tags = [ns.ERMS + name for name in
+                ("record", "dates", "agents", "status", "title", "extraId", "objectId")]
+        count = max(self.cases, 1000)
+        for _ in range(count):
+            aggregation = etree.Element(ns.ERMS + "aggregation")
+            for tag in tags:
+                add_in_element(aggregation, etree.Element(tag))
+        return count * len(tags), None
+
+
+def _run_scenario(shape: str, cases: int, trace_memory: bool) -> List[dict]:
+    settings = SHAPES[shape]
+    case_count = max(1, cases // settings["case_divisor"])
+    records_per_case = settings["records_per_case"]
+
+    results = []
+    scenario = _Scenario(case_count, records_per_case)
+    for step in STEPS:
+        gc.collect()
+        start = time.perf_counter()
+        ops, size = getattr(scenario, step)()
+        seconds = time.perf_counter() - start
+        results.append({
+            "shape": shape,
+            "scale": cases,
+            "cases": case_count,
+            "records": case_count * records_per_case,
+            "benchmark": step,
+            "seconds": seconds,
+            "ops": ops,
+            "ops_per_sec": ops / seconds if seconds else None,
+            "bytes": size,
+            "bytes_per_sec": size / seconds if size and seconds else None,
+            "peak_rss_bytes": peak_rss(),
+        })
+    del scenario
+
+    if trace_memory:
+        scenario = _Scenario(case_count, records_per_case)
+        for result, step in zip(results, STEPS):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                getattr(scenario, step)()
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            result["traced_current_bytes"] = current
+            result["traced_peak_bytes"] = peak
+        del scenario
+    return results
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, shapes=None, trace_memory: bool = True) -> dict:
+    """
+    Run all benchmarks.
+
+    Args:
+        scales: Workload sizes; the number of records for "few-large"
+                and the number of cases for "many-small"
+        shapes: Workload shapes from SHAPES (default: all)
+        trace_memory: Also measure allocations per step with tracemalloc
+
+    Returns:
+        dict: Environment information and one result per step and scenario
+    """
+    shapes = shapes or tuple(SHAPES)
+    for shape in shapes:
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown shape: '{shape}'. Must be one of: {', '.join(SHAPES)}")
+
+    results = []
+    for shape in shapes:
+        for scale in scales:
+            results.extend(_run_scenario(shape, scale, trace_memory))
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def _import_time(module: str, env: dict) -> tuple:
+    """Import seconds, process seconds and the set of imported modules for one run"""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                               check=True)
+    process_seconds = time.perf_counter() - start
+
+    # Sum the top-level imports from the first one of this package on, so
+    # that interpreter startup (site, encodings) is left out
+    microseconds = 0
+    names = set()
+    counting = False
+    for line in completed.stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        names.add(name.strip())
+        counting = counting or name.strip().startswith("erms_create")
+        if counting and name[1:2] != " ":
+            microseconds += int(cumulative)
+    return microseconds / 1e6, process_seconds, names
+
+
+def measure_import_times(modules=IMPORT_MODULES, repeat: int = 5) -> List[dict]:
+    """
+    Measure startup cost per module in fresh interpreters.
+
+    Args:
+        modules: Modules to import
+        repeat: Runs per module; the median is reported
+
+    Returns:
+        List of dicts with module, import_seconds, process_seconds and
+        whether lxml and asyncio were loaded
+    """
+    env = dict(os.environ)
+    source = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [source, env.get("PYTHONPATH")]))
+
+    results = []
+    for module in modules:
+        runs = [_import_time(module, env) for _ in range(repeat)]
+        names = runs[0][2]
+        results.append({
+            "module": module,
+            "import_seconds": statistics.median(run[0] for run in runs),
+            "process_seconds": statistics.median(run[1] for run in runs),
+            "loads_lxml": "lxml.etree" in names,
+            "loads_asyncio": "asyncio" in names,
+        })
+    return results
+
+
+def format_import_times(results: List[dict]) -> str:
+    """Import times as a readable table"""
+    lines = [f"{'module':<36} {'import ms':>10} {'process ms':>11} {'lxml':>5} {'asyncio':>8}"]
+    for result in results:
+        lines.append(f"{result['module']:<36} {result['import_seconds'] * 1000:>10.1f} "
+                     f"{result['process_seconds'] * 1000:>11.1f} "
+                     f"{'yes' if result['loads_lxml'] else 'no':>5} "
+                     f"{'yes' if result['loads_asyncio'] else 'no':>8}")
+    return "\n".join(lines)
+
+
+def _key(result: dict) -> tuple:
+    return result["shape"], result["scale"], result["benchmark"]
+
+
+def compare_results(baseline: dict, current: dict,
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[dict]:
+    """
+    Find benchmarks that got slower than the baseline.
+
+    Args:
+        baseline: Output of run_benchmarks() for the reference version
+        current: Output of run_benchmarks() to check
+        tolerance: Allowed relative drop in ops per second
+
+    Returns:
+        List of dicts with shape, scale, benchmark, baseline and current
+        ops per second and the relative change, for regressions only
+    """
+    reference = {_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = reference.get(_key(result))
+        if not old or not old.get("ops_per_sec") or not result.get("ops_per_sec"):
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1
+        if change < -tolerance:
+            regressions.append({
+                "shape": result["shape"], "scale": result["scale"],
+                "benchmark": result["benchmark"],
+                "baseline_ops_per_sec": old["ops_per_sec"],
+                "ops_per_sec": result["ops_per_sec"], "change": change,
+            })
+    return regressions
+
+
+def format_results(report: dict) -> str:
+    """Results as a readable table"""
+    lines = [f"{'shape':<11} {'scale':>8} {'benchmark':<15} {'ops/s':>12} {'MB/s':>8} "
+             f"{'traced MB':>10} {'peak RSS MB':>12}"]
+    for result in report["results"]:
+        megabytes = result.get("bytes_per_sec")
+        traced = result.get("traced_peak_bytes")
+        rss = result.get("peak_rss_bytes")
+        lines.append(
+            f"{result['shape']:<11} {result['scale']:>8} {result['benchmark']:<15} "
+            f"{result['ops_per_sec'] or 0:>12.1f} "
+            f"{megabytes / 1e6 if megabytes else 0:>8.1f} "
+            f"{traced / 1e6 if traced is not None else 0:>10.1f} "
+            f"{rss / 1e6 if rss else 0:>12.1f}")
+    return "\n".join(lines)
+
+
+def write_results(report: dict, filename: str):
+    """Write results as JSON"""
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def read_results(filename: str) -> Dict:
+    """Read results written by write_results()"""
+    with open(filename, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,250 @@
+"""
+ERMS Create command line interface
+==================================
+
+Usage:
+    erms-create split leverans.xml delar/ --max-aggregations 1000
+    erms-create merge -o leverans.xml arende-*.xml
+    erms-create merge -o leverans.xml --from-list filer.txt --checkpoint-every 1000
+    erms-create merge -o leverans.xml --from-list filer.txt --resume
+    erms-create sort leverans.xml sorterad.xml
+    erms-create codegen ERMS_v3.xsd ERMS-SVK-element.xsd -o erms_tables.py
+    erms-create bench --cases 1000 10000 -o results.json --baseline previous.json
+    erms-create synth leverans.xml --cases 100000 --seed 42
+    erms-create synth leverans.xml --cases 100000 --seed 42 --checkpoint-every 1000 --resume
+    erms-create size leverans.xml --top 20
+    erms-create --profile merge -o leverans.xml arende-*.xml
+"""
+
+import argparse
+import json
+import sys
+
+
+def _read_file_list(filename: str) -> list:
+    """Read input filenames, one per line"""
+    with open(filename, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def cmd_split(args) -> int:
+    """Split a large ERMS file into shards"""
+    from .core.split import split_erms_file
+
+    manifest = split_erms_file(args.source, args.output_dir,
+                               max_aggregations=args.max_aggregations,
+                               max_bytes=args.max_bytes,
+                               pretty_print=not args.compact)
+    print(f"{manifest['total_aggregations']} aggregations written to "
+          f"{len(manifest['shards'])} shards in {args.output_dir}")
+    return 0
+
+
+def cmd_merge(args) -> int:
+    """Merge ERMS files into one delivery"""
+    from .svk_arende.svk_erms import SVKErms
+
+    sources = list(args.sources)
+    if args.from_list:
+        sources.extend(_read_file_list(args.from_list))
+    if not sources:
+        print("No input files given", file=sys.stderr)
+        return 2
+
+    summary = SVKErms.merge_files(sources, args.output,
+                                  on_duplicate="skip" if args.skip_duplicates else "error",
+                                  pretty_print=not args.compact,
+                                  checkpoint_interval=args.checkpoint_every,
+                                  resume=args.resume)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_sort(args) -> int:
+    """Sort the aggregations of an ERMS file by objectId"""
+    from .core.sorting import sort_erms_file
+
+    count = sort_erms_file(args.source, args.output, run_size=args.run_size,
+                           include_records=not args.aggregations_only,
+                           pretty_print=not args.compact, temp_dir=args.temp_dir)
+    print(f"{count} aggregations written to {args.output}")
+    return 0
+
+
+def cmd_codegen(args) -> int:
+    """Generate lookup tables and builder classes from XML Schema files"""
+    from .core.codegen import generate_file
+
+    model = generate_file(args.schemas, args.output)
+    print(f"{len(model.children)} element orders, {len(model.value_lists)} value lists and "
+          f"{len(model.elements)} builder classes written to {args.output}")
+    for tag in model.conflicts:
+        print(f"Warning: {tag} has different child orders in different types; "
+              f"the first one is used", file=sys.stderr)
+    return 0
+
+
+def cmd_bench(args) -> int:
+    """Run the benchmark suite"""
+    from .benchmark import (compare_results, format_import_times, format_results,
+                            measure_import_times, read_results, run_benchmarks, write_results)
+
+    if args.imports:
+        results = measure_import_times()
+        print(format_import_times(results))
+        if args.output:
+            write_results({"imports": results}, args.output)
+        return 0
+
+    report = run_benchmarks(args.cases, args.shape or None, trace_memory=not args.no_memory)
+    print(format_results(report))
+    if args.output:
+        write_results(report, args.output)
+    if args.baseline:
+        regressions = compare_results(read_results(args.baseline), report, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression['shape']} {regression['scale']} "
+                  f"{regression['benchmark']} {regression['change']:+.1%}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+def cmd_synth(args) -> int:
+    """Write a synthetic SVK delivery"""
+    from .svk_arende.synthetic import SyntheticDelivery
+
+    profile = {}
+    if args.records_per_case:
+        counts = args.records_per_case
+        profile["records_per_case"] = counts[0] if len(counts) == 1 else tuple(counts)
+    generator = SyntheticDelivery(args.seed, **profile)
+    if args.specs:
+        with open(args.specs, "w", encoding="utf-8") as f:
+            for spec in generator.iter_specs(args.cases):
+                f.write(json.dumps(spec, ensure_ascii=False) + "\n")
+    count = generator.write_delivery(args.output, args.cases, pretty_print=not args.compact,
+                                     checkpoint_interval=args.checkpoint_every,
+                                     resume=args.resume)
+    print(f"{count} synthetic cases written to {args.output}")
+    return 0
+
+
+def cmd_size(args) -> int:
+    """Show which elements the bytes of an ERMS file go to"""
+    from .core.size_profile import format_size_report, profile_size
+
+    report = profile_size(args.source)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_size_report(report, args.top))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser"""
+    parser = argparse.ArgumentParser(prog="erms-create",
+                                     description="Tools for ERMS deliveries")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print time per phase (build, ordering, validation, "
+                             "serialization, writing) when the command is done")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    split = subparsers.add_parser("split", help="Split an ERMS file into shards")
+    split.add_argument("source", help="ERMS file to split")
+    split.add_argument("output_dir", help="Directory for shards and manifest")
+    split.add_argument("--max-aggregations", type=int, help="Maximum aggregations per shard")
+    split.add_argument("--max-bytes", type=int, help="Maximum shard size in bytes")
+    split.add_argument("--compact", action="store_true", help="Do not indent output")
+    split.set_defaults(func=cmd_split)
+
+    merge = subparsers.add_parser("merge", help="Merge ERMS files into one delivery")
+    merge.add_argument("sources", nargs="*", help="ERMS files to merge")
+    merge.add_argument("-o", "--output", required=True, help="Output file")
+    merge.add_argument("--from-list", help="File with input filenames, one per line")
+    merge.add_argument("--skip-duplicates", action="store_true",
+                       help="Keep the first aggregation when objectIds are duplicated")
+    merge.add_argument("--checkpoint-every", type=int, metavar="N",
+                       help="Record a checkpoint every N input aggregations")
+    merge.add_argument("--resume", action="store_true",
+                       help="Continue an interrupted merge from its last checkpoint")
+    merge.add_argument("--compact", action="store_true", help="Do not indent output")
+    merge.set_defaults(func=cmd_merge)
+
+    sort = subparsers.add_parser("sort", help="Sort aggregations and records by objectId")
+    sort.add_argument("source", help="ERMS file to sort")
+    sort.add_argument("output", help="Output file")
+    sort.add_argument("--run-size", type=int, default=10000,
+                      help="Aggregations per sorted run held in memory")
+    sort.add_argument("--temp-dir", help="Directory for temporary run files")
+    sort.add_argument("--aggregations-only", action="store_true",
+                      help="Do not sort records within aggregations")
+    sort.add_argument("--compact", action="store_true", help="Do not indent output")
+    sort.set_defaults(func=cmd_sort)
+
+    codegen = subparsers.add_parser("codegen",
+                                    help="Generate lookup tables and builder classes "
+                                         "from XML Schemas")
+    codegen.add_argument("schemas", nargs="+", help="XSD files to read")
+    codegen.add_argument("-o", "--output", required=True, help="Python module to write")
+    codegen.set_defaults(func=cmd_codegen)
+
+    bench = subparsers.add_parser("bench", help="Run throughput and memory benchmarks")
+    bench.add_argument("--cases", type=int, nargs="+", default=[1000, 10000],
+                       help="Workload sizes to run")
+    bench.add_argument("--shape", action="append", choices=["many-small", "few-large"],
+                       help="Workload shape (repeatable, default: all)")
+    bench.add_argument("-o", "--output", help="Write results as JSON")
+    bench.add_argument("--baseline", help="Compare with results from an earlier run")
+    bench.add_argument("--tolerance", type=float, default=0.10,
+                       help="Allowed relative slowdown against the baseline")
+    bench.add_argument("--no-memory", action="store_true",
+                       help="Skip the tracemalloc run")
+    bench.add_argument("--imports", action="store_true",
+                       help="Measure import and process startup times instead")
+    bench.set_defaults(func=cmd_bench)
+
+    synth = subparsers.add_parser("synth", help="Write a reproducible synthetic SVK delivery")
+    synth.add_argument("output", help="Output file")
+    synth.add_argument("--cases", type=int, default=1000, help="Number of cases")
+    synth.add_argument("--seed", type=int, default=0, help="Random seed")
+    synth.add_argument("--records-per-case", type=int, nargs="+", metavar="N",
+                       help="Records per case: N, MIN MAX or MIN MAX MODE")
+    synth.add_argument("--specs", help="Also write the case specs as JSON lines")
+    synth.add_argument("--compact", action="store_true", help="Do not indent output")
+    synth.add_argument("--checkpoint-every", type=int, metavar="N",
+                       help="Record a checkpoint every N cases")
+    synth.add_argument("--resume", action="store_true",
+                       help="Continue an interrupted run from its last checkpoint")
+    synth.set_defaults(func=cmd_synth)
+
+    size = subparsers.add_parser("size", help="Break down file size by element and kind")
+    size.add_argument("source", help="ERMS file to profile")
+    size.add_argument("--top", type=int, default=15, help="Rows per table")
+    size.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    size.set_defaults(func=cmd_size)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """Entry point for the erms-create command"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile:
+        from .core import instrumentation
+        instrumentation.enable()
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.profile:
+            instrumentation.disable()
+            print(instrumentation.format_report(instrumentation.snapshot()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
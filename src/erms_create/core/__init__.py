@@ -16,13 +16,31 @@ Usage:
     record.set_title("My Document")
 """
 
-from .erms import Erms
-from .control import Control
-from .aggregation import Aggregation
-from .record import Record
-from .elements import Dates, Agents, Agent
-from . import namespaces as ns
-from . import value_lists
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .erms import Erms
+    from .control import Control
+    from .aggregation import Aggregation
+    from .record import Record
+    from .elements import Dates, Agents, Agent
+    from . import namespaces as ns
+    from . import value_lists
+
+# Public names and the submodules they come from. They are imported on
+# first access, so importing the package does not load lxml.
+_LAZY = {
+    'Erms': ('.erms', 'Erms'),
+    'Control': ('.control', 'Control'),
+    'Aggregation': ('.aggregation', 'Aggregation'),
+    'Record': ('.record', 'Record'),
+    'Dates': ('.elements', 'Dates'),
+    'Agents': ('.elements', 'Agents'),
+    'Agent': ('.elements', 'Agent'),
+    'ns': ('.namespaces', None),
+    'value_lists': ('.value_lists', None),
+}
 
 __version__ = "1.0.0"
 __author__ = "Henrik Vitalis"
@@ -37,4 +55,19 @@ __all__ = [
     'Agent',
     'ns',
     'value_lists'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attribute = _LAZY[name]
+    value = import_module(module, __name__)
+    if attribute:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -9,11 +9,31 @@ from lxml import etree
 from uuid import uuid4
 from .utils import add_in_element, validate_value_list
 from .elements import Dates, Agents
+from .canonical import CanonicalMixin, invalidates_content_hash
 from . import namespaces as ns
 from . import value_lists
 
+# Qualified tags, built once instead of in every setter
+_AGGREGATION_TAG = ns.ERMS + "aggregation"
+_OBJECT_ID_TAG = ns.ERMS + "objectId"
+_EXTRA_ID_TAG = ns.ERMS + "extraId"
+_INFORMATION_CLASS_TAG = ns.ERMS + "informationClass"
+_SECURITY_CLASS_TAG = ns.ERMS + "securityClass"
+_IDENTIFICATION_TAG = ns.ERMS + "identification"
+_CLASSIFICATION_TAG = ns.ERMS + "classification"
+_KEYWORDS_TAG = ns.ERMS + "keywords"
+_TITLE_TAG = ns.ERMS + "title"
+_OTHER_TITLE_TAG = ns.ERMS + "otherTitle"
+_SUBJECT_TAG = ns.ERMS + "subject"
+_STATUS_TAG = ns.ERMS + "status"
+_RELATION_TAG = ns.ERMS + "relation"
+_AGENTS_TAG = ns.ERMS + "agents"
+_DESCRIPTION_TAG = ns.ERMS + "description"
+_DATES_TAG = ns.ERMS + "dates"
+_ADDITIONAL_INFORMATION_TAG = ns.ERMS + "additionalInformation"
 
-class Aggregation:
+
+class Aggregation(CanonicalMixin):
     """Standard ERMS Aggregation"""
 
     def __init__(self, type_of_aggregation: str = "caseFile"):
@@ -21,7 +41,7 @@ class Aggregation:
         validate_value_list(type_of_aggregation, value_lists.AGGREGATION_TYPE, "aggregation type")
 
         self.element = etree.Element(
-            ns.ERMS + "aggregation", 
+            _AGGREGATION_TAG, 
             systemIdentifier=str(uuid4()),
             aggregationType=type_of_aggregation, 
             nsmap=ns.ERMS_NSMAP
@@ -45,45 +65,88 @@ class Aggregation:
         self.dates = None
         self.additional_information = None
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "Aggregation":
+        """
+        Bind an Aggregation wrapper to an existing <aggregation> element.
+
+        Used when reading existing documents. No new elements are created;
+        the wrapper attributes point to the children already in the tree.
+        """
+        aggr = cls.__new__(cls)
+        aggr.element = element
+        aggr._bind_children()
+        return aggr
+
+    def _bind_children(self):
+        """Set component attributes from the children of self.element"""
+        find = self.element.find
+        findall = self.element.findall
+
+        self.object_id = find(_OBJECT_ID_TAG)
+        self.extra_id = findall(_EXTRA_ID_TAG)
+        self.information_class = find(_INFORMATION_CLASS_TAG)
+        self.security_class = find(_SECURITY_CLASS_TAG)
+        self.identification = findall(_IDENTIFICATION_TAG)
+        self.classification = findall(_CLASSIFICATION_TAG)
+        self.keywords = find(_KEYWORDS_TAG)
+        self.title = find(_TITLE_TAG)
+        self.other_title = findall(_OTHER_TITLE_TAG)
+        self.subject = findall(_SUBJECT_TAG)
+        self.status = find(_STATUS_TAG)
+        self.relation = findall(_RELATION_TAG)
+        agents = find(_AGENTS_TAG)
+        self.agents = Agents.from_element(agents) if agents is not None else None
+        self.description = find(_DESCRIPTION_TAG)
+        dates = find(_DATES_TAG)
+        self.dates = Dates.from_element(dates) if dates is not None else None
+        self.additional_information = find(_ADDITIONAL_INFORMATION_TAG)
+
+    @invalidates_content_hash
     def set_object_id(self, object_id: str):
         """Set the object ID"""
         if self.object_id is None:
-            self.object_id = etree.Element(ns.ERMS + "objectId", nsmap=ns.ERMS_NSMAP)
+            self.object_id = etree.Element(_OBJECT_ID_TAG, nsmap=ns.ERMS_NSMAP)
             self.object_id.text = object_id
             add_in_element(self.element, self.object_id)
 
+    @invalidates_content_hash
     def add_extra_id(self, type_of_id: str, value: str):
         """Add an extra ID"""
-        elm = etree.Element(ns.ERMS + "extraId", extraIdType=type_of_id, nsmap=ns.ERMS_NSMAP)
+        elm = etree.Element(_EXTRA_ID_TAG, extraIdType=type_of_id, nsmap=ns.ERMS_NSMAP)
         elm.text = value
         self.extra_id.append(elm)
         add_in_element(self.element, elm)
 
+    @invalidates_content_hash
     def add_classification(self, value: str, class_code: str = None):
         """Add classification"""
         attributes = {}
         if class_code:
             attributes["classificationCode"] = class_code
 
-        elm = etree.Element(ns.ERMS + "classification", attributes, nsmap=ns.ERMS_NSMAP)
+        elm = etree.Element(_CLASSIFICATION_TAG, attributes, nsmap=ns.ERMS_NSMAP)
         elm.text = value
         self.classification.append(elm)
         add_in_element(self.element, elm)
 
+    @invalidates_content_hash
     def set_title(self, value: str):
         """Set title"""
         if self.title is None:
-            self.title = etree.Element(ns.ERMS + "title", nsmap=ns.ERMS_NSMAP)
+            self.title = etree.Element(_TITLE_TAG, nsmap=ns.ERMS_NSMAP)
             self.title.text = value
             add_in_element(self.element, self.title)
 
+    @invalidates_content_hash
     def set_status(self, value: str):
         """Set status"""
         validate_value_list(value, value_lists.STATUS, "status")
         if self.status is None:
-            self.status = etree.Element(ns.ERMS + "status", value=value, nsmap=ns.ERMS_NSMAP)
+            self.status = etree.Element(_STATUS_TAG, value=value, nsmap=ns.ERMS_NSMAP)
             add_in_element(self.element, self.status)
 
+    @invalidates_content_hash
     def add_agent(self, agent_type: str, name: str, **kwargs):
         """Add an agent"""
         if self.agents is None:
@@ -91,6 +154,7 @@ class Aggregation:
             add_in_element(self.element, self.agents.element)
         self.agents.add_agent(agent_type, name, **kwargs)
 
+    @invalidates_content_hash
     def add_date(self, date: str, date_type: str, other_date_type: str = None):
         """Add a date"""
         if self.dates is None:
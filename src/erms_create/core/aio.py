@@ -0,0 +1,146 @@
+"""
+ERMS Asyncio Support
+====================
+
+Async counterparts of the blocking export calls for asyncio applications.
+
+Serialization and validation run in a thread pool with a fixed number of
+workers (lxml releases the GIL for most of this work), and files are
+written from a separate small I/O pool, so the event loop is never blocked
+on lxml or on the disk.
+
+Usage:
+    await erms.asave("leverans.xml")
+    report = await erms.avalidate()
+
+    async for result in export_documents(jobs, max_concurrency=8):
+        print(result["filename"], result["valid"])
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Tuple
+
+# Default number of documents serialized or validated at the same time
+DEFAULT_CONCURRENCY = min(32, os.cpu_count() or 4)
+
+# Threads used for file writes
+DEFAULT_IO_WORKERS = 4
+
+_default_executor = None
+
+
+def write_file(filename: str, data: bytes):
+    """Write bytes to a file through a temporary file"""
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as f:
+        f.write(data)
+    os.replace(temp_filename, filename)
+
+
+class AsyncExecutor:
+    """
+    Thread pools for CPU-bound lxml work and for file writes.
+
+    max_workers limits how many serializations or validations run at the
+    same time; further calls wait in the pool's queue.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_CONCURRENCY,
+                 io_workers: int = DEFAULT_IO_WORKERS):
+        """
+        Args:
+            max_workers: Threads for serialization and validation
+            io_workers: Threads for file writes
+        """
+        self.max_workers = max_workers
+        self._cpu = ThreadPoolExecutor(max_workers, thread_name_prefix="erms-cpu")
+        self._io = ThreadPoolExecutor(io_workers, thread_name_prefix="erms-io")
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking function in the CPU pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu, functools.partial(func, *args, **kwargs))
+
+    async def write(self, filename: str, data: bytes):
+        """Write bytes to a file from the I/O pool"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._io, write_file, os.fspath(filename), data)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the thread pools"""
+        self._cpu.shutdown(wait)
+        self._io.shutdown(wait)
+
+    async def __aenter__(self) -> "AsyncExecutor":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+def get_default_executor() -> AsyncExecutor:
+    """The shared executor used when no executor is given"""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = AsyncExecutor()
+    return _default_executor
+
+
+async def export_documents(jobs: Iterable[Tuple[object, str]], validate: bool = True,
+                           pretty_print: bool = True, executor: AsyncExecutor = None,
+                           max_concurrency: int = DEFAULT_CONCURRENCY):
+    """
+    Validate and save many documents concurrently.
+
+    At most max_concurrency documents are in progress at a time; the next
+    job is taken from jobs only when one has finished. Results are yielded
+    in completion order. A document that fails validation is not saved.
+
+    Args:
+        jobs: (document, filename) pairs
+        validate: Validate documents that have avalidate() before saving
+        pretty_print: Indent output
+        executor: Executor to use (default: get_default_executor())
+        max_concurrency: Maximum number of documents in progress
+
+    Yields:
+        dict: filename, valid, errors and bytes written for each document.
+              An unexpected failure is reported in "error" instead of
+              stopping the other exports.
+    """
+    executor = executor or get_default_executor()
+
+    async def export(document, filename):
+        result = {"filename": filename, "valid": True, "errors": [], "bytes": 0}
+        try:
+            if validate and hasattr(document, "avalidate"):
+                report = await document.avalidate(executor=executor)
+                result["valid"] = report["valid"]
+                result["errors"] = report["errors"]
+                if not report["valid"]:
+                    return result
+            result["bytes"] = await document.asave(filename, pretty_print=pretty_print,
+                                                   executor=executor)
+        except Exception as e:
+            result["valid"] = False
+            result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    pending = set()
+    try:
+        for document, filename in jobs:
+            if len(pending) >= max_concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(export(document, filename)))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,212 @@
+"""
+ERMS Append
+===========
+
+Append aggregations to an existing ERMS file without reading the document.
+
+The closing </aggregations> tag is located by reading backwards from the end
+of the file. New aggregations are written at that position followed by the
+original closing tags. Before the file is touched, the original tail is
+written to a journal file so that an interrupted append can be rolled back.
+"""
+
+import json
+import os
+import re
+from typing import Iterable, Tuple
+from lxml import etree
+from .streaming import serialize_element, INDENT
+
+JOURNAL_SUFFIX = ".journal"
+
+# Block size when searching backwards for the closing tag
+SEARCH_BLOCK_SIZE = 64 * 1024
+
+_CLOSING_TAG = re.compile(rb"</(?:[\w.-]+:)?aggregations\s*>")
+_EMPTY_TAG = re.compile(rb"<((?:[\w.-]+:)?aggregations)(\s[^>]*)?/>")
+
+
+def _fsync_directory(path: str):
+    """Make a rename/unlink in the directory durable (where supported)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def find_aggregations_end(f, block_size: int = SEARCH_BLOCK_SIZE) -> Tuple[int, bytes, bytes]:
+    """
+    Locate the end of the <aggregations> container by reading from the end.
+
+    Args:
+        f: File opened in binary mode
+        block_size: Number of bytes to read per step
+
+    Returns:
+        tuple: (offset, empty_tag, indent) where offset is the position of
+        the closing tag (or of an empty <aggregations/> element), empty_tag
+        is the qualified name of the empty element (b"" if the container has
+        content) and indent is the whitespace before the tag on its line
+
+    Raises:
+        ValueError: If no aggregations container is found
+    """
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    data = b""
+
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        f.seek(position)
+        data = f.read(read_size) + data
+
+        match = None
+        for match in _CLOSING_TAG.finditer(data):
+            pass
+        empty = None
+        for empty in _EMPTY_TAG.finditer(data):
+            pass
+        if empty is not None and (match is None or empty.start() > match.start()):
+            match = empty
+        if match is None:
+            continue
+
+        line_start = data.rfind(b"\n", 0, match.start()) + 1
+        if line_start == 0 and position > 0:
+            # The line continues in the previous block
+            continue
+        indent = data[line_start:match.start()]
+        if indent.strip():
+            indent = b""
+        empty_tag = match.group(1) if match is empty else b""
+        return position + match.start(), empty_tag, indent
+
+    raise ValueError("No aggregations element found in file")
+
+
+def _write_journal(journal: str, offset: int, original_tail: bytes):
+    """Write the journal needed to undo an append"""
+    header = json.dumps({"offset": offset}).encode("ascii")
+    with open(journal, "wb") as f:
+        f.write(header + b"\n" + original_tail)
+        f.flush()
+        os.fsync(f.fileno())
+    _fsync_directory(journal)
+
+
+def recover_append(filename: str) -> bool:
+    """
+    Roll back an interrupted append.
+
+    If a journal exists for the file, the file is truncated to the recorded
+    offset and the original tail is restored.
+
+    Args:
+        filename: ERMS file
+
+    Returns:
+        bool: True if a rollback was performed
+    """
+    journal = filename + JOURNAL_SUFFIX
+    if not os.path.exists(journal):
+        return False
+
+    with open(journal, "rb") as f:
+        header, _, original_tail = f.read().partition(b"\n")
+    try:
+        offset = json.loads(header.decode("ascii"))["offset"]
+    except (ValueError, KeyError):
+        # Journal was not completely written, so the file was never touched
+        os.remove(journal)
+        _fsync_directory(journal)
+        return False
+
+    with open(filename, "r+b") as f:
+        f.seek(offset)
+        f.write(original_tail)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.remove(journal)
+    _fsync_directory(journal)
+    return True
+
+
+def append_aggregations(filename: str, aggregations: Iterable[etree._Element],
+                        pretty_print: bool = True) -> int:
+    """
+    Append aggregation elements to an existing ERMS file.
+
+    Only the end of the file is read and rewritten, so the cost depends on
+    the appended aggregations and not on the size of the file.
+
+    Args:
+        filename: Existing ERMS file with an <aggregations> container
+        aggregations: Aggregation elements to append
+        pretty_print: Indent the new aggregations like lxml pretty_print
+
+    Returns:
+        int: Number of aggregations appended
+    """
+    recover_append(filename)
+
+    with open(filename, "r+b") as f:
+        offset, empty_tag, indent = find_aggregations_end(f)
+        # Rewrite from the start of the line so that indentation is consistent
+        offset -= len(indent)
+        f.seek(offset)
+        original_tail = f.read()
+
+        pretty_print = pretty_print and (bool(indent) or offset == 0 or
+                                         _preceded_by_newline(f, offset))
+        child_indent = indent + INDENT.encode("ascii")
+        level = len(child_indent) // len(INDENT)
+
+        tail = original_tail[len(indent):]
+        if empty_tag:
+            # <aggregations/> -> <aggregations>...</aggregations>
+            empty = _EMPTY_TAG.match(tail)
+            opening = tail[:empty.end() - 2].rstrip() + b">"
+            tail = b"</" + empty_tag + b">" + tail[empty.end():]
+            parts = [indent + opening + (b"\n" if pretty_print else b"")]
+        else:
+            parts = []
+
+        count = 0
+        for aggregation in aggregations:
+            if pretty_print:
+                parts.append(child_indent + serialize_element(aggregation, True, level) + b"\n")
+            else:
+                parts.append(serialize_element(aggregation, False))
+            count += 1
+        if count == 0:
+            return 0
+        parts.append(indent + tail)
+
+        journal = filename + JOURNAL_SUFFIX
+        _write_journal(journal, offset, original_tail)
+
+        f.seek(offset)
+        f.write(b"".join(parts))
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.remove(journal)
+    _fsync_directory(journal)
+    return count
+
+
+def _preceded_by_newline(f, offset: int) -> bool:
+    """Check if the byte before offset is a newline"""
+    f.seek(offset - 1)
+    return f.read(1) == b"\n"
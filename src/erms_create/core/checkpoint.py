@@ -0,0 +1,163 @@
+"""
+ERMS Checkpoints
+================
+
+Resumable output for long-running exports.
+
+CheckpointWriter is an ErmsStreamWriter that, every checkpoint_interval
+input items, makes the output durable and records the input position and
+the output offset in a checkpoint file next to the output. A resumed
+writer truncates the output to the recorded offset and continues from
+there, so an interrupted and resumed run produces the same bytes as an
+uninterrupted run (given the same, deterministic input).
+
+Usage:
+    with CheckpointWriter("out.xml.tmp", control, resume=resume) as writer:
+        for position, row in enumerate(rows):
+            if position < writer.input_position:
+                continue  # written before the interruption
+            writer.write_aggregation(build(row))
+            writer.advance()
+"""
+
+import json
+import os
+from lxml import etree
+from .streaming import ErmsStreamWriter
+
+# Suffix of the checkpoint file, appended to the output filename
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+# Default number of input items between checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+
+
+def read_checkpoint(filename: str) -> dict:
+    """
+    Read the checkpoint for an output file.
+
+    Returns:
+        dict: Checkpoint state, or None if there is no checkpoint
+    """
+    try:
+        with open(filename + CHECKPOINT_SUFFIX, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class CheckpointWriter(ErmsStreamWriter):
+    """
+    ErmsStreamWriter that records checkpoints and can resume from the last one.
+
+    The caller reports consumed input items with advance(). Items consumed
+    after the last checkpoint are written again by a resumed run, since the
+    output is truncated to the offset of the checkpoint.
+
+    The checkpoint file is removed when the writer is closed normally and
+    kept when it is aborted.
+    """
+
+    def __init__(self, filename: str, control: etree._Element, pretty_print: bool = True,
+                 nsmap: dict = None, checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+                 resume: bool = False, metadata: dict = None):
+        """
+        Args:
+            filename: Output file
+            control: Control element (not written again when resuming)
+            pretty_print: Indent output like lxml pretty_print
+            nsmap: Namespaces declared on the erms root (default ROOT_NSMAP)
+            checkpoint_interval: Input items between checkpoints
+            resume: Continue from the checkpoint of filename
+            metadata: JSON-serializable description of the input (e.g. the
+                      input files). A resumed run must give the same metadata.
+
+        Raises:
+            ValueError: If resume is set and there is no matching checkpoint,
+                        or the output of the checkpoint is missing
+        """
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1")
+
+        self.filename = os.fspath(filename)
+        self.checkpoint_filename = self.filename + CHECKPOINT_SUFFIX
+        self.checkpoint_interval = checkpoint_interval
+        self.metadata = json.loads(json.dumps(metadata or {}))
+        self.input_position = 0
+        self.checkpoints = 0
+        self._since_checkpoint = 0
+        self._resumed = None
+
+        if not resume:
+            if os.path.exists(self.checkpoint_filename):
+                os.remove(self.checkpoint_filename)
+            super().__init__(self.filename, control, pretty_print, nsmap)
+            self.checkpoint()
+            return
+
+        state = read_checkpoint(self.filename)
+        if state is None:
+            raise ValueError(f"No checkpoint to resume for {self.filename}")
+        if state["pretty_print"] != pretty_print:
+            raise ValueError(f"Checkpoint for {self.filename} was written with "
+                             f"pretty_print={state['pretty_print']}")
+        if state["metadata"] != self.metadata:
+            raise ValueError(f"Checkpoint for {self.filename} was written for different input")
+
+        if not os.path.exists(self.filename):
+            raise ValueError(f"Checkpoint for {self.filename} exists but the output is missing")
+        f = open(self.filename, "r+b")
+        f.truncate(state["offset"])
+        f.seek(state["offset"])
+        self._resumed = state
+        super().__init__(f, control, pretty_print, nsmap)
+        self._owns_file = True
+
+    def _write_header(self, control: etree._Element):
+        if self._resumed is None:
+            super()._write_header(control)
+            return
+        self.bytes_written = self._resumed["offset"]
+        self.count = self._resumed["count"]
+        self.input_position = self._resumed["input_position"]
+
+    @property
+    def resumed(self) -> bool:
+        """True if the writer continues an interrupted run"""
+        return self._resumed is not None
+
+    def advance(self, items: int = 1):
+        """Report consumed input items; records a checkpoint when the interval is reached"""
+        self.input_position += items
+        self._since_checkpoint += items
+        if self._since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Make the output durable and record the current position"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        state = {
+            "input_position": self.input_position,
+            "offset": self.bytes_written,
+            "count": self.count,
+            "pretty_print": self.pretty_print,
+            "metadata": self.metadata,
+        }
+        temp_filename = self.checkpoint_filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, self.checkpoint_filename)
+        self._since_checkpoint = 0
+        self.checkpoints += 1
+
+    def close(self):
+        """Write the closing tags and remove the checkpoint"""
+        if self.closed:
+            return
+        super().close()
+        if os.path.exists(self.checkpoint_filename):
+            os.remove(self.checkpoint_filename)
@@ -0,0 +1,484 @@
+"""
+ERMS Schema Code Generator
+==========================
+
+Generates a Python module with lookup tables from XML Schema files, so
+that element ordering and value lists can come from the schemas instead
+of being maintained by hand:
+
+- TAGS: qualified tag per element name
+- SORT_RANKS: parent tag -> {child tag: rank} in schema sequence order,
+  in the format used by utils.add_in_element()
+- VALUE_LISTS: enumerations of named simple types and of anonymous
+  simple types on attributes and elements (keyed by attribute or element
+  name)
+- One builder class per element with a complex type. The classes use
+  __slots__, have their qualified tags written out as constants and check
+  value lists inline, so building an element does no tag concatenation or
+  lookups beyond the insert by rank. Children are set with set_<name>()
+  (replaces an earlier child) or add_<name>() (repeatable children) and
+  are placed in schema order whatever the call order.
+
+Usage:
+    erms-create codegen ERMS_v3.xsd ERMS-SVK-element.xsd -o erms_tables.py
+
+    import erms_tables
+    from erms_create.core.utils import register_sort_ranks
+    register_sort_ranks(erms_tables.SORT_RANKS)
+
+    note = erms_tables.Note(note_type="intern")
+    note.set_text("...")
+"""
+
+import keyword
+import os
+import pprint
+import re
+from typing import Dict, List
+from lxml import etree
+
+XS_NAMESPACE = "http://www.w3.org/2001/XMLSchema"
+XS = "{%s}" % XS_NAMESPACE
+
+# Model groups whose element declarations are read in document order
+_GROUPS = (XS + "sequence", XS + "choice", XS + "all")
+
+
+def _local(name: str) -> str:
+    """Name without namespace prefix"""
+    return name.split(":", 1)[1] if ":" in name else name
+
+
+def _qualified(node: etree._Element, name: str) -> str:
+    """Qualified tag for a prefixed name (e.g. a ref) in the scope of node"""
+    prefix, _, local = name.rpartition(":")
+    namespace = node.nsmap.get(prefix or None)
+    return "{%s}%s" % (namespace, local) if namespace else local
+
+
+def _repeated(node: etree._Element) -> bool:
+    """True if a particle may occur more than once"""
+    return node.get("maxOccurs", "1") != "1"
+
+
+class ElementInfo:
+    """Content of an element with a complex type, for the builder classes"""
+
+    __slots__ = ("name", "attributes", "text", "children", "repeated")
+
+    def __init__(self, name: str):
+        self.name = name
+        # (attribute name, required, value list name or None)
+        self.attributes = []
+        # Text content (simple content or mixed)
+        self.text = False
+        self.children = []
+        self.repeated = set()
+
+
+class SchemaModel:
+    """Element orders and enumerations read from one or more schemas"""
+
+    def __init__(self):
+        self.tags = {}
+        self.children = {}
+        self.value_lists = {}
+        self.conflicts = []
+        self.sources = []
+        # Tag -> ElementInfo for elements with a complex type
+        self.elements = {}
+        # Tag -> value list name (or None) for elements with simple content
+        self.simple_elements = {}
+
+    def add_schema(self, source):
+        """
+        Read a schema file (and the files it includes or imports).
+
+        Args:
+            source: Filename of an XSD
+
+        Raises:
+            ValueError: If the file is not an XML Schema
+        """
+        filename = os.path.abspath(os.fspath(source))
+        if filename in self.sources:
+            return
+        root = etree.parse(filename).getroot()
+        if root.tag != XS + "schema":
+            raise ValueError(f"Not an XML Schema: {source}")
+        self.sources.append(filename)
+
+        namespace = root.get("targetNamespace")
+        prefix = "{%s}" % namespace if namespace else ""
+        types = {element.get("name"): element for element in root.iter(XS + "complexType")
+                 if element.get("name")}
+        groups = {element.get("name"): element for element in root.iter(XS + "group")
+                  if element.get("name")}
+        attribute_groups = {element.get("name"): element
+                            for element in root.iter(XS + "attributeGroup")
+                            if element.get("name")}
+
+        for element in root.iter(XS + "element"):
+            name = element.get("name")
+            if not name:
+                continue
+            tag = prefix + name
+            self.tags.setdefault(name, tag)
+            complex_type = element.find(XS + "complexType")
+            if complex_type is None and element.get("type"):
+                complex_type = types.get(_local(element.get("type")))
+            if complex_type is None:
+                if element.find(XS + "simpleType") is not None:
+                    self.simple_elements.setdefault(tag, name)
+                else:
+                    self.simple_elements.setdefault(tag, _local(element.get("type", "")) or None)
+                continue
+            repeated = set()
+            children = self._child_tags(complex_type, prefix, types, groups, repeated=repeated)
+            if tag not in self.elements:
+                info = ElementInfo(name)
+                info.children = children
+                info.repeated = repeated
+                self._read_attributes(info, complex_type, types, attribute_groups, set())
+                self.elements[tag] = info
+            if not children:
+                continue
+            known = self.children.get(tag)
+            if known is None:
+                self.children[tag] = children
+            elif known != children and tag not in self.conflicts:
+                self.conflicts.append(tag)
+
+        for simple_type in root.iter(XS + "simpleType"):
+            values = [value.get("value") for value in simple_type.iter(XS + "enumeration")]
+            if not values:
+                continue
+            name = simple_type.get("name")
+            parent = simple_type.getparent()
+            if name is None and parent.tag in (XS + "attribute", XS + "element"):
+                name = parent.get("name")
+            if name:
+                self.value_lists.setdefault(name, values)
+
+        base = os.path.dirname(filename)
+        for reference in root.findall(XS + "include") + root.findall(XS + "import"):
+            location = reference.get("schemaLocation")
+            if location and "://" not in location:
+                self.add_schema(os.path.join(base, location))
+
+    def _child_tags(self, complex_type: etree._Element, prefix: str, types: dict,
+                    groups: dict, seen: set = None, repeated: set = None) -> List[str]:
+        """
+        Qualified tags of the elements declared in a complex type, in document order.
+
+        Tags of children that may occur more than once (by their own
+        maxOccurs or that of an enclosing group) are added to repeated.
+        """
+        seen = set() if seen is None else seen
+        repeated = set() if repeated is None else repeated
+        tags = []
+
+        def visit(node, many=False):
+            for child in node:
+                if child.tag == XS + "element":
+                    if child.get("name"):
+                        tag = prefix + child.get("name")
+                    elif child.get("ref"):
+                        tag = _qualified(child, child.get("ref"))
+                    else:
+                        continue
+                    if tag not in tags:
+                        tags.append(tag)
+                    if many or _repeated(child):
+                        repeated.add(tag)
+                elif child.tag in _GROUPS:
+                    visit(child, many or _repeated(child))
+                elif child.tag == XS + "group" and child.get("ref"):
+                    group = groups.get(_local(child.get("ref")))
+                    if group is not None:
+                        visit(group, many or _repeated(child))
+                elif child.tag in (XS + "complexContent", XS + "extension"):
+                    base = types.get(_local(child.get("base", "")))
+                    if base is not None and base.get("name") not in seen:
+                        seen.add(base.get("name"))
+                        tags.extend(tag for tag in self._child_tags(base, prefix, types,
+                                                                    groups, seen, repeated)
+                                    if tag not in tags)
+                    visit(child, many)
+
+        visit(complex_type)
+        return tags
+
+    def _read_attributes(self, info: ElementInfo, complex_type: etree._Element, types: dict,
+                         attribute_groups: dict, seen: set):
+        """Attributes and text content of a complex type, including its base types"""
+        if complex_type.get("mixed") == "true":
+            info.text = True
+        for child in complex_type:
+            if child.tag == XS + "attribute" and child.get("name"):
+                name = child.get("name")
+                if any(known == name for known, _, _ in info.attributes):
+                    continue
+                if child.find(XS + "simpleType") is not None:
+                    value_list = name
+                else:
+                    value_list = _local(child.get("type", "")) or None
+                info.attributes.append((name, child.get("use") == "required", value_list))
+            elif child.tag == XS + "attributeGroup" and child.get("ref"):
+                group = attribute_groups.get(_local(child.get("ref")))
+                if group is not None:
+                    self._read_attributes(info, group, types, attribute_groups, seen)
+            elif child.tag in (XS + "complexContent", XS + "simpleContent",
+                               XS + "extension", XS + "restriction"):
+                if child.tag == XS + "simpleContent":
+                    info.text = True
+                base = types.get(_local(child.get("base", "")))
+                if base is not None and base.get("name") not in seen:
+                    seen.add(base.get("name"))
+                    self._read_attributes(info, base, types, attribute_groups, seen)
+                self._read_attributes(info, child, types, attribute_groups, seen)
+
+    def sort_ranks(self) -> Dict[str, Dict[str, int]]:
+        """Parent tag -> {child tag: rank}"""
+        return {parent: {child: rank for rank, child in enumerate(children)}
+                for parent, children in self.children.items()}
+
+
+def read_schemas(sources) -> SchemaModel:
+    """Read schema files into a SchemaModel"""
+    model = SchemaModel()
+    for source in sources:
+        model.add_schema(source)
+    return model
+
+
+def generate_module(model: SchemaModel) -> str:
+    """
+    Python source for a module with the tables of a SchemaModel.
+
+    The output is deterministic for the same schemas.
+    """
+    def literal(value) -> str:
+        return pprint.pformat(value, width=100, sort_dicts=True)
+
+    sources = "\n".join(f"    {os.path.basename(source)}" for source in model.sources)
+    lines = [
+        '"""',
+        "Tables and builder classes generated from XML Schema by erms_create.core.codegen.",
+        "",
+        "Sources:",
+        sources,
+        "",
+        "Do not edit by hand; regenerate with `erms-create codegen`.",
+        '"""',
+        "",
+        "from lxml import etree",
+        "",
+        f"TAGS = {literal(model.tags)}",
+        "",
+        f"SORT_RANKS = {literal(model.sort_ranks())}",
+        "",
+        f"VALUE_LISTS = {literal(model.value_lists)}",
+        "",
+    ]
+    lines.extend(_generate_classes(model))
+    return "\n".join(lines)
+
+
+_BUILDER_BASE = '''
+
+class _Builder:
+    """Base of the generated builder classes: wraps one element"""
+
+    __slots__ = ("element",)
+    TAG = None
+    # Child tag -> rank in schema order
+    RANKS = {}
+
+    @classmethod
+    def from_element(cls, element):
+        """Bind a builder to an existing element"""
+        builder = cls.__new__(cls)
+        builder.element = element
+        return builder
+
+    def _insert(self, element, replace=False):
+        """Place a child after the children with the same or an earlier rank"""
+        parent = self.element
+        if replace:
+            existing = parent.find(element.tag)
+            if existing is not None:
+                parent.replace(existing, element)
+                return element
+        ranks = self.RANKS
+        last = len(ranks)
+        rank = ranks.get(element.tag, last)
+        index = len(parent)
+        while index and ranks.get(parent[index - 1].tag, last) > rank:
+            index -= 1
+        parent.insert(index, element)
+        return element
+
+    def _text_child(self, tag, nsmap, value, replace):
+        element = etree.Element(tag, nsmap=nsmap)
+        element.text = str(value)
+        return self._insert(element, replace)
+'''
+
+
+def _identifier(name: str, taken: set, prefix: str = "") -> str:
+    """A snake_case Python identifier for an XML name, unique within taken"""
+    snake = re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+    snake = prefix + re.sub(r"\W", "_", snake)
+    if not snake.isidentifier() or keyword.iskeyword(snake):
+        snake = "_" + snake if not snake.isidentifier() else snake + "_"
+    identifier, number = snake, 2
+    while identifier in taken:
+        identifier, number = f"{snake}{number}", number + 1
+    taken.add(identifier)
+    return identifier
+
+
+def _split(tag: str):
+    """(namespace or None, local name) of a qualified tag"""
+    if tag.startswith("{"):
+        namespace, local = tag[1:].split("}", 1)
+        return namespace, local
+    return None, tag
+
+
+def _generate_classes(model: SchemaModel) -> List[str]:
+    """Source lines for the builder classes of the elements with a complex type"""
+    lines = []
+    nsmaps = {}
+    for tag in sorted(set(model.elements) | set(model.simple_elements)
+                      | {child for info in model.elements.values() for child in info.children}):
+        namespace = _split(tag)[0]
+        if namespace not in nsmaps:
+            nsmaps[namespace] = f"_NSMAP_{len(nsmaps)}"
+            value = {None: namespace} if namespace else None
+            lines.append(f"{nsmaps[namespace]} = {value!r}")
+
+    # Checked value lists as frozensets, one constant per list
+    checks = {}
+    used = set()
+    for info in model.elements.values():
+        used.update(value_list for _, _, value_list in info.attributes)
+    used.update(model.simple_elements.values())
+    taken = set()
+    for name in sorted(value_list for value_list in used if value_list in model.value_lists):
+        checks[name] = "_VALUES_" + _identifier(name, taken).upper()
+        lines.append(f"{checks[name]} = frozenset(VALUE_LISTS[{name!r}])")
+    lines.append(_BUILDER_BASE)
+
+    classes = {}
+    taken = {"_Builder", "TAGS", "SORT_RANKS", "VALUE_LISTS", "etree"}
+    for tag in sorted(model.elements):
+        name = model.elements[tag].name
+        base = re.sub(r"\W", "_", name[:1].upper() + name[1:])
+        base = base if base.isidentifier() else "_" + base
+        identifier, number = base, 2
+        while identifier in taken:
+            identifier, number = f"{base}{number}", number + 1
+        taken.add(identifier)
+        classes[tag] = identifier
+
+    for tag in sorted(model.elements):
+        lines.extend(_generate_class(model, tag, classes, nsmaps, checks))
+    return lines
+
+
+def _generate_class(model: SchemaModel, tag: str, classes: dict, nsmaps: dict,
+                    checks: dict) -> List[str]:
+    """Source lines for one builder class"""
+    info = model.elements[tag]
+    nsmap = nsmaps[_split(tag)[0]]
+    lines = [
+        "",
+        f"class {classes[tag]}(_Builder):",
+        f'    """<{info.name}>"""',
+        "",
+        "    __slots__ = ()",
+        f"    TAG = {tag!r}",
+    ]
+    if tag in model.children:
+        lines.append(f"    RANKS = SORT_RANKS[{tag!r}]")
+
+    # Required attributes first, then optional ones, all keyword-only
+    taken = {"self", "element"}
+    parameters = ["text=None"] if info.text else []
+    if info.text:
+        taken.add("text")
+    attributes = [(_identifier(name, taken), name, required, value_list)
+                  for name, required, value_list in sorted(info.attributes,
+                                                           key=lambda item: not item[1])]
+    if attributes:
+        parameters.append("*")
+        parameters.extend(argument if required else f"{argument}=None"
+                          for argument, _, required, _ in attributes)
+    create = f"etree.Element({tag!r}, nsmap={nsmap})"
+    lines.extend([
+        "",
+        f"    def __init__({', '.join(['self'] + parameters)}):",
+        f"        self.element = element = {create}" if info.text or attributes
+        else f"        self.element = {create}",
+    ])
+    if info.text:
+        lines.extend([
+            "        if text is not None:",
+            "            element.text = str(text)",
+        ])
+    for argument, name, required, value_list in attributes:
+        indent = "        "
+        if not required:
+            lines.append(f"        if {argument} is not None:")
+            indent += "    "
+        if value_list in checks:
+            lines.extend([
+                f"{indent}if {argument} not in {checks[value_list]}:",
+                f'{indent}    raise ValueError(f"Invalid {name}: {{{argument}!r}}")',
+            ])
+        lines.append(f"{indent}element.set({name!r}, {argument})")
+
+    methods = set()
+    for child in info.children:
+        repeated = child in info.repeated
+        method = _identifier(_split(child)[1], methods, "add_" if repeated else "set_")
+        replace = not repeated
+        lines.append("")
+        if child in classes:
+            lines.extend([
+                f"    def {method}(self, *args, **kwargs) -> {classes[child]!r}:",
+                f'        """{"Add" if repeated else "Set"} <{_split(child)[1]}>"""',
+                f"        child = {classes[child]}(*args, **kwargs)",
+                f"        self._insert(child.element{', True' if replace else ''})",
+                "        return child",
+            ])
+            continue
+        lines.extend([
+            f"    def {method}(self, value):",
+            f'        """{"Add" if repeated else "Set"} <{_split(child)[1]}>"""',
+        ])
+        value_list = model.simple_elements.get(child)
+        if value_list in checks:
+            lines.extend([
+                f"        if value not in {checks[value_list]}:",
+                f'            raise ValueError(f"Invalid {_split(child)[1]}: {{value!r}}")',
+            ])
+        lines.append(f"        return self._text_child({child!r}, "
+                     f"{nsmaps[_split(child)[0]]}, value, {replace})")
+    lines.append("")
+    return lines
+
+
+def generate_file(sources, output: str) -> SchemaModel:
+    """
+    Read schemas and write the generated module.
+
+    Returns:
+        SchemaModel: The model the module was generated from
+    """
+    model = read_schemas(sources)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(generate_module(model))
+    return model
@@ -7,7 +7,7 @@ about the document itself.
 """
 
 from lxml import etree
-from .elements import Dates, Agent
+from .elements import Dates, agent_element
 from .utils import add_in_element, validate_value_list
 from . import namespaces as ns
 from . import value_lists
@@ -41,8 +41,14 @@ class MaintenanceEvent:
         date_elm.text = date_time
         
         # Add agent
-        agent = Agent(agent_type, agent_name, **agent_kwargs)
-        self.element.append(agent.element)
+        self.element.append(agent_element(agent_type, agent_name, **agent_kwargs))
+
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "MaintenanceEvent":
+        """Bind a MaintenanceEvent wrapper to an existing element"""
+        event = cls.__new__(cls)
+        event.element = element
+        return event
 
 
 class MaintenanceHistory:
@@ -52,6 +58,17 @@ class MaintenanceHistory:
         self.element = etree.Element(ns.ERMS + "maintenanceHistory", nsmap=ns.ERMS_NSMAP)
         self.maintenance_events = []
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "MaintenanceHistory":
+        """Bind a MaintenanceHistory wrapper to an existing element"""
+        history = cls.__new__(cls)
+        history.element = element
+        history.maintenance_events = [
+            MaintenanceEvent.from_element(elm)
+            for elm in element.findall(ns.ERMS + "maintenanceEvent")
+        ]
+        return history
+
     def add_maintenance_event(self, event_type: str, date_time: str, 
                             agent_name: str, agent_type: str, **agent_kwargs) -> MaintenanceEvent:
         """Add a maintenance event"""
@@ -70,6 +87,16 @@ class MaintenanceAgency:
         self.other_agency_codes = []
         self.agency_names = []
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "MaintenanceAgency":
+        """Bind a MaintenanceAgency wrapper to an existing element"""
+        agency = cls.__new__(cls)
+        agency.element = element
+        agency.agency_code = element.find(ns.ERMS + "agencyCode")
+        agency.other_agency_codes = element.findall(ns.ERMS + "otherAgencyCode")
+        agency.agency_names = element.findall(ns.ERMS + "agencyName")
+        return agency
+
     def set_agency_code(self, agency_code: str, code_type: str):
         """Set the primary agency code"""
         self.agency_code.text = agency_code
@@ -109,6 +136,20 @@ class MaintenanceInformation:
         self.maintenance_history = MaintenanceHistory()
         self.element.append(self.maintenance_history.element)
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "MaintenanceInformation":
+        """Bind a MaintenanceInformation wrapper to an existing element"""
+        info = cls.__new__(cls)
+        info.element = element
+        info.maintenance_status = element.find(ns.ERMS + "maintenanceStatus")
+        agency = element.find(ns.ERMS + "maintenanceAgency")
+        info.maintenance_agency = (
+            MaintenanceAgency.from_element(agency) if agency is not None else None)
+        history = element.find(ns.ERMS + "maintenanceHistory")
+        info.maintenance_history = (
+            MaintenanceHistory.from_element(history) if history is not None else None)
+        return info
+
     def set_maintenance_status(self, value: str):
         """Set maintenance status"""
         validate_value_list(value, value_lists.MAINTENANCE_STATUS, "maintenance status")
@@ -138,6 +179,27 @@ class Control:
         
         self.system_information = None
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "Control":
+        """
+        Bind a Control wrapper to an existing <control> element.
+
+        Used when reading existing documents.
+        """
+        control = cls.__new__(cls)
+        control.element = element
+        control.identifications = element.findall(ns.ERMS + "identification")
+        control.information_class = element.find(ns.ERMS + "informationClass")
+        control.security_class = element.find(ns.ERMS + "securityClass")
+        dates = element.find(ns.ERMS + "dates")
+        control.dates = Dates.from_element(dates) if dates is not None else None
+        control.classification_schema = element.find(ns.ERMS + "classificationSchema")
+        info = element.find(ns.ERMS + "maintenanceInformation")
+        control.maintenance_information = (
+            MaintenanceInformation.from_element(info) if info is not None else None)
+        control.system_information = element.find(ns.ERMS + "systemInformation")
+        return control
+
     def add_identification(self, value: str, identification_type: str):
         """Add an identification element"""
         elm = etree.Element(ns.ERMS + "identification", 
@@ -177,7 +239,29 @@ class Control:
             add_in_element(self.element, self.dates.element)
         self.dates.add_date(date, date_type, other_date_type)
 
-    def set_system_information(self):
-        """Set system information (TODO: Implement)"""
-        # TODO: Implement system information element
-        pass
+    def set_system_information(self, name: str, version: str = None):
+        """
+        Set information about the system that created the document.
+
+        Replaces earlier system information.
+
+        Args:
+            name: Name of the system
+            version: Version of the system
+
+        Returns:
+            The systemInformation element
+        """
+        if self.system_information is not None:
+            self.element.remove(self.system_information)
+        self.system_information = etree.Element(ns.ERMS + "systemInformation",
+                                                nsmap=ns.ERMS_NSMAP)
+        name_elm = etree.SubElement(self.system_information, ns.ERMS + "name",
+                                    nsmap=ns.ERMS_NSMAP)
+        name_elm.text = name
+        if version:
+            version_elm = etree.SubElement(self.system_information, ns.ERMS + "version",
+                                           nsmap=ns.ERMS_NSMAP)
+            version_elm.text = version
+        add_in_element(self.element, self.system_information)
+        return self.system_information
@@ -5,11 +5,107 @@ Common ERMS Elements
 Reusable elements that can be used in multiple contexts.
 """
 
+import copy
+import threading
+from collections import OrderedDict
 from lxml import etree
 from . import namespaces as ns
 from . import value_lists
 from .utils import validate_value_list
 
+# Default number of prebuilt agent and date fragments kept
+DEFAULT_FRAGMENT_CACHE_SIZE = 512
+
+
+class FragmentCache:
+    """
+    Bounded LRU cache of prebuilt elements.
+
+    get() returns a deep copy of the cached element, so callers can insert
+    and modify it freely. Elements are built (and validated) only on a miss.
+    A key is cached only when it misses a second time, so unique values
+    (most timestamps) cost a set lookup instead of a copy into the cache.
+    The cache is shared between threads.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        """
+        Args:
+            maxsize: Maximum number of cached elements (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._elements = OrderedDict()
+        # Keys that have missed once, in the order they were seen
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, build) -> etree._Element:
+        """
+        Copy of the element cached under key, built with build() on a miss.
+
+        Args:
+            key: Hashable arguments that determine the element
+            build: Function that creates the element
+
+        Returns:
+            etree._Element: An element that is not shared with the cache
+        """
+        try:
+            hash(key)
+        except TypeError:
+            with self._lock:
+                self.misses += 1
+            return build()
+
+        with self._lock:
+            element = self._elements.get(key)
+            if element is not None:
+                self._elements.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(element)
+            self.misses += 1
+            admit = self.maxsize > 0 and self._seen.pop(key, False)
+            if self.maxsize > 0 and not admit:
+                self._seen[key] = True
+                while len(self._seen) > self.maxsize:
+                    self._seen.popitem(last=False)
+
+        element = build()
+        if admit:
+            with self._lock:
+                self._elements[key] = copy.deepcopy(element)
+                while len(self._elements) > self.maxsize:
+                    self._elements.popitem(last=False)
+        return element
+
+    def resize(self, maxsize: int):
+        """Change the maximum size, dropping the least recently used elements"""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._elements) > max(maxsize, 0):
+                self._elements.popitem(last=False)
+            while len(self._seen) > max(maxsize, 0):
+                self._seen.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached elements and reset the counters"""
+        with self._lock:
+            self._elements.clear()
+            self._seen.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict:
+        """Hits, misses, current size and maximum size"""
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._elements), "maxsize": self.maxsize}
+
+
+# Cache used by Agents.add_agent(), Dates.add_date() and agent_element()
+FRAGMENT_CACHE = FragmentCache()
+
 
 class Dates:
     """Container for date elements"""
@@ -17,6 +113,13 @@ class Dates:
     def __init__(self):
         self.element = etree.Element(ns.ERMS + "dates", nsmap=ns.ERMS_NSMAP)
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "Dates":
+        """Bind a Dates wrapper to an existing <dates> element"""
+        dates = cls.__new__(cls)
+        dates.element = element
+        return dates
+
     def add_date(self, date: str, date_type: str, other_date_type: str = None):
         """
         Add a date element.
@@ -26,6 +129,13 @@ class Dates:
             date_type: Type of date from value_lists.DATE_TYPE
             other_date_type: Required if date_type is "other"
         """
+        elm = FRAGMENT_CACHE.get(("date", date, date_type, other_date_type),
+                                 lambda: self._build_date(date, date_type, other_date_type))
+        self.element.append(elm)
+        return elm
+
+    @staticmethod
+    def _build_date(date: str, date_type: str, other_date_type: str = None) -> etree._Element:
         # Validate date type
         validate_value_list(date_type, value_lists.DATE_TYPE, "date type")
         
@@ -40,7 +150,6 @@ class Dates:
             
         elm = etree.Element(ns.ERMS + "date", attributes, nsmap=ns.ERMS_NSMAP)
         elm.text = date
-        self.element.append(elm)
         return elm
 
 
@@ -107,6 +216,29 @@ class Agent:
             prot_elm = etree.SubElement(self.element, ns.ERMS + "protectedIdentity", nsmap=ns.ERMS_NSMAP)
             prot_elm.text = "true"
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "Agent":
+        """Bind an Agent wrapper to an existing <agent> element"""
+        agent = cls.__new__(cls)
+        agent.element = element
+        return agent
+
+
+def agent_element(agent_type: str, name: str, **kwargs) -> etree._Element:
+    """
+    <agent> element as created by Agent(), taken from FRAGMENT_CACHE.
+
+    Args:
+        agent_type: Type of agent
+        name: Agent name
+        **kwargs: Additional arguments for the Agent constructor
+
+    Returns:
+        etree._Element: A new element owned by the caller
+    """
+    key = ("agent", agent_type, name) + tuple(sorted(kwargs.items()))
+    return FRAGMENT_CACHE.get(key, lambda: Agent(agent_type, name, **kwargs).element)
+
 
 class Agents:
     """Container for multiple agents"""
@@ -115,6 +247,14 @@ class Agents:
         self.element = etree.Element(ns.ERMS + "agents", nsmap=ns.ERMS_NSMAP)
         self.agents = []
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "Agents":
+        """Bind an Agents wrapper to an existing <agents> element"""
+        agents = cls.__new__(cls)
+        agents.element = element
+        agents.agents = [Agent.from_element(elm) for elm in element.findall(ns.ERMS + "agent")]
+        return agents
+
     def add_agent(self, agent_type: str, name: str, **kwargs) -> Agent:
         """
         Add an agent to the collection.
@@ -127,7 +267,7 @@ class Agents:
         Returns:
             Agent: Created agent object
         """
-        agent = Agent(agent_type, name, **kwargs)
+        agent = Agent.from_element(agent_element(agent_type, name, **kwargs))
         self.element.append(agent.element)
         self.agents.append(agent)
         return agent
@@ -0,0 +1,329 @@
+"""
+ERMS Direct Emitter
+===================
+
+Write-only element fragments that serialize straight to UTF-8 bytes
+without building an lxml tree.
+
+A Fragment keeps its children in ERMS schema order (the same ordering as
+add_in_element) and writes them with precomputed tag strings. The output is
+byte-identical to serializing the corresponding lxml element with
+serialize_element() in the context of an erms root: the same escaping, the
+same attribute order and the same pretty-print indentation.
+
+AggregationFragment and RecordFragment offer the building methods of
+Aggregation and Record with the same validation.
+
+Usage:
+    aggregation = AggregationFragment("caseFile")
+    aggregation.set_title("Bygglov")
+    record = aggregation.append(RecordFragment("ärendedokument", "digital"))
+    record.add_date("2024-01-15T10:00:00", "created")
+    writer.write_raw(aggregation.serialize(writer.pretty_print))
+"""
+
+import re
+from typing import Dict, Iterable, List
+from uuid import uuid4
+from . import namespaces as ns
+from .instrumentation import instrumented
+from . import value_lists
+from .streaming import AGGREGATION_LEVEL, INDENT
+from .utils import (AGGREGATION_SORT_ORDER, CONTROL_SORT_ORDER, RECORD_SORT_ORDER,
+                    RESTRICTION_SORT_ORDER, validate_value_list)
+
+# Characters lxml refuses in text and attribute values
+_INVALID_CHARACTERS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _ranks(sort_order: List[str]) -> Dict[str, int]:
+    """Child rank by local name for one of the SORT_ORDER lists"""
+    prefix = len(ns.ERMS)
+    ranks = {}
+    for rank, tag in enumerate(sort_order):
+        ranks.setdefault(tag[prefix:], rank)
+    return ranks
+
+
+# Precomputed child ranks, equivalent to the SORT_ORDER lists in utils
+CONTROL_ORDER = _ranks(CONTROL_SORT_ORDER)
+AGGREGATION_ORDER = _ranks(AGGREGATION_SORT_ORDER)
+RECORD_ORDER = _ranks(RECORD_SORT_ORDER)
+RESTRICTION_ORDER = _ranks(RESTRICTION_SORT_ORDER)
+
+# Start and end tag strings per element name, filled on first use
+_TAGS = {}
+
+
+def _tags(name: str) -> tuple:
+    tags = _TAGS.get(name)
+    if tags is None:
+        tags = _TAGS[name] = ("<" + name, "</" + name + ">")
+    return tags
+
+
+def _check(value: str) -> str:
+    if _INVALID_CHARACTERS.search(value):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, "
+                         "no NULL bytes or control characters")
+    return value
+
+
+def escape_text(value: str) -> str:
+    """Escape element text the way lxml does"""
+    _check(value)
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    return value
+
+
+def escape_attribute(value: str) -> str:
+    """Escape an attribute value the way lxml does"""
+    value = escape_text(value)
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\t" in value:
+        value = value.replace("\t", "&#9;")
+    return value
+
+
+class Fragment:
+    """
+    Write-only XML element in the ERMS namespace.
+
+    Children are grouped by name and written in the rank order given by
+    order; children with the same name keep their insertion order. Names
+    missing from order are written last, as add_in_element appends them.
+    Without order, children are written in insertion order.
+    """
+
+    __slots__ = ("name", "attributes", "text", "order", "_children", "_count")
+
+    def __init__(self, name: str, attributes: Dict[str, str] = None, text: str = None,
+                 order: Dict[str, int] = None):
+        """
+        Args:
+            name: Local element name
+            attributes: Attribute values in output order
+            text: Element text
+            order: Child ranks (e.g. AGGREGATION_ORDER)
+        """
+        self.name = name
+        self.attributes = attributes
+        self.text = text
+        self.order = order
+        self._children = {}
+        self._count = 0
+
+    def append(self, child: "Fragment") -> "Fragment":
+        """Add a child at its schema position"""
+        if self.order is None:
+            rank = 0
+        else:
+            rank = self.order.get(child.name, len(self.order))
+        self._children.setdefault(rank, []).append(child)
+        self._count += 1
+        return child
+
+    def add(self, name: str, text: str = None, attributes: Dict[str, str] = None,
+            order: Dict[str, int] = None) -> "Fragment":
+        """Create and add a child"""
+        return self.append(Fragment(name, attributes, text, order))
+
+    def find(self, name: str) -> "Fragment":
+        """First child with the given name, or None"""
+        for child in self.children(name):
+            return child
+        return None
+
+    def children(self, name: str = None) -> Iterable["Fragment"]:
+        """Children in output order, optionally only those with the given name"""
+        for rank in sorted(self._children):
+            for child in self._children[rank]:
+                if name is None or child.name == name:
+                    yield child
+
+    def __len__(self) -> int:
+        return self._count
+
+    @instrumented("serialize.fragment")
+    def serialize(self, pretty_print: bool = True, level: int = AGGREGATION_LEVEL) -> bytes:
+        """
+        Serialize as UTF-8 bytes for insertion into an erms document.
+
+        Args:
+            pretty_print: Indent like serialize_element()
+            level: Nesting level of the element in the target document
+
+        Returns:
+            bytes: Serialized element without tail
+        """
+        parts = []
+        self._write(parts, level if pretty_print else None)
+        return "".join(parts).encode("utf-8")
+
+    def _write(self, parts: list, level):
+        start, end = _tags(self.name)
+        parts.append(start)
+        if self.attributes:
+            for key, value in self.attributes.items():
+                parts.append(f' {key}="{escape_attribute(value)}"')
+
+        if self._count:
+            parts.append(">")
+            if level is None:
+                if self.text:
+                    parts.append(escape_text(self.text))
+                for child in self.children():
+                    child._write(parts, None)
+            else:
+                if self.text and self.text.strip():
+                    raise ValueError("Mixed content cannot be pretty printed")
+                inner = "\n" + INDENT * (level + 1)
+                for child in self.children():
+                    parts.append(inner)
+                    child._write(parts, level + 1)
+                parts.append("\n" + INDENT * level)
+            parts.append(end)
+        elif self.text is None:
+            parts.append("/>")
+        else:
+            parts.append(">")
+            parts.append(escape_text(self.text))
+            parts.append(end)
+
+
+def agent_fragment(agent_type: str, name: str, organisation: str = None,
+                   unit_name: str = None, id_number: str = None, id_type: str = None,
+                   role: str = None, protected_identity: bool = False,
+                   other_agent_type: str = None) -> Fragment:
+    """<agent> fragment with the same validation and content as elements.Agent"""
+    validate_value_list(agent_type, value_lists.AGENT_TYPE, "agent type")
+    if agent_type == "other" and not other_agent_type:
+        raise ValueError("other_agent_type is required when agent_type is 'other'")
+
+    attributes = {"agentType": agent_type}
+    if other_agent_type:
+        attributes["otherAgentType"] = other_agent_type
+    agent = Fragment("agent", attributes)
+    agent.add("name", name)
+    if organisation:
+        agent.add("organisation", organisation)
+    if unit_name:
+        agent.add("unitName", unit_name)
+    if id_number:
+        agent.add("idNumber", id_number, {"idNumberType": id_type} if id_type else None)
+    if role:
+        agent.add("role", role)
+    if protected_identity:
+        agent.add("protectedIdentity", "true")
+    return agent
+
+
+def date_fragment(date: str, date_type: str, other_date_type: str = None) -> Fragment:
+    """<date> fragment with the same validation and content as Dates.add_date()"""
+    validate_value_list(date_type, value_lists.DATE_TYPE, "date type")
+    if date_type == "other" and not other_date_type:
+        raise ValueError("other_date_type is required when date_type is 'other'")
+
+    attributes = {"dateType": date_type}
+    if other_date_type:
+        attributes["otherDateType"] = other_date_type
+    return Fragment("date", attributes, date)
+
+
+class _ContentFragment(Fragment):
+    """Methods shared by aggregation and record fragments"""
+
+    __slots__ = ("object_id", "title", "status", "agents", "dates")
+
+    def __init__(self, name: str, attributes: Dict[str, str], order: Dict[str, int]):
+        super().__init__(name, attributes, order=order)
+        self.object_id = None
+        self.title = None
+        self.status = None
+        self.agents = None
+        self.dates = None
+
+    def set_object_id(self, object_id: str):
+        """Set the object ID"""
+        if self.object_id is None:
+            self.object_id = self.add("objectId", object_id)
+
+    def set_title(self, value: str):
+        """Set title"""
+        if self.title is None:
+            self.title = self.add("title", value)
+
+    def set_status(self, value: str):
+        """Set status"""
+        validate_value_list(value, value_lists.STATUS, "status")
+        if self.status is None:
+            self.status = self.add("status", attributes={"value": value})
+
+    def add_agent(self, agent_type: str, name: str, **kwargs):
+        """Add an agent"""
+        agent = agent_fragment(agent_type, name, **kwargs)
+        if self.agents is None:
+            self.agents = self.add("agents")
+        self.agents.append(agent)
+
+    def add_date(self, date: str, date_type: str, other_date_type: str = None):
+        """Add a date"""
+        date = date_fragment(date, date_type, other_date_type)
+        if self.dates is None:
+            self.dates = self.add("dates")
+        self.dates.append(date)
+
+
+class AggregationFragment(_ContentFragment):
+    """Write-only counterpart of Aggregation"""
+
+    __slots__ = ()
+
+    def __init__(self, type_of_aggregation: str = "caseFile", system_identifier: str = None):
+        validate_value_list(type_of_aggregation, value_lists.AGGREGATION_TYPE, "aggregation type")
+        super().__init__("aggregation", {
+            "systemIdentifier": system_identifier or str(uuid4()),
+            "aggregationType": type_of_aggregation,
+        }, AGGREGATION_ORDER)
+
+    def add_extra_id(self, type_of_id: str, value: str):
+        """Add an extra ID"""
+        self.add("extraId", value, {"extraIdType": type_of_id})
+
+    def add_classification(self, value: str, class_code: str = None):
+        """Add classification"""
+        self.add("classification", value,
+                 {"classificationCode": class_code} if class_code else None)
+
+
+class RecordFragment(_ContentFragment):
+    """Write-only counterpart of Record"""
+
+    __slots__ = ("running_number",)
+
+    def __init__(self, record_type: str = None, physical_or_digital: str = None,
+                 system_identifier: str = None):
+        attributes = {"systemIdentifier": system_identifier or str(uuid4())}
+        if record_type is not None:
+            attributes["recordType"] = record_type
+        if physical_or_digital is not None:
+            validate_value_list(physical_or_digital, value_lists.RECORD_PHYSICAL_OR_DIGITAL,
+                                "record physical or digital")
+            attributes["recordPhysicalOrDigital"] = physical_or_digital
+        super().__init__("record", attributes, RECORD_ORDER)
+        self.running_number = None
+
+    def set_running_number(self, value: int):
+        """Set running number"""
+        if self.running_number is None:
+            self.running_number = self.add("runningNumber", str(value))
@@ -9,14 +9,28 @@ from lxml import etree
 from .control import Control
 from .aggregation import Aggregation
 from .record import Record
+from .canonical import to_c14n
+from .instrumentation import instrumented
 from . import namespaces as ns
 
 
 class Erms:
     """Main ERMS document class"""
     
-    def __init__(self, aggr: bool = True):
-        self.element = etree.Element(ns.ERMS + "erms", nsmap=ns.ROOT_NSMAP)
+    def __init__(self, aggr: bool = True, sorted_output: bool = False, nsmap: dict = None):
+        """
+        Args:
+            aggr: Hold aggregations (True) or records (False)
+            sorted_output: Sort aggregations and records by objectId before serialization
+            nsmap: Namespaces to declare once on the root (default ROOT_NSMAP).
+                   When given, redeclarations further down are removed before
+                   serialization, see namespaces.hoist_namespaces().
+        """
+        self.sorted_output = sorted_output
+        self.hoist_namespaces = nsmap is not None
+        self.nsmap = nsmap if nsmap is not None else ns.ROOT_NSMAP
+
+        self.element = etree.Element(ns.ERMS + "erms", nsmap=self.nsmap)
         
         # Add control element
         self.control = Control()
@@ -32,6 +46,7 @@ class Erms:
             self.element.append(self.records)
             self.aggregations = None
 
+    @instrumented("build.add_aggregation")
     def add_aggregation(self, type_of_aggregation: str = "caseFile") -> Aggregation:
         """Add an aggregation"""
         if self.aggregations is not None:
@@ -41,6 +56,7 @@ class Erms:
         else:
             raise ValueError("Cannot add aggregation when Erms was initialized with aggr=False")
 
+    @instrumented("build.add_record")
     def add_record(self, record_type: str = None, physical_or_digital: str = None) -> Record:
         """Add a record"""
         if self.records is not None:
@@ -50,9 +66,21 @@ class Erms:
         else:
             raise ValueError("Cannot add record when Erms was initialized with aggr=True")
     
+    def sort_aggregations(self, include_records: bool = True):
+        """Sort aggregations (and records within them) by objectId"""
+        if self.aggregations is not None:
+            from .sorting import sort_aggregations
+
+            sort_aggregations(self.aggregations, include_records)
+
+    @instrumented("serialize.document")
     def to_xml_string(self, pretty_print: bool = True, xml_declaration: bool = True, 
                      encoding: str = "UTF-8") -> str:
         """Generate XML string from ERMS structure"""
+        if self.sorted_output:
+            self.sort_aggregations()
+        if self.hoist_namespaces:
+            ns.hoist_namespaces(self.element, self.nsmap)
         return etree.tostring(
             self.element, 
             pretty_print=pretty_print, 
@@ -60,9 +88,69 @@ class Erms:
             encoding=encoding
         ).decode(encoding)
     
+    @instrumented("serialize.c14n")
+    def to_c14n(self, exclude_volatile: bool = False) -> bytes:
+        """
+        Generate canonical XML (C14N 2.0) from ERMS structure.
+
+        Args:
+            exclude_volatile: Leave out generated identifiers and timestamps
+                              (for comparing content between builds)
+        """
+        if self.sorted_output:
+            self.sort_aggregations()
+        return to_c14n(self.element, exclude_volatile)
+
     def save_to_file(self, filename: str, pretty_print: bool = True, 
-                    xml_declaration: bool = True, encoding: str = "UTF-8"):
-        """Save ERMS structure to file"""
+                    xml_declaration: bool = True, encoding: str = "UTF-8",
+                    canonical: bool = False):
+        """Save ERMS structure to file (as C14N 2.0 if canonical is set)"""
+        if canonical:
+            with open(filename, 'wb') as f:
+                f.write(self.to_c14n())
+            return
         xml_string = self.to_xml_string(pretty_print, xml_declaration, encoding)
         with open(filename, 'w', encoding=encoding) as f:
             f.write(xml_string)
+
+    async def asave(self, filename: str, pretty_print: bool = True,
+                    xml_declaration: bool = True, encoding: str = "UTF-8",
+                    canonical: bool = False, executor=None) -> int:
+        """
+        Async save_to_file(): serialize in the executor and write without
+        blocking the event loop.
+
+        The document must not be modified until the call has completed.
+
+        Args:
+            executor: AsyncExecutor (default: the shared executor)
+
+        Returns:
+            int: Number of bytes written
+        """
+        from .aio import get_default_executor  # asyncio is only loaded for the async API
+
+        executor = executor or get_default_executor()
+        if canonical:
+            data = await executor.run(self.to_c14n)
+        else:
+            data = await executor.run(
+                lambda: self.to_xml_string(pretty_print, xml_declaration, encoding).encode(encoding))
+        await executor.write(filename, data)
+        return len(data)
+
+    def append_to_file(self, filename: str, pretty_print: bool = True) -> int:
+        """
+        Append this document's aggregations to an existing ERMS file.
+
+        The control element of this document is not written; the existing
+        file keeps its own. Only the end of the file is rewritten.
+
+        Returns:
+            int: Number of aggregations appended
+        """
+        if self.aggregations is None:
+            raise ValueError("Cannot append when Erms was initialized with aggr=False")
+        from .append import append_aggregations
+
+        return append_aggregations(filename, list(self.aggregations), pretty_print)
@@ -0,0 +1,187 @@
+"""
+ERMS Instrumentation
+====================
+
+Opt-in timers and counters around the hot paths, to see whether the time
+of a slow export goes to building, element ordering (add_in_element), SVK
+extension building, validation, serialization or writing.
+
+Instrumentation is off by default. While it is off an instrumented
+function costs one extra call and a flag check; nothing is recorded.
+
+Timers are inclusive: a phase that calls another instrumented phase also
+contains that time (add_record_svk includes the add_in_element calls it
+makes, validate includes the serialization it does first).
+
+Phases:
+    build.*       builder entry points (add_case, add_record_svk, ...)
+    order.*       element ordering
+    extensions.*  SVK notes, audit log, contract info and appendices
+    validate.*    validators
+    serialize.*   serializers
+    write.*       stream writers (counters: write.bytes)
+
+Usage:
+    from erms_create.core import instrumentation
+
+    with instrumentation.enabled() as registry:
+        build_delivery()
+    print(instrumentation.format_report(registry.snapshot()))
+
+    # or get every timed call as it happens
+    instrumentation.enable(callback=lambda phase, seconds: ...)
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+
+class Instrumentation:
+    """Registry of per-phase timers and named counters"""
+
+    def __init__(self):
+        self.enabled = False
+        self._timers = {}
+        self._counters = {}
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        """Record one timed call of a phase"""
+        with self._lock:
+            timer = self._timers.get(phase)
+            if timer is None:
+                timer = self._timers[phase] = [0, 0.0]
+            timer[0] += 1
+            timer[1] += seconds
+            callbacks = self._callbacks
+        for callback in callbacks:
+            callback(phase, seconds)
+
+    def count(self, name: str, value: int = 1):
+        """Add to a named counter (only while enabled)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Time a block of code as one call of a phase"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def add_callback(self, callback: Callable[[str, float], None]):
+        """Call callback(phase, seconds) after every timed call"""
+        with self._lock:
+            self._callbacks = self._callbacks + [callback]
+
+    def remove_callback(self, callback: Callable[[str, float], None]):
+        """Stop calling a callback added with add_callback()"""
+        with self._lock:
+            self._callbacks = [other for other in self._callbacks if other is not callback]
+
+    def reset(self):
+        """Clear all timers and counters"""
+        with self._lock:
+            self._timers = {}
+            self._counters = {}
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Current values.
+
+        Returns:
+            dict: {"timers": {phase: {"calls", "seconds"}}, "counters": {name: value}}
+        """
+        with self._lock:
+            return {
+                "timers": {phase: {"calls": calls, "seconds": seconds}
+                           for phase, (calls, seconds) in sorted(self._timers.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+
+# The registry used by all instrumented functions in the package
+REGISTRY = Instrumentation()
+
+
+def instrumented(phase: str):
+    """Decorator that times every call of the function as the given phase"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REGISTRY.record(phase, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def enable(reset: bool = True, callback: Callable[[str, float], None] = None) -> Instrumentation:
+    """
+    Turn instrumentation on.
+
+    Args:
+        reset: Clear earlier values first
+        callback: Also call callback(phase, seconds) after every timed call
+
+    Returns:
+        Instrumentation: The registry
+    """
+    if reset:
+        REGISTRY.reset()
+    if callback is not None:
+        REGISTRY.add_callback(callback)
+    REGISTRY.enabled = True
+    return REGISTRY
+
+
+def disable():
+    """Turn instrumentation off (values are kept until the next reset)"""
+    REGISTRY.enabled = False
+
+
+@contextmanager
+def enabled(reset: bool = True, callback: Callable[[str, float], None] = None):
+    """Instrument the calls made within the block"""
+    was_enabled = REGISTRY.enabled
+    registry = enable(reset, callback)
+    try:
+        yield registry
+    finally:
+        REGISTRY.enabled = was_enabled
+        if callback is not None:
+            REGISTRY.remove_callback(callback)
+
+
+def snapshot() -> Dict[str, dict]:
+    """Current values of the shared registry"""
+    return REGISTRY.snapshot()
+
+
+def format_report(values: Dict[str, dict]) -> str:
+    """Per-phase breakdown as a readable table, slowest phase first"""
+    timers = sorted(values["timers"].items(), key=lambda item: item[1]["seconds"],
+                    reverse=True)
+    lines = [f"{'phase':<32} {'calls':>10} {'seconds':>10} {'us/call':>10}"]
+    for phase, timer in timers:
+        per_call = timer["seconds"] / timer["calls"] * 1e6 if timer["calls"] else 0
+        lines.append(f"{phase:<32} {timer['calls']:>10} {timer['seconds']:>10.3f} "
+                     f"{per_call:>10.1f}")
+    for name, value in values["counters"].items():
+        lines.append(f"{name:<32} {value:>10}")
+    return "\n".join(lines)
@@ -0,0 +1,173 @@
+"""
+ERMS Merge
+==========
+
+Merge many ERMS files into one document in a streaming pass.
+
+The aggregations of the input files are copied one at a time into the
+output, so only one input aggregation is held in memory regardless of the
+number of input files. The output gets a single reconciled control element.
+"""
+
+import copy
+import os
+from typing import Iterable, Sequence
+from lxml import etree
+from .streaming import ErmsStreamWriter, read_control, iter_aggregations
+from .checkpoint import CheckpointWriter, DEFAULT_CHECKPOINT_INTERVAL
+from . import namespaces as ns
+
+
+def _identifications(control: etree._Element) -> set:
+    """(type, value) pairs of the identifications in a control element"""
+    return {
+        (elm.get("identificationType"), elm.text)
+        for elm in control.iterchildren(ns.ERMS + "identification")
+    }
+
+
+def reconcile_controls(sources: Iterable[str],
+                       required_identifications: Sequence[str] = ()) -> etree._Element:
+    """
+    Build one control element for a merged document.
+
+    The first input's control is used as base. Identifications that are not
+    present with the same value in every input (e.g. a case number in a
+    per-case file) are removed.
+
+    Args:
+        sources: Input files
+        required_identifications: Identification types that must have the same
+                                  value in all inputs where they occur
+
+    Returns:
+        etree._Element: Reconciled control element
+
+    Raises:
+        ValueError: If a required identification differs between inputs
+    """
+    base = None
+    common = None
+    required_values = {}
+
+    for source in sources:
+        control = read_control(source)
+        if control is None:
+            raise ValueError(f"No control element in {source}")
+
+        identifications = _identifications(control)
+        for id_type, value in identifications:
+            if id_type in required_identifications:
+                previous = required_values.setdefault(id_type, (value, source))
+                if previous[0] != value:
+                    raise ValueError(
+                        f"Identification '{id_type}' differs between {previous[1]} "
+                        f"('{previous[0]}') and {source} ('{value}')")
+
+        if base is None:
+            base = copy.deepcopy(control)
+            common = identifications
+        else:
+            common &= identifications
+
+    if base is None:
+        raise ValueError("No input files given")
+
+    for elm in list(base.iterchildren(ns.ERMS + "identification")):
+        if (elm.get("identificationType"), elm.text) not in common:
+            base.remove(elm)
+    return base
+
+
+def merge_erms_files(sources: Sequence[str], output: str, control=None,
+                     required_identifications: Sequence[str] = (),
+                     on_duplicate: str = "error", pretty_print: bool = True,
+                     checkpoint_interval: int = None, resume: bool = False) -> dict:
+    """
+    Merge the aggregations of several ERMS files into one file.
+
+    Duplicate objectIds are detected with a set of the ids seen so far. The
+    output is written to a temporary file that replaces output only when the
+    merge has completed.
+
+    With checkpoint_interval the temporary file is checkpointed every
+    checkpoint_interval input aggregations and kept if the merge fails, so
+    that it can be continued with resume.
+
+    Args:
+        sources: Input files, merged in the given order
+        output: Output file
+        control: Control element (or Control object) for the output. If not
+                 given, the controls of the inputs are reconciled.
+        required_identifications: See reconcile_controls()
+        on_duplicate: "error" to fail or "skip" to keep the first occurrence
+        pretty_print: Indent output like lxml pretty_print
+        checkpoint_interval: Input aggregations between checkpoints
+        resume: Continue an interrupted merge from its last checkpoint
+
+    Returns:
+        dict: Summary with counts of files, aggregations and skipped duplicates
+
+    Raises:
+        ValueError: On duplicate objectIds when on_duplicate is "error"
+    """
+    if on_duplicate not in ("error", "skip"):
+        raise ValueError(f"Invalid on_duplicate: '{on_duplicate}'. Must be one of: error, skip")
+
+    sources = list(sources)
+    if control is None:
+        control = reconcile_controls(sources, required_identifications)
+    elif not isinstance(control, etree._Element):
+        control = control.element
+
+    seen = set()
+    duplicates = []
+    temp_output = output + ".tmp"
+    checkpointed = resume or checkpoint_interval is not None
+
+    if checkpointed:
+        writer = CheckpointWriter(temp_output, control, pretty_print=pretty_print,
+                                  checkpoint_interval=checkpoint_interval or DEFAULT_CHECKPOINT_INTERVAL,
+                                  resume=resume,
+                                  metadata={"sources": [os.path.abspath(source) for source in sources],
+                                            "on_duplicate": on_duplicate})
+        advance = writer.advance
+        written_before = writer.input_position
+    else:
+        writer = ErmsStreamWriter(temp_output, control, pretty_print=pretty_print)
+        advance = lambda: None  # noqa: E731
+        written_before = 0
+
+    try:
+        with writer:
+            position = 0
+            for source in sources:
+                for aggregation in iter_aggregations(source):
+                    replay = position < written_before
+                    position += 1
+                    object_id = aggregation.findtext(ns.ERMS + "objectId")
+                    if object_id is not None:
+                        if object_id in seen:
+                            if on_duplicate == "error":
+                                raise ValueError(f"Duplicate objectId '{object_id}' in {source}")
+                            duplicates.append(object_id)
+                            if not replay:
+                                advance()
+                            continue
+                        seen.add(object_id)
+                    if not replay:
+                        writer.write_aggregation(aggregation)
+                        advance()
+    except BaseException:
+        if not checkpointed and os.path.exists(temp_output):
+            os.remove(temp_output)
+        raise
+
+    os.replace(temp_output, output)
+
+    return {
+        "files": len(sources),
+        "aggregations": writer.count,
+        "duplicates_skipped": duplicates,
+        "bytes": writer.bytes_written,
+    }
@@ -2,6 +2,8 @@
 XML Namespaces for ERMS
 """
 
+from lxml import etree
+
 ERMS_NAMESPACE = "https://DILCIS.eu/XML/ERMS"
 ERMS = "{%s}" % ERMS_NAMESPACE
 
@@ -10,3 +12,22 @@ XSI = "{%s}" % XSI_NAMESPACE
 
 ROOT_NSMAP = {None: ERMS_NAMESPACE, "xsi": XSI_NAMESPACE}
 ERMS_NSMAP = {None: ERMS_NAMESPACE}
+
+
+def hoist_namespaces(element: etree._Element, nsmap: dict):
+    """
+    Declare the namespaces in nsmap once on element and drop the
+    redeclarations below it.
+
+    Elements are built detached with their own nsmap and keep a local
+    declaration wherever the default namespace changes (e.g. extension
+    elements inside additionalXMLData and ERMS elements inside those).
+    After hoisting, elements in a namespace with a prefix in nsmap are
+    written with that prefix instead.
+
+    Args:
+        element: Root of the tree to rewrite (normally <erms>)
+        nsmap: Namespaces to declare on element
+    """
+    etree.cleanup_namespaces(element, top_nsmap=nsmap,
+                             keep_ns_prefixes=[prefix for prefix in nsmap if prefix])
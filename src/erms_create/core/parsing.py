@@ -0,0 +1,75 @@
+"""
+ERMS Parsing
+============
+
+Shared parser configuration for reading existing ERMS documents.
+
+All reading in the library goes through the same tuned options so that
+large deliveries (``huge_tree``) and pretty-printed input
+(``remove_blank_text``) behave the same regardless of entry point.
+"""
+
+import threading
+from lxml import etree
+from . import namespaces as ns
+
+# Parser options shared by XMLParser and iterparse
+PARSER_OPTIONS = {
+    "huge_tree": True,
+    "remove_blank_text": True,
+    "resolve_entities": False,
+    "no_network": True,
+}
+
+_local = threading.local()
+
+
+def get_parser() -> etree.XMLParser:
+    """
+    Get the cached XMLParser for the current thread.
+
+    lxml parsers must not be shared between threads, so one parser is
+    created lazily per thread and then reused for every parse.
+
+    Returns:
+        etree.XMLParser: Parser configured with PARSER_OPTIONS
+    """
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = etree.XMLParser(**PARSER_OPTIONS)
+        _local.parser = parser
+    return parser
+
+
+def parse_fragment(data: bytes) -> etree._Element:
+    """
+    Parse a serialized element (e.g. a single aggregation) with the cached parser.
+
+    Args:
+        data: Serialized XML bytes
+
+    Returns:
+        etree._Element: Parsed element
+    """
+    return etree.fromstring(data, get_parser())
+
+
+def iterparse(source, events: tuple = ("end",), tag=None):
+    """
+    Iterate over an ERMS document with the shared parser options.
+
+    Args:
+        source: Filename or file object
+        events: Events to report (see lxml.etree.iterparse)
+        tag: Optional tag or list of tags to filter on
+
+    Returns:
+        lxml.etree.iterparse: Iterator of (event, element)
+    """
+    return etree.iterparse(source, events=events, tag=tag, **PARSER_OPTIONS)
+
+
+def is_top_level_aggregation(element: etree._Element) -> bool:
+    """Check if an aggregation element is a direct child of <aggregations>"""
+    parent = element.getparent()
+    return parent is not None and parent.tag == ns.ERMS + "aggregations"
@@ -0,0 +1,312 @@
+"""
+ERMS Pipeline
+=============
+
+Multi-stage pipeline with bounded queues between the stages.
+
+Every stage has its own worker threads (or a process pool) and reads from a
+bounded queue, so a slow stage makes the earlier stages wait instead of
+buffering unlimited work (backpressure). Items carry a sequence number and
+the sink receives them in input order, whatever the number of workers. The
+number of items between the source and the sink, including items waiting
+for an earlier one to be reordered, is limited to queue_size per queue, so
+one slow item does not let the reorder buffer grow with the input.
+
+lxml releases the GIL while serializing, parsing and validating, so those
+stages overlap with Python work in other stages even with threads.
+
+Usage:
+    pipeline = Pipeline(queue_size=64)
+    pipeline.add_stage("build", build, workers=2)
+    pipeline.add_stage("serialize", writer.serialize, workers=2)
+    pipeline.run(rows, sink=writer.write_raw)
+    print(pipeline.metrics())
+"""
+
+import heapq
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable
+
+# Default capacity of each queue between stages
+DEFAULT_QUEUE_SIZE = 64
+
+# Seconds between checks for a stopped pipeline while blocked on a queue
+_POLL_INTERVAL = 0.05
+
+# Marks the end of the input in a queue
+_END = object()
+
+# A stage function returns this to drop the item
+DROP = object()
+
+
+class StageMetrics:
+    """Counters for one stage"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._queue_depth_total = 0
+        self._queue_samples = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, queue_depth: int, dropped: bool = False):
+        """Record one processed item and the depth of the input queue"""
+        with self._lock:
+            self.items += 1
+            if dropped:
+                self.dropped += 1
+            self.busy_seconds += seconds
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            self._queue_depth_total += queue_depth
+            self._queue_samples += 1
+
+    def as_dict(self, elapsed: float) -> dict:
+        """Metrics as a dict; throughput is items per second of pipeline wall time"""
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "dropped": self.dropped,
+            "busy_seconds": round(self.busy_seconds, 6),
+            "items_per_second": round(self.items / elapsed, 2) if elapsed > 0 else None,
+            "utilization": round(self.busy_seconds / (elapsed * self.workers), 4)
+                           if elapsed > 0 else None,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_queue_depth": round(self._queue_depth_total / self._queue_samples, 2)
+                                if self._queue_samples else 0,
+        }
+
+
+class _Stage:
+    def __init__(self, name: str, func: Callable, workers: int, processes: bool):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.processes = processes
+        self.metrics = StageMetrics(name, workers)
+        self.input = None
+        self.output = None
+        self.pool = None
+        self.remaining = workers
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    """
+    Runs items through a sequence of stages into a sink.
+
+    A stage function takes one item and returns the item for the next
+    stage, or DROP to leave it out. An exception in any stage stops the
+    pipeline and is raised from run().
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            queue_size: Capacity of each queue between stages
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.queue_size = queue_size
+        self._stages = []
+        self._source_metrics = None
+        self._sink_metrics = None
+        self._elapsed = 0.0
+
+    def add_stage(self, name: str, func: Callable, workers: int = 1,
+                  processes: bool = False) -> "Pipeline":
+        """
+        Add a stage after the existing ones.
+
+        Args:
+            name: Stage name (key in metrics())
+            func: Function applied to each item
+            workers: Number of worker threads (or processes)
+            processes: Run func in a process pool. func, its input and its
+                       output must then be picklable (not lxml elements).
+
+        Returns:
+            Pipeline: self, for chaining
+        """
+        if workers < 1:
+            raise ValueError(f"Stage '{name}' needs at least one worker")
+        if any(stage.name == name for stage in self._stages):
+            raise ValueError(f"Duplicate stage name: '{name}'")
+        self._stages.append(_Stage(name, func, workers, processes))
+        return self
+
+    def run(self, source: Iterable, sink: Callable, source_name: str = "fetch",
+            sink_name: str = "write") -> int:
+        """
+        Run all items from source through the stages.
+
+        The source is read in a separate thread. The sink is called in the
+        calling thread, in input order.
+
+        Args:
+            source: Input items
+            sink: Function called with each output item
+            source_name: Name of the source in metrics()
+            sink_name: Name of the sink in metrics()
+
+        Returns:
+            int: Number of items passed to the sink
+        """
+        stop = threading.Event()
+        errors = []
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self._stages) + 1)]
+        self._source_metrics = StageMetrics(source_name, 1)
+        self._sink_metrics = StageMetrics(sink_name, 1)
+        # Items read from the source and not yet taken by the sink
+        in_flight = threading.Semaphore(self.queue_size * len(queues))
+
+        def put(q, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _END
+
+        def fail(error):
+            errors.append(error)
+            stop.set()
+
+        def feed():
+            try:
+                iterator = iter(source)
+                sequence = 0
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    self._source_metrics.record(time.perf_counter() - start, 0)
+                    while not in_flight.acquire(timeout=_POLL_INTERVAL):
+                        if stop.is_set():
+                            return
+                    if not put(queues[0], (sequence, item)):
+                        return
+                    sequence += 1
+                for _ in range(self._stages[0].workers if self._stages else 1):
+                    put(queues[0], _END)
+            except BaseException as e:
+                fail(e)
+
+        def work(stage):
+            try:
+                while True:
+                    entry = get(stage.input)
+                    if entry is _END:
+                        break
+                    sequence, item = entry
+                    # A dropped item still passes on its sequence number
+                    if item is not DROP:
+                        depth = stage.input.qsize()
+                        start = time.perf_counter()
+                        if stage.pool is not None:
+                            item = stage.pool.submit(stage.func, item).result()
+                        else:
+                            item = stage.func(item)
+                        stage.metrics.record(time.perf_counter() - start, depth, item is DROP)
+                    if not put(stage.output, (sequence, item)):
+                        return
+            except BaseException as e:
+                fail(e)
+            finally:
+                with stage.lock:
+                    stage.remaining -= 1
+                    last = stage.remaining == 0
+                if last and not stop.is_set():
+                    index = self._stages.index(stage)
+                    followers = (self._stages[index + 1].workers
+                                 if index + 1 < len(self._stages) else 1)
+                    for _ in range(followers):
+                        put(stage.output, _END)
+
+        threads = [threading.Thread(target=feed, name=f"pipeline-{source_name}", daemon=True)]
+        for index, stage in enumerate(self._stages):
+            stage.input = queues[index]
+            stage.output = queues[index + 1]
+            stage.remaining = stage.workers
+            stage.metrics = StageMetrics(stage.name, stage.workers)
+            if stage.processes:
+                stage.pool = ProcessPoolExecutor(max_workers=stage.workers)
+            for number in range(stage.workers):
+                threads.append(threading.Thread(target=work, args=(stage,), daemon=True,
+                                                name=f"pipeline-{stage.name}-{number}"))
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        written = 0
+        pending = []
+        next_sequence = 0
+        try:
+            while True:
+                entry = get(queues[-1])
+                if entry is _END:
+                    break
+                depth = queues[-1].qsize()
+                heapq.heappush(pending, entry)
+                while pending and pending[0][0] == next_sequence:
+                    _, item = heapq.heappop(pending)
+                    next_sequence += 1
+                    in_flight.release()
+                    if item is DROP:
+                        continue
+                    start = time.perf_counter()
+                    sink(item)
+                    self._sink_metrics.record(time.perf_counter() - start, depth)
+                    written += 1
+        except BaseException as e:
+            fail(e)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            for stage in self._stages:
+                if stage.pool is not None:
+                    stage.pool.shutdown()
+                    stage.pool = None
+            self._elapsed = time.perf_counter() - started
+
+        if errors:
+            raise errors[0]
+        return written
+
+    def metrics(self) -> dict:
+        """
+        Metrics of the last run, per stage in pipeline order.
+
+        Returns:
+            dict: Stage name -> metrics (see StageMetrics.as_dict), plus
+                  "elapsed_seconds" for the whole run
+        """
+        result = {}
+        if self._source_metrics is not None:
+            result[self._source_metrics.name] = self._source_metrics.as_dict(self._elapsed)
+        for stage in self._stages:
+            result[stage.name] = stage.metrics.as_dict(self._elapsed)
+        if self._sink_metrics is not None:
+            result[self._sink_metrics.name] = self._sink_metrics.as_dict(self._elapsed)
+        result["elapsed_seconds"] = round(self._elapsed, 6)
+        return result
@@ -9,11 +9,23 @@ from lxml import etree
 from uuid import uuid4
 from .utils import add_in_element, validate_value_list
 from .elements import Dates, Agents
+from .canonical import CanonicalMixin, invalidates_content_hash
 from . import namespaces as ns
 from . import value_lists
 
+# Qualified tags, built once instead of in every setter
+_RECORD_TAG = ns.ERMS + "record"
+_OBJECT_ID_TAG = ns.ERMS + "objectId"
+_EXTRA_ID_TAG = ns.ERMS + "extraId"
+_TITLE_TAG = ns.ERMS + "title"
+_STATUS_TAG = ns.ERMS + "status"
+_RUNNING_NUMBER_TAG = ns.ERMS + "runningNumber"
+_AGENTS_TAG = ns.ERMS + "agents"
+_DATES_TAG = ns.ERMS + "dates"
+_ADDITIONAL_INFORMATION_TAG = ns.ERMS + "additionalInformation"
 
-class Record:
+
+class Record(CanonicalMixin):
     """Standard ERMS Record"""
 
     def __init__(self, record_type: str = None, physical_or_digital: str = None):
@@ -26,7 +38,7 @@ class Record:
                               "record physical or digital")
             attributes["recordPhysicalOrDigital"] = physical_or_digital
 
-        self.element = etree.Element(ns.ERMS + "record", attributes, nsmap=ns.ERMS_NSMAP)
+        self.element = etree.Element(_RECORD_TAG, attributes, nsmap=ns.ERMS_NSMAP)
         
         # Initialize components
         self.object_id = None
@@ -38,34 +50,67 @@ class Record:
         self.dates = None
         self.additional_information = None
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "Record":
+        """
+        Bind a Record wrapper to an existing <record> element.
+
+        Used when reading existing documents. No new elements are created;
+        the wrapper attributes point to the children already in the tree.
+        """
+        rec = cls.__new__(cls)
+        rec.element = element
+        rec._bind_children()
+        return rec
+
+    def _bind_children(self):
+        """Set component attributes from the children of self.element"""
+        find = self.element.find
+
+        self.object_id = find(_OBJECT_ID_TAG)
+        self.extra_id = self.element.findall(_EXTRA_ID_TAG)
+        self.title = find(_TITLE_TAG)
+        self.status = find(_STATUS_TAG)
+        self.running_number = find(_RUNNING_NUMBER_TAG)
+        agents = find(_AGENTS_TAG)
+        self.agents = Agents.from_element(agents) if agents is not None else None
+        dates = find(_DATES_TAG)
+        self.dates = Dates.from_element(dates) if dates is not None else None
+        self.additional_information = find(_ADDITIONAL_INFORMATION_TAG)
+
+    @invalidates_content_hash
     def set_object_id(self, object_id: str):
         """Set the object ID"""
         if self.object_id is None:
-            self.object_id = etree.Element(ns.ERMS + "objectId", nsmap=ns.ERMS_NSMAP)
+            self.object_id = etree.Element(_OBJECT_ID_TAG, nsmap=ns.ERMS_NSMAP)
             self.object_id.text = object_id
             add_in_element(self.element, self.object_id)
 
+    @invalidates_content_hash
     def set_title(self, value: str):
         """Set title"""
         if self.title is None:
-            self.title = etree.Element(ns.ERMS + "title", nsmap=ns.ERMS_NSMAP)
+            self.title = etree.Element(_TITLE_TAG, nsmap=ns.ERMS_NSMAP)
             self.title.text = value
             add_in_element(self.element, self.title)
 
+    @invalidates_content_hash
     def set_status(self, value: str):
         """Set status"""
         validate_value_list(value, value_lists.STATUS, "status")
         if self.status is None:
-            self.status = etree.Element(ns.ERMS + "status", value=value, nsmap=ns.ERMS_NSMAP)
+            self.status = etree.Element(_STATUS_TAG, value=value, nsmap=ns.ERMS_NSMAP)
             add_in_element(self.element, self.status)
 
+    @invalidates_content_hash
     def set_running_number(self, value: int):
         """Set running number"""
         if self.running_number is None:
-            self.running_number = etree.Element(ns.ERMS + "runningNumber", nsmap=ns.ERMS_NSMAP)
+            self.running_number = etree.Element(_RUNNING_NUMBER_TAG, nsmap=ns.ERMS_NSMAP)
             self.running_number.text = str(value)
             add_in_element(self.element, self.running_number)
 
+    @invalidates_content_hash
     def add_agent(self, agent_type: str, name: str, **kwargs):
         """Add an agent"""
         if self.agents is None:
@@ -73,6 +118,7 @@ class Record:
             add_in_element(self.element, self.agents.element)
         self.agents.add_agent(agent_type, name, **kwargs)
 
+    @invalidates_content_hash
     def add_date(self, date: str, date_type: str, other_date_type: str = None):
         """Add a date"""
         if self.dates is None:
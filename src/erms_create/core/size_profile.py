@@ -0,0 +1,323 @@
+"""
+ERMS Output Size Profiler
+=========================
+
+Attributes the serialized bytes of an ERMS document to element tags and
+paths, split by kind:
+
+- markup: tag names, angle brackets and end tags
+- attributes: attribute names, values and the space before them
+- namespaces: xmlns declarations
+- text: character data
+- whitespace: whitespace-only text, i.e. indentation from pretty_print
+- other: XML declaration, comments and processing instructions
+
+Files are read in chunks and tokenized without building a tree, so large
+deliveries can be profiled in constant memory. The report also points out
+output optimizations that would pay off: indentation, namespace
+declarations that repeat one already in scope, and subtrees (up to
+DUPLICATE_LIMIT bytes) that are byte-for-byte copies of an earlier one,
+such as the same agent block in every record.
+
+Usage:
+    report = profile_size("leverans.xml")
+    print(format_size_report(report))
+
+    report = profile_size(erms)            # an in-memory Erms
+    for item in rank_contributors(report):
+        print(item["name"], item["bytes"])
+"""
+
+import io
+import re
+from typing import Dict, Iterator, List
+
+CATEGORIES = ("markup", "attributes", "namespaces", "text", "whitespace", "other")
+
+# Subtrees larger than this are not compared for duplicates
+DUPLICATE_LIMIT = 1024
+
+# Maximum number of distinct subtrees remembered for duplicate detection
+MAX_TRACKED_SUBTREES = 1000000
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Comments, CDATA sections, processing instructions, declarations, tags, text
+_TOKEN = re.compile(rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<!(?!--|\[CDATA\[)[^>]*>"
+                    rb"|<[^!?][^>]*>|[^<]+", re.DOTALL)
+_START_TAG = re.compile(rb"<([^\s/>]+)")
+_ATTRIBUTE = re.compile(rb"""\s+([^\s=/>]+)\s*=\s*("[^"]*"|'[^']*')""")
+
+
+def _iter_tokens(stream, chunk_size: int) -> Iterator[bytes]:
+    """Yield the markup and text pieces of a byte stream, read chunk by chunk"""
+    tail = b""
+    while True:
+        data = stream.read(chunk_size)
+        eof = not data
+        buffer = tail + data
+        position = 0
+        for match in _TOKEN.finditer(buffer):
+            # Stop at a piece that may continue in the next chunk
+            if match.start() != position or (match.end() == len(buffer) and not eof):
+                break
+            yield match.group()
+            position = match.end()
+        tail = buffer[position:]
+        if eof:
+            if tail:
+                raise ValueError("Unterminated markup at end of document")
+            return
+
+
+def _empty_counts() -> Dict[str, int]:
+    counts = dict.fromkeys(CATEGORIES, 0)
+    counts["count"] = 0
+    counts["bytes"] = 0
+    return counts
+
+
+class _Open:
+    """An element whose end tag has not been read yet"""
+
+    __slots__ = ("name", "tag", "path", "path_counts", "start", "token", "scope")
+
+    def __init__(self, name: str, tag: dict, path: str, path_counts: dict, start: int,
+                 token: int, scope: dict):
+        self.name = name
+        self.tag = tag
+        self.path = path
+        self.path_counts = path_counts
+        self.start = start
+        self.token = token
+        self.scope = scope
+
+
+class _SizeProfiler:
+    """Accumulates the report from a stream of tokens"""
+
+    # Recent tokens kept for duplicate detection; an element of at most
+    # DUPLICATE_LIMIT bytes never spans more tokens than that
+    _KEEP_TOKENS = DUPLICATE_LIMIT + 1
+
+    def __init__(self):
+        self.total = 0
+        self.elements = 0
+        self.categories = dict.fromkeys(CATEGORIES, 0)
+        self.redundant_namespaces = 0
+        self.tags = {}
+        self.paths = {}
+        self.stack = []
+        self.recent = []
+        self.recent_base = 0
+        self.seen = {}
+        self.tracked = 0
+
+    def run(self, tokens: Iterator[bytes]):
+        categories = self.categories
+        stack = self.stack
+        recent = self.recent
+        for token in tokens:
+            size = len(token)
+            self.total += size
+            recent.append(token)
+            parent = stack[-1] if stack else None
+
+            if token[0] != 0x3C or token.startswith(b"<![CDATA["):  # not "<"
+                category = "text" if token.strip() else "whitespace"
+            elif token[1] == 0x2F:  # "</"
+                category = "markup"
+            elif token[1] in b"?!":
+                category = "other"
+            else:
+                self._start(token, parent)
+                continue
+
+            categories[category] += size
+            if parent is not None:
+                parent.tag[category] += size
+                parent.path_counts[category] += size
+                if category == "markup":
+                    self._close(stack.pop())
+
+            if len(recent) > 8 * self._KEEP_TOKENS:
+                drop = len(recent) - self._KEEP_TOKENS
+                del recent[:drop]
+                self.recent_base += drop
+
+    def _start(self, token: bytes, parent: _Open):
+        match = _START_TAG.match(token)
+        if match is None:
+            raise ValueError(f"Malformed start tag: {token[:80]!r}")
+        name = match.group(1).decode("utf-8").rpartition(":")[2]
+        path = (parent.path if parent else "") + "/" + name
+
+        inherited = parent.scope if parent else {}
+        scope = inherited
+        attributes = namespaces = 0
+        for attribute in _ATTRIBUTE.finditer(token, match.end()):
+            length = attribute.end() - attribute.start()
+            key = attribute.group(1)
+            if key == b"xmlns" or key.startswith(b"xmlns:"):
+                namespaces += length
+                prefix = key[6:]
+                uri = attribute.group(2)[1:-1]
+                if scope.get(prefix) == uri:
+                    self.redundant_namespaces += length
+                else:
+                    if scope is inherited:
+                        scope = dict(inherited)
+                    scope[prefix] = uri
+            else:
+                attributes += length
+
+        tag = self.tags.get(name)
+        if tag is None:
+            tag = self.tags[name] = dict(_empty_counts(), duplicate_count=0, duplicate_bytes=0)
+        path_counts = self.paths.get(path)
+        if path_counts is None:
+            path_counts = self.paths[path] = _empty_counts()
+        self.elements += 1
+
+        markup = len(token) - attributes - namespaces
+        for counts in (self.categories, tag, path_counts):
+            counts["markup"] += markup
+            counts["attributes"] += attributes
+            counts["namespaces"] += namespaces
+
+        element = _Open(name, tag, path, path_counts, self.total - len(token),
+                        self.recent_base + len(self.recent) - 1, scope)
+        if token.endswith(b"/>"):
+            self._close(element)
+        else:
+            self.stack.append(element)
+
+    def _close(self, element: _Open):
+        size = self.total - element.start
+        tag = element.tag
+        tag["count"] += 1
+        tag["bytes"] += size
+        element.path_counts["count"] += 1
+        element.path_counts["bytes"] += size
+
+        if size <= DUPLICATE_LIMIT:
+            digest = hash(b"".join(self.recent[element.token - self.recent_base:]))
+            seen = self.seen.get(element.name)
+            if seen is None:
+                seen = self.seen[element.name] = set()
+            if digest in seen:
+                tag["duplicate_count"] += 1
+                tag["duplicate_bytes"] += size
+            elif self.tracked < MAX_TRACKED_SUBTREES:
+                seen.add(digest)
+                self.tracked += 1
+
+    def report(self) -> dict:
+        if self.stack:
+            raise ValueError(f"Unclosed element at end of document: {self.stack[-1].path}")
+        return {
+            "total_bytes": self.total,
+            "elements": self.elements,
+            "categories": self.categories,
+            "redundant_namespace_bytes": self.redundant_namespaces,
+            "tags": self.tags,
+            "paths": self.paths,
+        }
+
+
+def profile_size(source, pretty_print: bool = True,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Attribute the serialized bytes of a document to tags, paths and kinds.
+
+    Args:
+        source: Filename, binary file object, bytes, or an Erms document
+        pretty_print: How an Erms document is serialized
+        chunk_size: Bytes read at a time from a file
+
+    Returns:
+        dict: total_bytes, elements, categories (bytes per kind),
+              redundant_namespace_bytes, and per tag and per path: count,
+              bytes (whole subtrees), bytes per kind for the element's own
+              tags, attributes and direct text; tags also have
+              duplicate_count and duplicate_bytes
+
+    Raises:
+        ValueError: If the document is not well-formed enough to tokenize
+    """
+    if hasattr(source, "to_xml_string"):
+        source = source.to_xml_string(pretty_print=pretty_print).encode("utf-8")
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    profiler = _SizeProfiler()
+    if hasattr(source, "read"):
+        profiler.run(_iter_tokens(source, chunk_size))
+    else:
+        with open(source, "rb") as f:
+            profiler.run(_iter_tokens(f, chunk_size))
+    return profiler.report()
+
+
+def rank_contributors(report: dict, top: int = 10) -> List[dict]:
+    """
+    Bytes that output optimizations could remove, largest first.
+
+    Returns:
+        List of dicts with kind ("whitespace", "namespaces" or "duplicates"),
+        name, bytes and share of the total
+    """
+    total = report["total_bytes"] or 1
+    candidates = [
+        {"kind": "whitespace", "name": "indentation (pretty_print)",
+         "bytes": report["categories"]["whitespace"]},
+        {"kind": "namespaces", "name": "redundant xmlns declarations",
+         "bytes": report["redundant_namespace_bytes"]},
+    ]
+    for name, tag in report["tags"].items():
+        if tag["duplicate_bytes"]:
+            candidates.append({"kind": "duplicates",
+                               "name": f"repeated <{name}> blocks ({tag['duplicate_count']})",
+                               "bytes": tag["duplicate_bytes"]})
+    candidates = [item for item in candidates if item["bytes"]]
+    candidates.sort(key=lambda item: item["bytes"], reverse=True)
+    for item in candidates:
+        item["share"] = item["bytes"] / total
+    return candidates[:top]
+
+
+def _own_bytes(counts: dict) -> int:
+    return sum(counts[category] for category in CATEGORIES)
+
+
+def format_size_report(report: dict, top: int = 15) -> str:
+    """Report as readable text: kinds, largest tags and paths, and optimizations"""
+    total = report["total_bytes"] or 1
+    lines = [f"{report['total_bytes']} bytes, {report['elements']} elements", ""]
+    lines.append(f"{'kind':<12} {'bytes':>12} {'share':>7}")
+    for category in CATEGORIES:
+        size = report["categories"][category]
+        lines.append(f"{category:<12} {size:>12} {size / total:>7.1%}")
+
+    lines += ["", f"{'tag (own bytes)':<32} {'count':>9} {'bytes':>12} {'share':>7} "
+                  f"{'markup':>7} {'attrs':>7} {'xmlns':>7} {'text':>7}"]
+    tags = sorted(report["tags"].items(), key=lambda item: _own_bytes(item[1]), reverse=True)
+    for name, tag in tags[:top]:
+        own = _own_bytes(tag) or 1
+        lines.append(f"{name:<32} {tag['count']:>9} {_own_bytes(tag):>12} "
+                     f"{_own_bytes(tag) / total:>7.1%} {tag['markup'] / own:>7.0%} "
+                     f"{tag['attributes'] / own:>7.0%} {tag['namespaces'] / own:>7.0%} "
+                     f"{(tag['text'] + tag['whitespace']) / own:>7.0%}")
+
+    lines += ["", f"{'path (subtree bytes)':<60} {'count':>9} {'bytes':>12} {'share':>7}"]
+    paths = sorted(report["paths"].items(), key=lambda item: item[1]["bytes"], reverse=True)
+    for path, counts in paths[:top]:
+        lines.append(f"{path:<60} {counts['count']:>9} {counts['bytes']:>12} "
+                     f"{counts['bytes'] / total:>7.1%}")
+
+    contributors = rank_contributors(report, top)
+    if contributors:
+        lines += ["", "Possible savings:"]
+        for item in contributors:
+            lines.append(f"  {item['bytes']:>12} {item['share']:>7.1%}  {item['name']}")
+    return "\n".join(lines)
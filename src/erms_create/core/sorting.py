@@ -0,0 +1,213 @@
+"""
+ERMS Sorting
+============
+
+Deterministic ordering of aggregations and records by objectId.
+
+Small documents are sorted in memory (Erms.sort_aggregations()). For data
+that does not fit in memory, ExternalSorter spills sorted runs of serialized
+aggregations to temporary files and merges them while writing the output.
+"""
+
+import heapq
+import os
+import struct
+import tempfile
+from lxml import etree
+from .streaming import ErmsStreamWriter, read_control, iter_aggregations
+from .utils import natural_sort_key
+from . import namespaces as ns
+
+# Default number of aggregations per sorted run
+DEFAULT_RUN_SIZE = 10000
+
+# Run file record header: key length, data length, sequence number
+_HEADER = struct.Struct(">IIQ")
+
+
+def object_id_sort_key(element: etree._Element) -> tuple:
+    """Sort key for an aggregation or record: its objectId in natural order"""
+    return natural_sort_key(element.findtext(ns.ERMS + "objectId"))
+
+
+def sort_records(aggregation: etree._Element):
+    """
+    Sort the records of an aggregation by objectId.
+
+    The records keep the positions they had among the other children; only
+    their order among themselves changes. The sort is stable.
+
+    Args:
+        aggregation: Aggregation element
+    """
+    records = list(aggregation.iterchildren(ns.ERMS + "record"))
+    if len(records) < 2:
+        return
+
+    ordered = sorted(records, key=object_id_sort_key)
+    if ordered == records:
+        return
+
+    positions = [aggregation.index(record) for record in records]
+    for record in records:
+        aggregation.remove(record)
+    for position, record in zip(positions, ordered):
+        aggregation.insert(position, record)
+
+
+def sort_aggregations(container: etree._Element, include_records: bool = True):
+    """
+    Sort the aggregations of an <aggregations> element by objectId.
+
+    Args:
+        container: The <aggregations> element
+        include_records: Also sort the records within each aggregation
+    """
+    aggregations = list(container.iterchildren(ns.ERMS + "aggregation"))
+    if include_records:
+        for aggregation in aggregations:
+            sort_records(aggregation)
+    container[:] = sorted(aggregations, key=object_id_sort_key)
+
+
+class ExternalSorter:
+    """
+    External merge sort of serialized aggregations.
+
+    Aggregations are added one at a time. Every run_size aggregations the
+    buffer is sorted and written to a temporary file. When the output is
+    written the runs are merged with a k-way merge, so memory use is bounded
+    by run_size serialized aggregations.
+
+    Usage:
+        with ExternalSorter(writer.serialize) as sorter:
+            for aggregation in aggregations:
+                sorter.add(aggregation)
+            sorter.write_to(writer)
+    """
+
+    def __init__(self, serialize, run_size: int = DEFAULT_RUN_SIZE,
+                 include_records: bool = True, temp_dir: str = None):
+        """
+        Args:
+            serialize: Function that serializes an aggregation to bytes
+                       (normally ErmsStreamWriter.serialize)
+            run_size: Number of aggregations per sorted run
+            include_records: Also sort the records within each aggregation
+            temp_dir: Directory for run files (default: system temp dir)
+        """
+        self.serialize = serialize
+        self.run_size = run_size
+        self.include_records = include_records
+        self.temp_dir = temp_dir
+        self.count = 0
+        self._buffer = []
+        self._runs = []
+
+    def add(self, aggregation: etree._Element):
+        """Add an aggregation (it can be cleared as soon as this returns)"""
+        if self.include_records:
+            sort_records(aggregation)
+        self.add_serialized(aggregation.findtext(ns.ERMS + "objectId"),
+                            self.serialize(aggregation))
+
+    def add_serialized(self, object_id: str, data: bytes):
+        """Add an already serialized aggregation"""
+        self._buffer.append((natural_sort_key(object_id), self.count, object_id, data))
+        self.count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        """Sort the buffer and write it as a run file"""
+        self._buffer.sort(key=lambda item: (item[0], item[1]))
+        run = tempfile.TemporaryFile(dir=self.temp_dir)
+        for _, sequence, object_id, data in self._buffer:
+            key = (object_id if object_id is not None else "\0").encode("utf-8")
+            run.write(_HEADER.pack(len(key), len(data), sequence))
+            run.write(key)
+            run.write(data)
+        run.seek(0)
+        self._runs.append(run)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(run):
+        """Read a run file back as (key, sequence, object_id, data) items"""
+        while True:
+            header = run.read(_HEADER.size)
+            if not header:
+                return
+            key_length, data_length, sequence = _HEADER.unpack(header)
+            key = run.read(key_length).decode("utf-8")
+            object_id = None if key == "\0" else key
+            yield natural_sort_key(object_id), sequence, object_id, run.read(data_length)
+
+    def __iter__(self):
+        """Iterate over (object_id, data) in sorted order"""
+        self._buffer.sort(key=lambda item: (item[0], item[1]))
+        if not self._runs:
+            items = iter(self._buffer)
+        else:
+            sources = [self._read_run(run) for run in self._runs]
+            sources.append(iter(self._buffer))
+            items = heapq.merge(*sources, key=lambda item: (item[0], item[1]))
+        for _, _, object_id, data in items:
+            yield object_id, data
+
+    def write_to(self, writer: ErmsStreamWriter) -> int:
+        """
+        Write all aggregations in sorted order.
+
+        Returns:
+            int: Number of aggregations written
+        """
+        count = 0
+        for _, data in self:
+            writer.write_raw(data)
+            count += 1
+        return count
+
+    def close(self):
+        """Remove the run files"""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
+
+    def __enter__(self) -> "ExternalSorter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def sort_erms_file(source: str, output: str, run_size: int = DEFAULT_RUN_SIZE,
+                   include_records: bool = True, pretty_print: bool = True,
+                   temp_dir: str = None) -> int:
+    """
+    Write a copy of an ERMS file with aggregations (and records) sorted by objectId.
+
+    The input is streamed and sorted with ExternalSorter, so files larger
+    than memory can be sorted. The output is byte-stable for the same input.
+
+    Args:
+        source: ERMS file to sort
+        output: Output file (must differ from source)
+        run_size: Number of aggregations per sorted run
+        include_records: Also sort the records within each aggregation
+        pretty_print: Indent output like lxml pretty_print
+        temp_dir: Directory for run files
+
+    Returns:
+        int: Number of aggregations written
+    """
+    if os.path.abspath(source) == os.path.abspath(output):
+        raise ValueError("Output file must differ from source file")
+
+    control = read_control(source)
+    with ErmsStreamWriter(output, control, pretty_print=pretty_print) as writer:
+        with ExternalSorter(writer.serialize, run_size, include_records, temp_dir) as sorter:
+            for aggregation in iter_aggregations(source):
+                sorter.add(aggregation)
+            return sorter.write_to(writer)
@@ -0,0 +1,104 @@
+"""
+ERMS Split
+==========
+
+Split a large ERMS document into smaller shards in one streaming pass.
+
+Each shard is a complete ERMS document with a copy of the original control
+element and at most a given number of aggregations or bytes. A manifest
+describing the shards is written next to them.
+"""
+
+import json
+import os
+from .streaming import ErmsStreamWriter, read_control, iter_aggregations
+from . import namespaces as ns
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def split_erms_file(source: str, output_dir: str, max_aggregations: int = None,
+                    max_bytes: int = None, prefix: str = None,
+                    pretty_print: bool = True) -> dict:
+    """
+    Split an ERMS file into shards.
+
+    The input is streamed and processed aggregations are cleared, so memory
+    use is bounded by the largest single aggregation. An aggregation that is
+    larger than max_bytes on its own is written to a shard of its own.
+
+    Args:
+        source: ERMS file to split
+        output_dir: Directory for shards and manifest (created if missing)
+        max_aggregations: Maximum number of aggregations per shard
+        max_bytes: Maximum size of a shard file in bytes
+        prefix: Shard filename prefix (default: name of the source file)
+        pretty_print: Indent the shards like lxml pretty_print
+
+    Returns:
+        dict: The manifest, also written to output_dir/manifest.json
+
+    Raises:
+        ValueError: If neither max_aggregations nor max_bytes is given
+    """
+    if not max_aggregations and not max_bytes:
+        raise ValueError("Either max_aggregations or max_bytes must be given")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if prefix is None:
+        prefix = os.path.splitext(os.path.basename(source))[0]
+
+    control = read_control(source)
+    shards = []
+    writer = None
+    shard_info = None
+
+    def close_shard():
+        writer.close()
+        shard_info["bytes"] = writer.bytes_written
+        shards.append(shard_info)
+
+    try:
+        for aggregation in iter_aggregations(source):
+            object_id = aggregation.findtext(ns.ERMS + "objectId")
+
+            data = None
+            if writer is not None:
+                data = writer.serialize(aggregation)
+                full = max_aggregations and writer.count >= max_aggregations
+                too_large = max_bytes and writer.projected_size(data) > max_bytes
+                if full or too_large:
+                    close_shard()
+                    writer = None
+
+            if writer is None:
+                filename = f"{prefix}-{len(shards) + 1:05d}.xml"
+                writer = ErmsStreamWriter(os.path.join(output_dir, filename), control,
+                                          pretty_print=pretty_print)
+                shard_info = {"file": filename, "aggregations": 0,
+                              "first_object_id": object_id, "last_object_id": None}
+                if data is None:
+                    data = writer.serialize(aggregation)
+
+            writer.write_raw(data)
+            shard_info["aggregations"] += 1
+            shard_info["last_object_id"] = object_id
+
+        if writer is not None:
+            close_shard()
+            writer = None
+    finally:
+        if writer is not None:
+            writer.abort()
+
+    manifest = {
+        "source": os.path.basename(source),
+        "max_aggregations": max_aggregations,
+        "max_bytes": max_bytes,
+        "total_aggregations": sum(shard["aggregations"] for shard in shards),
+        "shards": shards,
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return manifest
@@ -0,0 +1,232 @@
+"""
+ERMS Staging Store
+==================
+
+On-disk staging of serialized aggregations for documents that do not fit
+in memory.
+
+Each finished aggregation is serialized in the context of the target
+document, compressed and stored as a BLOB in a SQLite database. The final
+document is assembled by streaming the fragments out of the store in the
+order they were staged, so peak memory is bounded by one aggregation.
+
+The store is committed every commit_interval aggregations and when it is
+closed. After a crash the build can be resumed: aggregations whose objectId
+is already in the store are not staged again.
+
+Usage:
+    with StagingStore("leverans.staging") as store:
+        for row in rows:
+            if row["case_number"] in store:
+                continue  # staged before a crash
+            erms.add_case(...)
+            erms.stage_cases(store)
+        store.assemble("leverans.xml")
+"""
+
+import json
+import os
+import sqlite3
+import zlib
+from lxml import etree
+from . import namespaces as ns
+from .parsing import parse_fragment
+from .streaming import ErmsStreamWriter, serialize_element, AGGREGATION_LEVEL
+
+# Number of staged aggregations between commits
+DEFAULT_COMMIT_INTERVAL = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fragments (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    object_id TEXT UNIQUE,
+    data BLOB NOT NULL
+);
+"""
+
+
+class StagingStore:
+    """
+    SQLite store of compressed, serialized aggregations.
+
+    The serialization options (pretty_print and root namespaces) are saved
+    in the store when it is created and must match when it is reopened.
+    """
+
+    def __init__(self, path: str, pretty_print: bool = None, nsmap: dict = None,
+                 compression_level: int = 6,
+                 commit_interval: int = DEFAULT_COMMIT_INTERVAL):
+        """
+        Args:
+            path: Database file (created if it does not exist)
+            pretty_print: Indent output (default: as stored, otherwise True)
+            nsmap: Namespaces declared on the erms root (default ROOT_NSMAP)
+            compression_level: zlib compression level (0-9)
+            commit_interval: Aggregations staged between commits
+        """
+        self.path = path
+        self.compression_level = compression_level
+        self.commit_interval = commit_interval
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        self._pending = 0
+
+        stored = dict(self.connection.execute("SELECT key, value FROM meta"))
+        if "pretty_print" not in stored:
+            self.pretty_print = True if pretty_print is None else pretty_print
+            self.nsmap = nsmap if nsmap is not None else ns.ROOT_NSMAP
+            self.connection.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [("pretty_print", json.dumps(self.pretty_print)),
+                 ("nsmap", json.dumps([[prefix, uri] for prefix, uri in self.nsmap.items()]))])
+            self.connection.commit()
+        else:
+            self.pretty_print = json.loads(stored["pretty_print"])
+            self.nsmap = {prefix: uri for prefix, uri in json.loads(stored["nsmap"])}
+            if pretty_print is not None and pretty_print != self.pretty_print:
+                raise ValueError(f"Staging store {path} was created with pretty_print={self.pretty_print}")
+            if nsmap is not None and nsmap != self.nsmap:
+                raise ValueError(f"Staging store {path} was created with different namespaces")
+
+    def _compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.compression_level)
+
+    def set_control(self, control: etree._Element):
+        """Store the control element of the document"""
+        data = etree.tostring(control, encoding="UTF-8")
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('control', ?)",
+                                (data.decode("utf-8"),))
+        self.connection.commit()
+
+    def get_control(self) -> etree._Element:
+        """The stored control element, or None"""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'control'").fetchone()
+        return parse_fragment(row[0].encode("utf-8")) if row else None
+
+    def add(self, element: etree._Element) -> bool:
+        """
+        Serialize and stage an aggregation.
+
+        Returns:
+            bool: False if an aggregation with the same objectId is already staged
+        """
+        object_id = element.findtext(ns.ERMS + "objectId")
+        if object_id is not None and object_id in self:
+            return False
+        data = serialize_element(element, self.pretty_print, AGGREGATION_LEVEL, self.nsmap)
+        return self.add_serialized(object_id, data)
+
+    def add_serialized(self, object_id: str, data: bytes) -> bool:
+        """
+        Stage an aggregation that is already serialized for this document.
+
+        Returns:
+            bool: False if an aggregation with the same objectId is already staged
+        """
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO fragments (object_id, data) VALUES (?, ?)",
+            (object_id, self._compress(data)))
+        if cursor.rowcount == 0:
+            return False
+        self._pending += 1
+        if self._pending >= self.commit_interval:
+            self.commit()
+        return True
+
+    def __contains__(self, object_id: str) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM fragments WHERE object_id = ?", (object_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM fragments").fetchone()
+        return count
+
+    def object_ids(self) -> list:
+        """objectIds of the staged aggregations in staging order"""
+        return [row[0] for row in self.connection.execute(
+            "SELECT object_id FROM fragments ORDER BY seq")]
+
+    def iter_serialized(self):
+        """
+        Stream the staged aggregations in staging order.
+
+        Yields:
+            Tuple (object_id, data) with the decompressed serialized aggregation
+        """
+        cursor = self.connection.execute("SELECT object_id, data FROM fragments ORDER BY seq")
+        for object_id, data in cursor:
+            yield object_id, zlib.decompress(data)
+
+    def get(self, object_id: str) -> etree._Element:
+        """
+        Parse a staged aggregation back into an element.
+
+        Returns:
+            etree._Element: The aggregation, or None if it is not staged
+        """
+        row = self.connection.execute(
+            "SELECT data FROM fragments WHERE object_id = ?", (object_id,)).fetchone()
+        if row is None:
+            return None
+        # The fragment relies on the declarations of the root element
+        context = etree.tostring(etree.Element(ns.ERMS + "erms", nsmap=self.nsmap))
+        root = parse_fragment(context[:-2] + b">" + zlib.decompress(row[0]) + b"</erms>")
+        element = root[0]
+        root.remove(element)
+        return element
+
+    def assemble(self, output) -> int:
+        """
+        Write the complete document by streaming the staged aggregations.
+
+        A filename is written through a temporary file that replaces the
+        target when the document is complete.
+
+        Args:
+            output: Filename or binary file object
+
+        Returns:
+            int: Number of aggregations written
+        """
+        self.commit()
+        control = self.get_control()
+
+        if not isinstance(output, (str, bytes)) and not hasattr(output, "__fspath__"):
+            return self._write(output, control)
+
+        temp_filename = os.fspath(output) + ".tmp"
+        try:
+            count = self._write(temp_filename, control)
+            os.replace(temp_filename, output)
+        except BaseException:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
+        return count
+
+    def _write(self, target, control: etree._Element) -> int:
+        with ErmsStreamWriter(target, control, pretty_print=self.pretty_print,
+                              nsmap=self.nsmap) as writer:
+            for _, data in self.iter_serialized():
+                writer.write_raw(data)
+            return writer.count
+
+    def commit(self):
+        """Make the staged aggregations durable"""
+        self.connection.commit()
+        self._pending = 0
+
+    def close(self):
+        """Commit and close the store"""
+        self.commit()
+        self.connection.close()
+
+    def __enter__(self) -> "StagingStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
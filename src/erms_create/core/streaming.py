@@ -0,0 +1,232 @@
+"""
+ERMS Streaming
+==============
+
+Helpers for reading and writing ERMS documents piece by piece instead of
+holding one complete tree in memory.
+
+Reading:
+    for aggregation in iter_aggregations("large.xml"):
+        ...  # the element is cleared when the next one is read
+
+Writing:
+    with ErmsStreamWriter("out.xml", control_element) as writer:
+        writer.write_aggregation(aggregation)
+"""
+
+import copy
+from lxml import etree
+from . import namespaces as ns
+from .instrumentation import REGISTRY, instrumented
+from .parsing import iterparse, is_top_level_aggregation
+
+# Indentation used by lxml pretty_print
+INDENT = "  "
+
+# Nesting level of <aggregation> in <erms><aggregations>
+AGGREGATION_LEVEL = 2
+
+# XML declaration as written by lxml
+XML_DECLARATION = b"<?xml version='1.0' encoding='UTF-8'?>\n"
+
+
+@instrumented("serialize.element")
+def serialize_element(element: etree._Element, pretty_print: bool = True,
+                      level: int = AGGREGATION_LEVEL, nsmap: dict = None) -> bytes:
+    """
+    Serialize a single element as UTF-8 bytes for insertion into a document.
+
+    With pretty_print the element is indented as if it was located at the
+    given nesting level. The indentation is applied to a copy so that the
+    element itself (and the tree it belongs to) is not modified.
+
+    Args:
+        element: Element to serialize
+        pretty_print: Indent the element
+        level: Nesting level of the element in the target document
+        nsmap: Namespaces declared on the target root. Declarations already
+               made there are left out of the serialized element, and
+               elements in a namespace with a prefix there use that prefix.
+
+    Returns:
+        bytes: Serialized element without tail and without XML declaration
+    """
+    if nsmap is None:
+        if pretty_print:
+            element = copy.deepcopy(element)
+            etree.indent(element, space=INDENT, level=level)
+        return etree.tostring(element, encoding="UTF-8", xml_declaration=False, with_tail=False)
+
+    # Serialize in the context of the target root so that lxml drops
+    # redundant namespace declarations, then cut away the root tags
+    context = etree.Element(ns.ERMS + "erms", nsmap=nsmap)
+    element = copy.deepcopy(element)
+    element.tail = None
+    context.append(element)
+    ns.hoist_namespaces(context, nsmap)
+    if pretty_print:
+        etree.indent(element, space=INDENT, level=level)
+    data = etree.tostring(context, encoding="UTF-8", xml_declaration=False)
+    return data[data.index(b">") + 1:data.rindex(b"</")]
+
+
+def read_control(source) -> etree._Element:
+    """
+    Read only the control element of an ERMS document.
+
+    Parsing stops as soon as the control element is complete.
+
+    Args:
+        source: Filename or file object
+
+    Returns:
+        etree._Element: Control element, or None if the document has none
+    """
+    for _, element in iterparse(source, events=("end",), tag=ns.ERMS + "control"):
+        return element
+    return None
+
+
+def iter_aggregations(source):
+    """
+    Stream the top-level aggregations of an ERMS document.
+
+    Each aggregation is cleared from the tree when the next one is read, so
+    memory use is bounded by the largest single aggregation. Use or copy the
+    element before continuing the iteration.
+
+    Args:
+        source: Filename or file object
+
+    Yields:
+        etree._Element: Top-level aggregation elements in document order
+    """
+    for _, element in iterparse(source, events=("end",), tag=ns.ERMS + "aggregation"):
+        if not is_top_level_aggregation(element):
+            continue
+        yield element
+        element.clear(keep_tail=True)
+        parent = element.getparent()
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+class ErmsStreamWriter:
+    """
+    Incremental writer for ERMS documents with aggregations.
+
+    The document header (root element and control) is written when the writer
+    is opened, aggregations are written one at a time and the closing tags when
+    the writer is closed. The output is the same as Erms.save_to_file() for the
+    same content.
+    """
+
+    def __init__(self, target, control: etree._Element, pretty_print: bool = True,
+                 nsmap: dict = None):
+        """
+        Args:
+            target: Filename or binary file object
+            control: Control element for the document
+            pretty_print: Indent output like lxml pretty_print
+            nsmap: Namespaces declared on the erms root (default ROOT_NSMAP)
+        """
+        self.pretty_print = pretty_print
+        self.nsmap = nsmap if nsmap is not None else ns.ROOT_NSMAP
+        self.count = 0
+        self.bytes_written = 0
+        self.closed = False
+
+        if isinstance(target, (str, bytes)) or hasattr(target, "__fspath__"):
+            self._file = open(target, "wb")
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+
+        root = etree.tostring(etree.Element(ns.ERMS + "erms", nsmap=self.nsmap), encoding="UTF-8")
+        self._root_open = root[:-2] + b">"
+        newline = b"\n" if pretty_print else b""
+        indent = INDENT.encode("ascii") if pretty_print else b""
+        self._aggregations_open = indent + b"<aggregations>" + newline
+        self._footer_empty = indent + b"<aggregations/>" + newline + b"</erms>" + newline
+        self._footer = indent + b"</aggregations>" + newline + b"</erms>" + newline
+        self._aggregation_indent = indent * 2
+
+        self._write_header(control)
+
+    def _write_header(self, control: etree._Element):
+        """Write the XML declaration, the root start tag and the control element"""
+        newline = b"\n" if self.pretty_print else b""
+        indent = INDENT.encode("ascii") if self.pretty_print else b""
+        self._write(XML_DECLARATION + self._root_open + newline)
+        if control is not None:
+            self._write(indent + self.serialize(control, level=1) + newline)
+
+    def projected_size(self, data: bytes) -> int:
+        """Size of the finished file if the serialized aggregation is written last"""
+        size = self.bytes_written + len(self._aggregation_indent) + len(data) + len(self._footer)
+        if self.pretty_print:
+            size += 1
+        if self.count == 0:
+            size += len(self._aggregations_open)
+        return size
+
+    def serialize(self, element: etree._Element, level: int = AGGREGATION_LEVEL) -> bytes:
+        """Serialize an element in the context of this document"""
+        return serialize_element(element, self.pretty_print, level, self.nsmap)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def write_aggregation(self, element: etree._Element) -> int:
+        """
+        Write an aggregation element.
+
+        Returns:
+            int: Number of bytes written
+        """
+        return self.write_raw(self.serialize(element))
+
+    @instrumented("write.raw")
+    def write_raw(self, data: bytes) -> int:
+        """
+        Write an aggregation that is already serialized with serialize().
+
+        Returns:
+            int: Number of bytes written
+        """
+        before = self.bytes_written
+        if self.count == 0:
+            self._write(self._aggregations_open)
+        self._write(self._aggregation_indent + data + (b"\n" if self.pretty_print else b""))
+        self.count += 1
+        written = self.bytes_written - before
+        REGISTRY.count("write.bytes", written)
+        return written
+
+    def close(self):
+        """Write the closing tags and close the file if it was opened here"""
+        if self.closed:
+            return
+        self._write(self._footer if self.count else self._footer_empty)
+        self.closed = True
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def abort(self):
+        """Stop writing without closing tags (the output is left incomplete)"""
+        self.closed = True
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "ErmsStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -2,8 +2,12 @@
 Utility functions for ERMS Core
 """
 
+import re
 from lxml import etree
 from . import namespaces as ns
+from .instrumentation import instrumented
+
+_DIGITS = re.compile(r"(\d+)")
 
 # Element ordering for correct XML structure
 CONTROL_SORT_ORDER = [
@@ -96,63 +100,70 @@ RESTRICTION_SORT_ORDER = [
 ]
 
 
+def sort_ranks(sort_order: list) -> dict:
+    """Rank per child tag for a SORT_ORDER list (first occurrence wins)"""
+    ranks = {}
+    for rank, tag in enumerate(sort_order):
+        ranks.setdefault(tag, rank)
+    return ranks
+
+
+# Child ranks per parent tag, precomputed from the SORT_ORDER lists.
+# Tables generated from the schemas (see core.codegen) can be added with
+# register_sort_ranks().
+SORT_RANKS = {
+    ns.ERMS + "control": sort_ranks(CONTROL_SORT_ORDER),
+    ns.ERMS + "aggregation": sort_ranks(AGGREGATION_SORT_ORDER),
+    ns.ERMS + "record": sort_ranks(RECORD_SORT_ORDER),
+    ns.ERMS + "restriction": sort_ranks(RESTRICTION_SORT_ORDER),
+}
+
+
+def register_sort_ranks(ranks: dict, replace: bool = False):
+    """
+    Add child ranks for more parent elements.
+
+    Args:
+        ranks: Parent tag -> {child tag: rank}
+        replace: Replace tables for parents that already have one
+    """
+    for parent, table in ranks.items():
+        if replace or parent not in SORT_RANKS:
+            SORT_RANKS[parent] = dict(table)
+
+
+@instrumented("order.add_in_element")
 def add_in_element(element: etree.Element, element_to_add: etree.Element):
     """
     Add an element to the correct position according to ERMS element ordering.
-    
+
+    The new element is placed after the last child with the same or a
+    lower rank, so children of the same type keep their insertion order.
+    Children without a rank (unknown tags, comments) are skipped.
+
     Args:
         element: Parent element to add to
         element_to_add: Child element to add
-        
-    Raises:
-        ValueError: If element type is not supported for ordering
     """
-    # Determine sort order based on element type
-    if element.tag == ns.ERMS + "control":
-        sort_order = CONTROL_SORT_ORDER
-    elif element.tag == ns.ERMS + "aggregation":
-        sort_order = AGGREGATION_SORT_ORDER
-    elif element.tag == ns.ERMS + "record":
-        sort_order = RECORD_SORT_ORDER
-    elif element.tag == ns.ERMS + "restriction":
-        sort_order = RESTRICTION_SORT_ORDER
-    else:
+    ranks = SORT_RANKS.get(element.tag)
+    if ranks is None:
         # For unknown elements, just append at the end
         element.append(element_to_add)
         return
 
-    # If no existing children, just append
-    if len(element) == 0:
+    rank = ranks.get(element_to_add.tag)
+    if rank is None or len(element) == 0:
+        # Element not in sort order or no existing children, append at end
         element.append(element_to_add)
         return
 
-    # If element already exists of this type, add after the last one
-    existing_elements = element.findall(element_to_add.tag)
-    if len(existing_elements) > 0:
-        existing_elements[-1].addnext(element_to_add)
-        return
-
-    # Find correct position based on sort order
-    try:
-        target_index = sort_order.index(element_to_add.tag)
-    except ValueError:
-        # Element not in sort order, append at end
-        element.append(element_to_add)
-        return
-
-    # If this should be the first element
-    if target_index == 0:
-        element[0].addprevious(element_to_add)
-        return
-
-    # Find the correct position by looking backwards in sort order
-    for i in range(target_index - 1, -1, -1):
-        existing = element.findall(sort_order[i])
-        if existing:
-            existing[-1].addnext(element_to_add)
+    for child in reversed(element):
+        child_rank = ranks.get(child.tag)
+        if child_rank is not None and child_rank <= rank:
+            child.addnext(element_to_add)
             return
 
-    # If we get here, add at the beginning
+    # No child sorts before the new element, add at the beginning
     element[0].addprevious(element_to_add)
 
 
@@ -191,3 +202,23 @@ def create_element_with_text(tag: str, text: str, nsmap: dict = None, **attribut
     element = etree.Element(tag, attributes, nsmap=nsmap)
     element.text = text
     return element
+
+
+def natural_sort_key(value: str) -> tuple:
+    """
+    Sort key that orders embedded numbers numerically.
+
+    "F 2024-0002:10" is sorted after "F 2024-0002:9". Missing values
+    (None) are sorted last.
+
+    Args:
+        value: String to create a key for
+
+    Returns:
+        tuple: Sort key
+    """
+    if value is None:
+        return (1, ())
+    parts = _DIGITS.split(value)
+    return (0, tuple((0, int(part), part) if part.isdigit() else (1, 0, part)
+                     for part in parts if part))
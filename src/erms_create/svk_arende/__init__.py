@@ -23,12 +23,27 @@ Usage:
     )
 """
 
-from .svk_erms import SVKErms
-from .svk_case import SVKCase
-from .svk_record import SVKRecord
-from .svk_extensions import SVKExtensions
-from . import value_lists
-from . import validation
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .svk_erms import SVKErms
+    from .svk_case import SVKCase
+    from .svk_record import SVKRecord
+    from .svk_extensions import SVKExtensions
+    from . import value_lists
+    from . import validation
+
+# Publika namn och modulerna de finns i. De importeras först när de används,
+# så att import av paketet inte laddar lxml.
+_LAZY = {
+    'SVKErms': ('.svk_erms', 'SVKErms'),
+    'SVKCase': ('.svk_case', 'SVKCase'),
+    'SVKRecord': ('.svk_record', 'SVKRecord'),
+    'SVKExtensions': ('.svk_extensions', 'SVKExtensions'),
+    'value_lists': ('.value_lists', None),
+    'validation': ('.validation', None),
+}
 
 __version__ = "1.0.0"
 __author__ = "Henrik Vitalis"
@@ -40,4 +55,19 @@ __all__ = [
     'SVKExtensions',
     'value_lists',
     'validation'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attribute = _LAZY[name]
+    value = import_module(module, __name__)
+    if attribute:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
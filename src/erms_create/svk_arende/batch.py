@@ -0,0 +1,305 @@
+"""
+Kolumnvisa ärendesatser
+=======================
+
+CaseBatch håller ärendedata kolumnvis (listor eller NumPy-arrayer) och kör
+SVK-valideringens formatkontroller på hela kolumner i taget i stället för
+rad för rad:
+
+- ärendenummer enligt [diariekod] [årtal]-[löpnummer]
+- organisationsnummer med tio siffror
+- status i STATUS_SVK
+- opened och closed finns och opened ≤ closed
+
+NumPy används om det är installerat, annars används motsvarande
+kontroller i ren Python. Resultatet är detsamma; datum med tidszon
+jämförs som UTC. Med NumPy behålls
+arrayer som de är: strängkolumner kontrolleras med np.char och på
+teckenkoderna, datum jämförs som datetime64 (datetime64-kolumner används
+direkt) och bara listor och enskilda värden konverteras. Saknade värden
+(None) i en lista blir tomma strängar.
+
+Usage:
+    batch = CaseBatch(case_number=numbers, title=titles, org_number="1234567890",
+                      status=statuses, opened=opened, closed=closed,
+                      archive_creator="Sunne pastorat")
+    valid = batch.valid_mask()
+    cases = batch.build(erms)          # bara giltiga rader, ett anrop
+    rejected = batch.rejects()         # radmask för avvisade rader
+"""
+
+import re
+import warnings
+from datetime import datetime, timezone
+from typing import Dict, List
+from . import value_lists
+from .svk_case import SVKCase
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy är valfritt
+    np = None
+
+# Samma mönster som value_lists.validate_case_number, för hela kolumnen på en gång
+CASE_NUMBER_PATTERN = re.compile(r"^[A-Ö]+ \d{4}-\d{4}$", re.MULTILINE)
+
+# Kontrollerna i den ordning de rapporteras
+CHECKS = ("case_number", "org_number", "status", "dates")
+
+_COLUMNS = ("case_number", "title", "org_number", "status", "opened", "closed",
+            "archive_creator")
+
+
+def _matching_rows(values: List[str]) -> List[bool]:
+    """
+    Rader som matchar CASE_NUMBER_PATTERN.
+
+    Kolumnen slås ihop till en text med en rad per värde och matchas i ett
+    svep; träffarna börjar alltid på en rad, vars nummer slås upp på
+    startpositionen.
+    """
+    lines = ["" if value is None or "\n" in value else value for value in values]
+    text = "\n".join(lines)
+    rows = {}
+    position = 0
+    for row, line in enumerate(lines):
+        rows[position] = row
+        position += len(line) + 1
+    result = [False] * len(lines)
+    for match in CASE_NUMBER_PATTERN.finditer(text):
+        result[rows[match.start()]] = True
+    return result
+
+
+def _matching_rows_numpy(values):
+    """
+    CASE_NUMBER_PATTERN för en strängarray, utan Python-kod per rad.
+
+    Arrayen läses som en matris av teckenkoder (en rad per värde). De tio
+    sista tecknen ska vara " dddd-dddd" och alla tecken före dem, minst
+    ett, ska ligga i intervallet A-Ö.
+    """
+    if values.size == 0 or values.itemsize == 0:
+        return np.zeros(len(values), dtype=bool)
+    codes = np.ascontiguousarray(values).view(np.uint32).reshape(len(values), -1)
+    length = np.char.str_len(values)
+    tail = np.clip(length[:, None] - 10 + np.arange(10), 0, None)
+    end = np.take_along_axis(codes, tail, axis=1)
+    digits = (end >= ord("0")) & (end <= ord("9"))
+    result = ((length >= 11) & (end[:, 0] == ord(" ")) & (end[:, 5] == ord("-"))
+              & digits[:, 1:5].all(axis=1) & digits[:, 6:].all(axis=1))
+    in_range = (codes >= ord("A")) & (codes <= ord("Ö"))
+    before_tail = np.arange(codes.shape[1]) < (length[:, None] - 10)
+    return result & (in_range | ~before_tail).all(axis=1)
+
+
+def _string_array(values):
+    """Strängkolumn som NumPy-array; bara listor och blandade arrayer konverteras"""
+    if isinstance(values, np.ndarray) and values.dtype.kind == "U":
+        return values
+    if isinstance(values, np.ndarray) and values.dtype.kind != "O":
+        return values.astype(str)
+    values = list(values)
+    if None in values:
+        values = ["" if value is None else value for value in values]
+    return np.asarray(values, dtype=str)
+
+
+def _parse_date(value):
+    """Datum som naiv UTC-tid, None om det saknas och False om det är ogiltigt"""
+    if value is None or value == "":
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return False
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class CaseBatch:
+    """Struct-of-arrays för ärenden med kolumnvis validering"""
+
+    def __init__(self, case_number, title, org_number=None, status=None, opened=None,
+                 closed=None, archive_creator=None, use_numpy: bool = None):
+        """
+        Varje kolumn är en lista/array med ett värde per rad, eller ett
+        enskilt värde som gäller alla rader.
+
+        Args:
+            case_number: Ärendenummer
+            title: Ärendemening
+            org_number: Organisationsnummer
+            status: Status (closed/obliterated)
+            opened: Öppningsdatum (ISO 8601)
+            closed: Avslutningsdatum (ISO 8601)
+            archive_creator: Arkivbildare
+            use_numpy: Använd NumPy (default: om det är installerat)
+
+        Raises:
+            ValueError: Om kolumnerna har olika längd
+        """
+        if use_numpy and np is None:
+            raise ValueError("NumPy är inte installerat")
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+
+        length = len(case_number)
+        self.columns = {}
+        for name, values in zip(_COLUMNS, (case_number, title, org_number, status,
+                                           opened, closed, archive_creator)):
+            if values is None or isinstance(values, str):
+                if self.use_numpy:
+                    # None för en kolumn som saknas helt
+                    values = None if values is None else np.full(length, values)
+                else:
+                    values = [values] * length
+            elif self.use_numpy:
+                if not (isinstance(values, np.ndarray) and values.dtype.kind == "M"):
+                    values = _string_array(values)
+            else:
+                if np is not None and isinstance(values, np.ndarray):
+                    values = values.tolist() if values.dtype.kind != "M" else \
+                        np.datetime_as_string(values, unit="s").tolist()
+                values = [None if value is None else str(value) for value in values]
+            if values is not None and len(values) != length:
+                raise ValueError(f"Kolumnen {name} har {len(values)} rader, "
+                                 f"case_number har {length}")
+            self.columns[name] = values
+        self._length = length
+        self._results = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def validate(self) -> Dict[str, object]:
+        """
+        Kör alla kontroller.
+
+        Returns:
+            Dict kontroll -> radmask (True där raden klarar kontrollen)
+        """
+        if self._results is None:
+            check = self._validate_numpy if self.use_numpy else self._validate_python
+            self._results = check()
+        return self._results
+
+    def _validate_numpy(self) -> dict:
+        columns = self.columns
+        missing = np.zeros(len(self), dtype=bool)
+        case_number = _matching_rows_numpy(columns["case_number"])
+
+        org = columns["org_number"]
+        if org is None:
+            org_number = missing
+        else:
+            org_number = (np.char.str_len(org) == 10) & np.char.isdigit(org)
+
+        status = missing if columns["status"] is None else np.isin(
+            columns["status"], np.array(value_lists.STATUS_SVK))
+
+        opened = self._datetime64(columns["opened"])
+        closed = self._datetime64(columns["closed"])
+        dates = ~np.isnat(opened) & ~np.isnat(closed) & (opened <= closed)
+
+        return {"case_number": case_number, "org_number": org_number,
+                "status": status, "dates": dates}
+
+    def _datetime64(self, values):
+        """Datumkolumn som datetime64, NaT för saknade och ogiltiga värden"""
+        if values is None:
+            return np.full(len(self), "NaT", dtype="datetime64[s]")
+        if values.dtype.kind == "M":
+            return values.astype("datetime64[s]")
+        try:
+            # NumPy varnar för tidszoner; de tolkas rad för rad som i ren Python
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", UserWarning)
+                return values.astype("datetime64[s]")
+        except (ValueError, UserWarning):
+            # Format som NumPy inte läser (eller ogiltiga värden): rad för rad
+            parsed = [_parse_date(value) for value in values.tolist()]
+            return np.array([value if value else "NaT" for value in parsed],
+                            dtype="datetime64[s]")
+
+    def _validate_python(self) -> dict:
+        columns = self.columns
+        org_number = [value is not None and len(value) == 10 and value.isdigit()
+                      for value in columns["org_number"]]
+        status = [value in value_lists.STATUS_SVK for value in columns["status"]]
+        dates = []
+        for opened, closed in zip(columns["opened"], columns["closed"]):
+            opened, closed = _parse_date(opened), _parse_date(closed)
+            dates.append(bool(opened) and bool(closed) and opened <= closed)
+        return {"case_number": _matching_rows(columns["case_number"]),
+                "org_number": org_number, "status": status, "dates": dates}
+
+    def valid_mask(self):
+        """Radmask för rader som klarar alla kontroller"""
+        results = self.validate()
+        if self.use_numpy:
+            mask = np.ones(len(self), dtype=bool)
+            for name in CHECKS:
+                mask &= results[name]
+            return mask
+        return [all(row) for row in zip(*(results[name] for name in CHECKS))]
+
+    def rejects(self):
+        """Radmask för avvisade rader"""
+        mask = self.valid_mask()
+        if self.use_numpy:
+            return ~mask
+        return [not valid for valid in mask]
+
+    def reject_reasons(self) -> Dict[int, List[str]]:
+        """
+        Underkända kontroller per avvisad rad.
+
+        Returns:
+            Dict radnummer -> namn på kontroller som inte klarades
+        """
+        results = self.validate()
+        reasons = {}
+        for name in CHECKS:
+            for row, passed in enumerate(results[name]):
+                if not passed:
+                    reasons.setdefault(row, []).append(name)
+        return reasons
+
+    def build(self, erms) -> List[SVKCase]:
+        """
+        Bygg de giltiga raderna och lägg till dem i dokumentet i ett anrop.
+
+        Args:
+            erms: SVKErms att lägga ärendena i
+
+        Returns:
+            List[SVKCase]: De byggda ärendena i radordning
+        """
+        mask = self.valid_mask()
+        rows = {name: self._valid_values(name, mask) for name in _COLUMNS}
+        # Control sätts från första giltiga raden, som i SVKErms.add_case
+        if rows["case_number"] and not erms.control.identifications \
+                and rows["archive_creator"][0]:
+            erms.setup_control_info(rows["archive_creator"][0], rows["org_number"][0],
+                                    case_number=rows["case_number"][0])
+        cases = []
+        for row in range(len(rows["case_number"])):
+            case = SVKCase(rows["case_number"][row], rows["title"][row])
+            case.set_archive_creator_info(rows["org_number"][row], rows["archive_creator"][row])
+            case.set_status_svk(rows["status"][row])
+            case.add_required_dates(rows["opened"][row], rows["closed"][row])
+            cases.append(case)
+        erms.insert_cases(cases)
+        return cases
+
+    def _valid_values(self, name: str, mask) -> list:
+        """Värdena i en kolumn för raderna i mask, som Python-strängar"""
+        values = self.columns[name]
+        if not self.use_numpy:
+            return [value for value, valid in zip(values, mask) if valid]
+        if values is None:
+            return [None] * int(np.count_nonzero(mask))
+        if values.dtype.kind == "M":
+            return np.datetime_as_string(values[mask], unit="s").tolist()
+        return values[mask].tolist()
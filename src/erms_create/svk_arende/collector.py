@@ -0,0 +1,138 @@
+"""
+Samling av ärenden från flera trådar
+====================================
+
+lxml-träd får inte ändras från flera trådar samtidigt. CaseCollector låter
+varje producenttråd bygga sina ärenden i ett eget, trådlokalt dokument.
+Färdiga ärenden kopplas loss och samlas per tråd, och flyttas in i
+huvuddokumentet i satser under ett kort lås (eller vid finalize()).
+
+Vid finalize() sorteras ärendena på ärendenummer, så att resultatet inte
+beror på i vilken ordning trådarna hann lämna ifrån sig sina satser.
+
+Usage:
+    collector = CaseCollector(erms, batch_size=100)
+
+    def producer(rows):
+        for row in rows:
+            case = collector.add_case(row["case_number"], row["title"],
+                                      "Sunne pastorat", "1234567890")
+            case.add_record_svk(...)
+        collector.flush()
+
+    ...  # starta producenttrådar och vänta på dem
+    collector.finalize()
+    erms.save_to_file("leverans.xml")
+"""
+
+import threading
+from .svk_case import SVKCase
+from .svk_erms import SVKErms
+
+# Antal ärenden per tråd som samlas innan de flyttas in i dokumentet
+DEFAULT_BATCH_SIZE = 100
+
+
+class CaseCollector:
+    """Trådsäker insamling av ärenden till ett SVKErms-dokument"""
+
+    def __init__(self, erms: SVKErms, batch_size: int = DEFAULT_BATCH_SIZE,
+                 sort: bool = True):
+        """
+        Args:
+            erms: Dokument som ärendena samlas i
+            batch_size: Antal ärenden per tråd mellan sammanslagningar
+            sort: Sortera ärendena på ärendenummer vid finalize()
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size måste vara minst 1")
+        self.erms = erms
+        self.batch_size = batch_size
+        self.sort = sort
+        self.merged_batches = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._buffers = []
+        self._finalized = False
+
+    def local_erms(self) -> SVKErms:
+        """Trådlokalt arbetsdokument att bygga ärenden i"""
+        erms = getattr(self._local, "erms", None)
+        if erms is None:
+            erms = self._local.erms = SVKErms()
+        return erms
+
+    def _buffer(self) -> list:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = []
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+
+    def add_case(self, case_number: str, title: str, archive_creator: str = None,
+                 org_number: str = None, aid: str = None, **kwargs) -> SVKCase:
+        """
+        Skapa ett ärende i den anropande tråden, som SVKErms.add_case().
+
+        Ärendet kan fortsätta byggas av samma tråd tills satsen flyttas in i
+        dokumentet, dvs. till nästa add_case()/add() som fyller satsen eller
+        till flush().
+
+        Returns:
+            SVKCase: Det skapade ärendet
+        """
+        case = self.local_erms().add_case(case_number, title, archive_creator,
+                                          org_number, aid, **kwargs)
+        self.add(case)
+        return case
+
+    def add(self, case: SVKCase):
+        """
+        Lämna ett färdigt ärende till samlingen.
+
+        Ärenden som byggts i local_erms() kopplas loss därifrån. Den föregående
+        satsen flyttas in i dokumentet när den är full.
+        """
+        if self._finalized:
+            raise ValueError("Samlingen är redan avslutad med finalize()")
+        buffer = self._buffer()
+        if len(buffer) >= self.batch_size:
+            self.flush()
+        local = getattr(self._local, "erms", None)
+        if local is not None:
+            local.remove_case(case.object_id.text)
+        buffer.append(case)
+
+    def flush(self):
+        """Flytta den anropande trådens ärenden in i dokumentet"""
+        buffer = getattr(self._local, "buffer", None)
+        if not buffer:
+            return
+        with self._lock:
+            self._merge(buffer)
+
+    def _merge(self, buffer: list):
+        # Anropas med låset taget
+        self.erms.insert_cases(buffer)
+        buffer.clear()
+        self.merged_batches += 1
+
+    def finalize(self) -> SVKErms:
+        """
+        Flytta in alla återstående ärenden och sortera dokumentet.
+
+        Ska anropas när alla producenttrådar är klara.
+
+        Returns:
+            SVKErms: Det sammanställda dokumentet
+        """
+        with self._lock:
+            for buffer in self._buffers:
+                if buffer:
+                    self._merge(buffer)
+            self._buffers = []
+            self._finalized = True
+        if self.sort:
+            self.erms.sort_aggregations(include_records=False)
+        return self.erms
@@ -0,0 +1,260 @@
+"""
+Databaskälla
+============
+
+Läser ärenden från en databas via DB-API 2.0 (t.ex. sqlite3, psycopg,
+oracledb) utan att hela resultatet hålls i minnet.
+
+Ärendena hämtas med fetchmany() i satser. För varje sats hämtas
+underliggande rader (handlingar, aktörer, ...) med en parametriserad
+IN-fråga per tabell, i stället för en fråga per ärende.
+
+Usage:
+    pool = ConnectionPool(lambda: sqlite3.connect("arenden.db"), size=2)
+    source = DatabaseSource(
+        pool,
+        "SELECT arendenr AS case_number, rubrik AS title FROM arenden ORDER BY arendenr",
+        details={
+            "records": ("SELECT * FROM handlingar WHERE arendenr IN ({ids})", "arendenr"),
+            "agents": ("SELECT * FROM aktorer WHERE arendenr IN ({ids})", "arendenr"),
+        })
+    for case in source:
+        ...  # case["records"], case["agents"]
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Antal ärenden per fetchmany() och per IN-fråga
+DEFAULT_BATCH_SIZE = 500
+
+
+def placeholders(paramstyle: str, count: int) -> str:
+    """
+    Platshållare för count parametrar i databasmodulens paramstyle.
+
+    Args:
+        paramstyle: DB-API paramstyle (qmark, numeric, named, format, pyformat)
+        count: Antal parametrar
+
+    Returns:
+        str: T.ex. "?, ?, ?" eller "%s, %s, %s"
+    """
+    if paramstyle == "qmark":
+        return ", ".join("?" * count)
+    if paramstyle in ("format", "pyformat"):
+        return ", ".join(["%s"] * count)
+    if paramstyle == "numeric":
+        return ", ".join(f":{number}" for number in range(1, count + 1))
+    if paramstyle == "named":
+        return ", ".join(f":p{number}" for number in range(count))
+    raise ValueError(f"Okänd paramstyle: '{paramstyle}'")
+
+
+def _parameters(paramstyle: str, values: list):
+    if paramstyle == "named":
+        return {f"p{number}": value for number, value in enumerate(values)}
+    return list(values)
+
+
+def _rows(cursor, rows) -> List[dict]:
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in rows]
+
+
+class ConnectionPool:
+    """
+    Liten trådsäker pool av databasanslutningar.
+
+    Anslutningar skapas vid behov upp till size stycken och återanvänds.
+    Med sqlite3 måste connect skapa anslutningar med check_same_thread=False
+    om poolen delas mellan trådar.
+    """
+
+    def __init__(self, connect: Callable[[], object], size: int = 2):
+        """
+        Args:
+            connect: Funktion som skapar en ny anslutning
+            size: Största antal anslutningar
+        """
+        if size < 1:
+            raise ValueError("size måste vara minst 1")
+        self.connect = connect
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # En tråd i taget hämtar flera anslutningar, så att två trådar inte
+        # håller en var och väntar på varandras
+        self._many_lock = threading.Lock()
+        self._all = []
+
+    def acquire(self, timeout: float = None):
+        """Hämta en anslutning (väntar om alla är upptagna)"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                connection = self.connect()
+                self._all.append(connection)
+                return connection
+        return self._idle.get(timeout=timeout)
+
+    def acquire_many(self, count: int, timeout: float = None) -> list:
+        """
+        Hämta count anslutningar på en gång.
+
+        Raises:
+            ValueError: Om count är större än poolen
+        """
+        if count > self.size:
+            raise ValueError(f"Poolen har {self.size} anslutningar, {count} behövs")
+        connections = []
+        try:
+            with self._many_lock:
+                for _ in range(count):
+                    connections.append(self.acquire(timeout))
+        except BaseException:
+            for connection in connections:
+                self.release(connection)
+            raise
+        return connections
+
+    def release(self, connection):
+        """Lämna tillbaka en anslutning"""
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """Anslutning som lämnas tillbaka när blocket är klart"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    @contextmanager
+    def connections(self, count: int):
+        """count anslutningar som lämnas tillbaka när blocket är klart"""
+        connections = self.acquire_many(count)
+        try:
+            yield connections
+        finally:
+            for connection in connections:
+                self.release(connection)
+
+    def close(self):
+        """Stäng alla anslutningar"""
+        with self._lock:
+            for connection in self._all:
+                connection.close()
+            self._all = []
+            self._created = 0
+            self._idle = queue.LifoQueue()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class DatabaseSource:
+    """
+    Strömmande källa av ärenden med underliggande rader från en databas.
+
+    Varje ärende blir en dict med kolumnerna från ärendefrågan och en lista
+    per nyckel i details med de rader som hör till ärendet.
+    """
+
+    def __init__(self, pool: ConnectionPool, case_query: str,
+                 details: Dict[str, Tuple[str, str]] = None, parameters=(),
+                 case_key: str = "case_number", batch_size: int = DEFAULT_BATCH_SIZE,
+                 paramstyle: str = "qmark", cursor_factory: Callable = None):
+        """
+        Args:
+            pool: Anslutningspool
+            case_query: Fråga som ger en rad per ärende
+            details: Namn -> (fråga med {ids} för IN-listan, kolumn med ärendenyckeln)
+            parameters: Parametrar till case_query
+            case_key: Kolumn med ärendenyckeln i case_query
+            batch_size: Antal ärenden per fetchmany() och IN-fråga
+            paramstyle: Databasmodulens paramstyle (t.ex. sqlite3.paramstyle)
+            cursor_factory: Funktion (anslutning) -> markör för ärendefrågan,
+                            t.ex. för en namngiven server-side-markör
+        """
+        for name, (query, _) in (details or {}).items():
+            if "{ids}" not in query:
+                raise ValueError(f"Frågan för '{name}' saknar {{ids}}")
+        self.pool = pool
+        self.case_query = case_query
+        self.details = dict(details or {})
+        self.parameters = parameters
+        self.case_key = case_key
+        self.batch_size = batch_size
+        self.paramstyle = paramstyle
+        self.cursor_factory = cursor_factory or (lambda connection: connection.cursor())
+
+    def iter_batches(self) -> Iterator[List[dict]]:
+        """
+        Hämta ärenden sats för sats.
+
+        Ärendefrågan körs på en anslutning och detaljfrågorna på en annan
+        från poolen (om poolen har fler än en), så att ärendemarkören kan
+        vara en server-side-markör. Båda anslutningarna hämtas på en gång
+        och hålls tills källan är läst; källor som läses samtidigt väntar
+        på varandra i stället för att låsa varandra om poolen är för liten.
+        Varje källa som läses samtidigt behöver två anslutningar i poolen.
+
+        Yields:
+            List[dict]: Ärenden med detaljrader
+        """
+        count = 2 if self.details and self.pool.size > 1 else 1
+        with self.pool.connections(count) as connections:
+            connection, detail_connection = connections[0], connections[-1]
+            cursor = self.cursor_factory(connection)
+            try:
+                cursor.execute(self.case_query, self.parameters)
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    cases = _rows(cursor, rows)
+                    if self.details:
+                        self._attach_details(detail_connection, cases)
+                    yield cases
+            finally:
+                cursor.close()
+
+    def _attach_details(self, connection, cases: List[dict]):
+        keys = [case[self.case_key] for case in cases]
+        by_key = {key: case for key, case in zip(keys, cases)}
+        query_parameters = _parameters(self.paramstyle, keys)
+        for name, (query, key_column) in self.details.items():
+            for case in cases:
+                case[name] = []
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query.replace("{ids}", placeholders(self.paramstyle, len(keys))),
+                               query_parameters)
+                names = [column[0] for column in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        detail = dict(zip(names, row))
+                        case = by_key.get(detail[key_column])
+                        if case is not None:
+                            case[name].append(detail)
+            finally:
+                cursor.close()
+
+    def __iter__(self) -> Iterator[dict]:
+        for batch in self.iter_batches():
+            yield from batch
@@ -0,0 +1,559 @@
+"""
+Direktskrivning av ärenden
+==========================
+
+Skrivbackend för export där dokumentträdet aldrig behövs. DirectCase och
+DirectRecord har samma byggmetoder och validering som SVKCase och
+SVKRecord, även SVK-tilläggen i additionalXMLData (initiativ, relaterade
+objekt, anteckningar, ändringslogg, avtal och bilagor), men bygger inga
+lxml-element: ärendet hålls som lätta fragment och skrivs som färdiga
+XML-bytes (se core.emitter). Värdena kontrolleras med samma SVKValidator
+och värdelistor som i lxml-backenden.
+
+Utdata är byte för byte densamma som från lxml-backenden
+(ErmsStreamWriter.write_aggregation med ett SVKCase) för samma innehåll.
+SVK-namnrymden kan inte deklareras med prefix på roten
+(SVKErms(hoist_namespaces=True)); tilläggen skrivs med egen deklaration.
+
+Usage:
+    with DirectCaseWriter("leverans.xml") as writer:
+        for row in rows:
+            case = writer.add_case(row["arendenr"], row["rubrik"],
+                                   "Sunne pastorat", "1234567890")
+            case.set_status_svk("closed")
+            case.add_required_dates(row["oppnad"], row["avslutad"])
+            record = case.add_record_svk(row["dokumentnr"], row["titel"])
+            case.add_audit_event(row["tid"], row["anvandare"], "ansvarig", "update")
+"""
+
+from ..core.emitter import (AggregationFragment, Fragment, RecordFragment, agent_fragment,
+                            date_fragment)
+from ..core.instrumentation import instrumented
+from ..core.namespaces import ERMS_NAMESPACE
+from ..core.streaming import AGGREGATION_LEVEL, ErmsStreamWriter
+from ..core.utils import validate_value_list
+from .svk_erms import SVKErms
+from .svk_extensions import SVK_NAMESPACE
+from .validation import SVKValidator
+from . import value_lists
+
+# ERMS-element inuti SVK-tilläggen deklarerar om standardnamnrymden
+_ERMS_XMLNS = {"xmlns": ERMS_NAMESPACE}
+
+
+class DirectRelatedObjects(Fragment):
+    """Motsvarar RelatedObjects"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("relatedObjects")
+
+    def add_object(self, object_type: str, object_name: str, object_id: str,
+                   delivery_system_id: str = None) -> Fragment:
+        """Lägg till ett relaterat objekt"""
+        validate_value_list(object_type, value_lists.OBJECT_TYPE, "object type")
+        related = self.add("relatedObject", attributes={"typeOfObject": object_type})
+        related.add("objectName", object_name)
+        related.add("objectId", object_id)
+        if delivery_system_id:
+            related.add("deliveringSystemId", delivery_system_id)
+        return related
+
+
+class DirectNotes(Fragment):
+    """Motsvarar SVKNotes"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("svkNotes")
+
+    def add_note(self, note_type: str, note_text: str, creator_name: str,
+                 created_date: str, creator_org: str = None) -> Fragment:
+        """Lägg till en anteckning"""
+        validate_value_list(note_type, value_lists.NOTE_TYPE, "note type")
+        note = self.add("svkNote", attributes={"typeOfNote": note_type})
+        note.add("noteText", note_text)
+        note.add("agents", attributes=dict(_ERMS_XMLNS)).append(
+            agent_fragment("creator", creator_name, organisation=creator_org))
+        note.add("dates", attributes=dict(_ERMS_XMLNS)).append(
+            date_fragment(created_date, "created"))
+        return note
+
+
+class DirectAuditLog(Fragment):
+    """Motsvarar AuditLogEvents"""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("auditLogEvents")
+
+    def add_event(self, event_time: str, user: str, scope: str, action: str,
+                  value_before: str = None, value_after: str = None) -> Fragment:
+        """Lägg till en händelse i ändringsloggen"""
+        validate_value_list(scope, value_lists.AUDIT_SCOPE, "audit scope")
+        validate_value_list(action, value_lists.AUDIT_ACTION, "audit action")
+        event = self.add("auditLogEvent")
+        event.add("eventTime", event_time)
+        event.add("user", user)
+        event.add("scope", scope)
+        event.add("action", action)
+        if value_before:
+            event.add("valueBeforeChange", value_before)
+        if value_after:
+            event.add("valueAfterChange", value_after)
+        return event
+
+
+class DirectContractInfo(Fragment):
+    """Motsvarar ContractInfo"""
+
+    __slots__ = ("dates",)
+
+    def __init__(self):
+        super().__init__("contractInfo")
+        self.dates = None
+
+    def set_external_reference(self, reference: str):
+        """Sätt avsändares referens"""
+        self.add("externalReference", reference)
+
+    def set_call_off_value(self, value: int, currency: str = "SEK"):
+        """Sätt avropat värde"""
+        self.add("callOffValue", str(value), {"currency": currency})
+
+    def set_contract_value(self, value: int, currency: str = "SEK"):
+        """Sätt kontraktsvärde"""
+        self.add("contractValue", str(value), {"currency": currency})
+
+    def set_agreement_type(self, agreement_type: str):
+        """Sätt avtalstyp"""
+        validate_value_list(agreement_type, value_lists.AGREEMENT_TYPE, "agreement type")
+        self.add("typeOfAgreement", agreement_type)
+
+    def add_date(self, date: str, date_type: str):
+        """Lägg till datum (start/end)"""
+        date = date_fragment(date, date_type)
+        if self.dates is None:
+            self.dates = self.add("dates", attributes=dict(_ERMS_XMLNS))
+        self.dates.append(date)
+
+
+class DirectExtensions(Fragment):
+    """
+    Motsvarar SVKExtensions: ermsSvkArende-elementet med tilläggen för ett
+    ärende eller en handling. Elementen skrivs i den ordning de läggs till,
+    som i lxml-backenden.
+    """
+
+    __slots__ = ("extension_type", "element", "related_objects", "svk_notes", "audit_log",
+                 "contract_info")
+
+    def __init__(self, extension_type: str = "aggregation"):
+        """
+        Args:
+            extension_type: "aggregation" eller "record"
+        """
+        super().__init__("ermsSvkArende", {
+            "xmlns": SVK_NAMESPACE,
+            "schemaVersion": "1.0",
+            "ermsSchemaVersion": "2.1.2",
+            "elementSchemaVersion": "1.0",
+            "schematronVersion": "1.0",
+        })
+        self.extension_type = extension_type
+        self.element = self.add("ermsSvkAggregation" if extension_type == "aggregation"
+                                else "ermsSvkRecord")
+        self.related_objects = None
+        self.svk_notes = None
+        self.audit_log = None
+        self.contract_info = None
+
+    def set_initiative(self, initiative: str):
+        """Sätt initiativ (endast för aggregation)"""
+        if self.extension_type != "aggregation":
+            raise ValueError("Initiative can only be set for aggregations")
+        validate_value_list(initiative, value_lists.INITIATIVE, "initiative")
+        self.element.add("initiative", initiative)
+
+    def get_related_objects(self) -> DirectRelatedObjects:
+        """Hämta eller skapa behållaren för relaterade objekt"""
+        if self.related_objects is None:
+            self.related_objects = self.element.append(DirectRelatedObjects())
+        return self.related_objects
+
+    def get_svk_notes(self) -> DirectNotes:
+        """Hämta eller skapa behållaren för anteckningar"""
+        if self.svk_notes is None:
+            self.svk_notes = self.element.append(DirectNotes())
+        return self.svk_notes
+
+    def get_audit_log(self) -> DirectAuditLog:
+        """Hämta eller skapa ändringsloggen"""
+        if self.audit_log is None:
+            self.audit_log = self.element.append(DirectAuditLog())
+        return self.audit_log
+
+    def get_contract_info(self) -> DirectContractInfo:
+        """Hämta eller skapa avtalsinformationen (endast för record)"""
+        if self.extension_type != "record":
+            raise ValueError("Contract info can only be set for records")
+        if self.contract_info is None:
+            self.contract_info = self.element.append(DirectContractInfo())
+        return self.contract_info
+
+
+def _attach_extensions(fragment: Fragment, extension_type: str) -> DirectExtensions:
+    """Lägg ett nytt ermsSvkArende i additionalInformation/additionalXMLData"""
+    extensions = DirectExtensions(extension_type)
+    fragment.add("additionalInformation").add("additionalXMLData").append(extensions)
+    return extensions
+
+
+class DirectRecord(RecordFragment):
+    """Skrivbar handling med samma API som SVKRecord"""
+
+    __slots__ = ("validator", "svk_extensions", "direction")
+
+    def __init__(self, record_type: str = "ärendedokument", physical_or_digital: str = "digital",
+                 system_identifier: str = None):
+        if record_type and record_type not in value_lists.RECORD_TYPE_SVK:
+            raise ValueError(f"Invalid SVK record type: {record_type}")
+        super().__init__(record_type, physical_or_digital, system_identifier)
+        self.validator = SVKValidator()
+        self.svk_extensions = None
+        self.direction = None
+
+    def set_document_number(self, document_number: str):
+        """Sätt dokumentnummer med SVK-validering"""
+        if not self.validator.validate_document_number(document_number):
+            raise ValueError(f"Ogiltigt dokumentnummer: {document_number}")
+        self.set_object_id(document_number)
+
+    def set_status_svk(self, status: str):
+        """Sätt status med SVK-validering (endast closed/obliterated)"""
+        if not self.validator.validate_case_status(status):
+            raise ValueError(f"Ogiltig status för SVK: {status}")
+        self.set_status(status)
+
+    def set_direction(self, direction: str, other_direction: str = None):
+        """Sätt riktning för handlingen (incoming, outgoing eller other/internal)"""
+        if not self.validator.validate_direction(direction, other_direction):
+            raise ValueError(f"Ogiltig riktning: {direction}")
+
+        attributes = {"directionDefinition": direction}
+        if other_direction:
+            attributes["otherDirectionDefinition"] = other_direction
+        self.direction = self.add("direction", attributes=attributes)
+
+    def add_required_dates(self, created_date: str, originated_date: str,
+                           received_date: str = None, expedited_date: str = None):
+        """Lägg till obligatoriska datum enligt SVK-krav"""
+        self.add_date(created_date, "created")
+        self.add_date(originated_date, "originated")
+        if received_date:
+            self.add_date(received_date, "received")
+        if expedited_date:
+            self.add_date(expedited_date, "expedited")
+
+    def add_document_agents(self, creator: str = None, responsible_person: str = None,
+                            sender: str = None, receiver: str = None):
+        """Lägg till aktörer för handlingen enligt SVK-mönster"""
+        if creator:
+            self.add_agent("creator", creator)
+        if responsible_person:
+            self.add_agent("responsible_person", responsible_person)
+        if sender:
+            self.add_agent("sender", sender)
+        if receiver:
+            self.add_agent("receiver", receiver)
+
+
+    def get_svk_extensions(self) -> DirectExtensions:
+        """Hämta eller skapa SVK-tillägg för handlingen"""
+        if self.svk_extensions is None:
+            self.svk_extensions = _attach_extensions(self, "record")
+        return self.svk_extensions
+
+    @instrumented("extensions.note")
+    def add_svk_note(self, note_type: str, note_text: str, creator_name: str,
+                     created_date: str, creator_org: str = None):
+        """Lägg till SVK-anteckning"""
+        self.get_svk_extensions().get_svk_notes().add_note(
+            note_type, note_text, creator_name, created_date, creator_org)
+
+    @instrumented("extensions.contract_info")
+    def add_contract_info(self, agreement_type: str, external_ref: str = None,
+                          call_off_value: int = None, contract_value: int = None,
+                          start_date: str = None, end_date: str = None):
+        """Lägg till avtalsinformation (för avtalsdokument)"""
+        contract_info = self.get_svk_extensions().get_contract_info()
+        contract_info.set_agreement_type(agreement_type)
+        if external_ref:
+            contract_info.set_external_reference(external_ref)
+        if call_off_value:
+            contract_info.set_call_off_value(call_off_value)
+        if contract_value:
+            contract_info.set_contract_value(contract_value)
+        if start_date:
+            contract_info.add_date(start_date, "start")
+        if end_date:
+            contract_info.add_date(end_date, "end")
+
+    @instrumented("extensions.appendix")
+    def add_svk_appendix(self, name: str, path: str, file_format: str,
+                         description: str = None, version_number: int = None,
+                         variant: str = "preservation"):
+        """Lägg till bifogad fil enligt SVK-struktur (som SVKRecord.add_svk_appendix)"""
+        appendix = self.get_svk_extensions().element.add("svkAppendix")
+        attributes = {"name": name, "path": path, "fileFormat": file_format}
+        if description:
+            attributes["description"] = description
+        appendix.add("appendix", attributes=attributes)
+        if version_number or variant:
+            file_info = appendix.add("fileInfo")
+            if version_number:
+                file_info.add("versionNumber", str(version_number))
+            if variant:
+                file_info.add("variant", variant)
+
+    def validate(self) -> dict:
+        """Validera handlingen enligt SVK-regler (som SVKRecord.validate)"""
+        self.validator.validate_record_data({
+            "document_number": self.object_id.text if self.object_id is not None else None,
+            "record_type": self.attributes.get("recordType"),
+            "status": self.status.attributes["value"] if self.status is not None else None,
+            "direction": (self.direction.attributes["directionDefinition"]
+                          if self.direction is not None else None),
+        })
+        return self.validator.get_validation_report()
+
+
+class DirectCase(AggregationFragment):
+    """Skrivbart ärende med samma API som SVKCase"""
+
+    __slots__ = ("validator", "svk_extensions")
+
+    def __init__(self, case_number: str = None, title: str = None,
+                 system_identifier: str = None):
+        super().__init__("caseFile", system_identifier)
+        self.validator = SVKValidator()
+        self.svk_extensions = None
+        if case_number:
+            self.set_case_number(case_number)
+        if title:
+            self.set_title(title)
+
+    def set_case_number(self, case_number: str):
+        """Sätt ärendenummer med SVK-validering"""
+        if not self.validator.validate_case_number(case_number):
+            raise ValueError(f"Ogiltigt ärendenummer: {case_number}")
+        self.set_object_id(case_number)
+
+    def set_archive_creator_info(self, org_number: str, name: str = None, aid: str = None):
+        """Sätt information om arkivansvarig (organisationsnummer och/eller aid)"""
+        if org_number:
+            if not self.validator.validate_org_number(org_number):
+                raise ValueError(f"Ogiltigt organisationsnummer: {org_number}")
+            self.add_extra_id("organisationsnummer", org_number)
+        if aid:
+            self.add_extra_id("aid", aid)
+        if not org_number and not aid:
+            raise ValueError("Antingen organisationsnummer eller aid måste anges")
+
+    def set_status_svk(self, status: str):
+        """Sätt status med SVK-validering (endast closed/obliterated)"""
+        if not self.validator.validate_case_status(status):
+            raise ValueError(f"Ogiltig status för SVK: {status}")
+        self.set_status(status)
+
+    def add_required_dates(self, opened_date: str, closed_date: str, created_date: str = None):
+        """Lägg till obligatoriska datum enligt SVK-krav"""
+        if created_date:
+            self.add_date(created_date, "created")
+        self.add_date(opened_date, "opened")
+        self.add_date(closed_date, "closed")
+
+    def add_case_agents(self, creator: str = None, responsible_person: str = None,
+                        counterparts: list = None, closing_person: str = None):
+        """Lägg till aktörer för ärendet enligt SVK-mönster"""
+        if creator:
+            self.add_agent("creator", creator)
+        if responsible_person:
+            self.add_agent("responsible_person", responsible_person)
+        for counterpart in counterparts or ():
+            if isinstance(counterpart, str):
+                self.add_agent("counterpart", counterpart)
+            else:
+                self.add_agent("counterpart", counterpart.get('name', ''),
+                               organisation=counterpart.get('organisation'),
+                               id_number=counterpart.get('id_number'),
+                               id_type=counterpart.get('id_type'))
+        if closing_person:
+            self.add_agent("other", closing_person, other_agent_type="closing_person")
+
+    def get_svk_extensions(self) -> DirectExtensions:
+        """Hämta eller skapa SVK-tillägg för ärendet"""
+        if self.svk_extensions is None:
+            self.svk_extensions = _attach_extensions(self, "aggregation")
+        return self.svk_extensions
+
+    def set_initiative(self, initiative: str):
+        """Sätt initiativ (eget/externt)"""
+        self.get_svk_extensions().set_initiative(initiative)
+
+    def add_related_project(self, project_name: str, project_id: str, system_id: str = None):
+        """Lägg till relaterat projekt"""
+        self.get_svk_extensions().get_related_objects().add_object(
+            "project", project_name, project_id, system_id)
+
+    def add_related_property(self, property_name: str, property_id: str, system_id: str = None):
+        """Lägg till relaterad fastighet"""
+        self.get_svk_extensions().get_related_objects().add_object(
+            "realEstate", property_name, property_id, system_id)
+
+    @instrumented("extensions.note")
+    def add_svk_note(self, note_type: str, note_text: str, creator_name: str,
+                     created_date: str, creator_org: str = None):
+        """Lägg till SVK-anteckning"""
+        self.get_svk_extensions().get_svk_notes().add_note(
+            note_type, note_text, creator_name, created_date, creator_org)
+
+    @instrumented("extensions.audit_event")
+    def add_audit_event(self, event_time: str, user: str, scope: str, action: str,
+                        value_before: str = None, value_after: str = None):
+        """Lägg till händelse i ändringsloggen"""
+        self.get_svk_extensions().get_audit_log().add_event(
+            event_time, user, scope, action, value_before, value_after)
+
+    @instrumented("build.direct_record")
+    def add_record_svk(self, document_number: str = None, title: str = None,
+                       record_type: str = "ärendedokument") -> DirectRecord:
+        """
+        Lägg till en handling till ärendet.
+
+        Returns:
+            DirectRecord: Den skapade handlingen
+        """
+        record = DirectRecord(record_type=record_type)
+        if document_number:
+            record.set_document_number(document_number)
+        if title:
+            record.set_title(title)
+        return self.append(record)
+
+    def validate(self) -> dict:
+        """Validera ärendet enligt SVK-regler (som SVKCase.validate)"""
+        self.validator.validate_case_data({
+            "case_number": self.object_id.text if self.object_id is not None else None,
+            "status": self.status.attributes["value"] if self.status is not None else None,
+        })
+        return self.validator.get_validation_report()
+
+
+class DirectCaseWriter:
+    """
+    Skriver ärenden direkt till en ERMS-fil utan lxml-träd.
+
+    add_case() fungerar som SVKErms.add_case(). Ett ärende skrivs när nästa
+    ärende läggs till eller vid close(), så det ska vara färdigbyggt innan
+    dess. Ärendena skrivs i den ordning de läggs till.
+    """
+
+    def __init__(self, target, erms: SVKErms = None, pretty_print: bool = True,
+                 nsmap: dict = None):
+        """
+        Args:
+            target: Filnamn eller binärt filobjekt
+            erms: Dokument med control-information (default: ett nytt SVKErms
+                  som konfigureras av första add_case())
+            pretty_print: Om utdata ska indenteras
+            nsmap: Namnrymder på erms-roten (default ROOT_NSMAP)
+
+        Raises:
+            ValueError: Om nsmap deklarerar SVK-namnrymden med ett prefix
+        """
+        if nsmap and any(prefix and uri == SVK_NAMESPACE for prefix, uri in nsmap.items()):
+            raise ValueError("SVK-namnrymden kan inte deklareras med prefix på roten "
+                             "vid direktskrivning")
+        self.target = target
+        self.erms = erms if erms is not None else SVKErms()
+        self.pretty_print = pretty_print
+        self.nsmap = nsmap
+        self._writer = None
+        self._pending = None
+
+    @property
+    def count(self) -> int:
+        """Antal skrivna ärenden"""
+        return self._writer.count if self._writer is not None else 0
+
+    @property
+    def bytes_written(self) -> int:
+        """Antal skrivna bytes"""
+        return self._writer.bytes_written if self._writer is not None else 0
+
+    def _stream(self) -> ErmsStreamWriter:
+        if self._writer is None:
+            self._writer = ErmsStreamWriter(self.target, self.erms.control.element,
+                                            pretty_print=self.pretty_print, nsmap=self.nsmap)
+        return self._writer
+
+    @instrumented("build.direct_case")
+    def add_case(self, case_number: str, title: str, archive_creator: str = None,
+                 org_number: str = None, aid: str = None) -> DirectCase:
+        """
+        Lägg till ett ärende med SVK-validering.
+
+        Returns:
+            DirectCase: Det skapade ärendet
+        """
+        if not self.erms.control.identifications and archive_creator:
+            self.erms.setup_control_info(archive_creator, org_number, aid, case_number)
+
+        case = DirectCase(case_number, title)
+        if org_number or aid:
+            case.set_archive_creator_info(org_number, archive_creator, aid)
+
+        self.flush()
+        self._pending = case
+        return case
+
+    def write_case(self, case: DirectCase) -> int:
+        """
+        Skriv ett färdigbyggt ärende direkt (efter ett eventuellt väntande).
+
+        Returns:
+            int: Antal skrivna bytes
+        """
+        self.flush()
+        writer = self._stream()
+        return writer.write_raw(case.serialize(self.pretty_print, AGGREGATION_LEVEL))
+
+    def flush(self):
+        """Skriv det väntande ärendet"""
+        case, self._pending = self._pending, None
+        if case is not None:
+            self.write_case(case)
+
+    def close(self) -> int:
+        """
+        Skriv det sista ärendet och avslutande taggar.
+
+        Returns:
+            int: Antal skrivna ärenden
+        """
+        self.flush()
+        self._stream().close()
+        return self.count
+
+    def __enter__(self) -> "DirectCaseWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._writer is not None:
+            self._writer.abort()
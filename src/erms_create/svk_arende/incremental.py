@@ -0,0 +1,253 @@
+"""
+Inkrementell leverans
+=====================
+
+Bygger och levererar bara de ärenden som har ändrats sedan förra körningen.
+
+En lokal SQLite-databas håller reda på ärendenummer, hash av källdata,
+innehållshash (C14N) och i vilken delleverans ärendet senast levererades.
+
+Usage:
+    def build_case(erms, row):
+        return erms.create_simple_case(row["case_number"], row["title"], ...)
+
+    with DeliveryState("leveranser.sqlite") as state:
+        exporter = IncrementalExporter(state, "leveranser/", "Sunne pastorat",
+                                       org_number="1234567890")
+        result = exporter.export(rows, build_case)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Callable, Iterable, Dict, Any
+from ..core.streaming import ErmsStreamWriter
+from .svk_erms import SVKErms
+
+MANIFEST_FILENAME = "manifest.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_number TEXT PRIMARY KEY,
+    source_hash TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    shard TEXT,
+    delivered_at TEXT
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shard TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    case_count INTEGER NOT NULL
+);
+"""
+
+
+def source_hash(source: Dict[str, Any]) -> str:
+    """Hash av källdata för ett ärende (oberoende av nyckelordning)"""
+    data = json.dumps(source, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class DeliveryState:
+    """Leveransstatus per ärende i en SQLite-databas"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Sökväg till databasfilen (skapas om den inte finns)
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        self.connection.commit()
+
+    def get(self, case_number: str):
+        """
+        Hämta status för ett ärende.
+
+        Returns:
+            Tuple (source_hash, content_hash, shard) eller None
+        """
+        return self.connection.execute(
+            "SELECT source_hash, content_hash, shard FROM cases WHERE case_number = ?",
+            (case_number,)).fetchone()
+
+    def update_source_hash(self, case_number: str, new_source_hash: str):
+        """Uppdatera källhash för ett ärende vars innehåll inte ändrats"""
+        self.connection.execute(
+            "UPDATE cases SET source_hash = ? WHERE case_number = ?",
+            (new_source_hash, case_number))
+
+    def record_delivery(self, shard: str, cases: Iterable[tuple]) -> int:
+        """
+        Registrera en levererad delleverans.
+
+        Args:
+            shard: Filnamn för delleveransen
+            cases: (case_number, source_hash, content_hash) för levererade ärenden
+
+        Returns:
+            int: Antal registrerade ärenden
+        """
+        delivered_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        rows = [(case_number, s_hash, c_hash, shard, delivered_at)
+                for case_number, s_hash, c_hash in cases]
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO cases "
+            "(case_number, source_hash, content_hash, shard, delivered_at) "
+            "VALUES (?, ?, ?, ?, ?)", rows)
+        self.connection.execute(
+            "INSERT INTO deliveries (shard, created_at, case_count) VALUES (?, ?, ?)",
+            (shard, delivered_at, len(rows)))
+        return len(rows)
+
+    def next_shard_number(self) -> int:
+        """Nummer för nästa delleverans"""
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM deliveries").fetchone()
+        return count + 1
+
+    def deliveries(self) -> list:
+        """Alla registrerade delleveranser i ordning"""
+        return [
+            {"shard": shard, "created_at": created_at, "cases": case_count}
+            for shard, created_at, case_count in self.connection.execute(
+                "SELECT shard, created_at, case_count FROM deliveries ORDER BY id")
+        ]
+
+    def case_count(self) -> int:
+        """Antal ärenden som har levererats"""
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM cases").fetchone()
+        return count
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "DeliveryState":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class IncrementalExporter:
+    """
+    Exporterar bara nya och ändrade ärenden till en delleverans.
+
+    Ett ärende byggs bara om källdatan ändrats sedan förra leveransen. Ett
+    ombyggt ärende levereras bara om dess innehållshash (C14N utan uuid och
+    tidsstämplar) skiljer sig från den levererade.
+    """
+
+    def __init__(self, state: DeliveryState, output_dir: str, archive_creator: str,
+                 org_number: str = None, aid: str = None, prefix: str = "delta",
+                 pretty_print: bool = True):
+        """
+        Args:
+            state: Leveransstatus
+            output_dir: Katalog för delleveranser och manifest
+            archive_creator: Arkivbildare (för control)
+            org_number: Organisationsnummer
+            aid: ArkivbildarID (alternativ till org_number)
+            prefix: Prefix för delleveransernas filnamn
+            pretty_print: Om utdata ska indenteras
+        """
+        self.state = state
+        self.output_dir = output_dir
+        self.archive_creator = archive_creator
+        self.org_number = org_number
+        self.aid = aid
+        self.prefix = prefix
+        self.pretty_print = pretty_print
+
+    def export(self, sources: Iterable[Dict[str, Any]],
+               build_case: Callable[[SVKErms, Dict[str, Any]], Any],
+               case_number_key: str = "case_number") -> dict:
+        """
+        Exportera ändrade ärenden.
+
+        Args:
+            sources: Källdata, en dict per ärende
+            build_case: Funktion (erms, källdata) -> SVKCase som bygger ärendet
+                        i det givna dokumentet
+            case_number_key: Nyckel för ärendenumret i källdatan
+
+        Returns:
+            Dict med delleverans (eller None) och antal nya, ändrade och oförändrade
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        erms = SVKErms()
+        erms.setup_control_info(self.archive_creator, self.org_number, self.aid)
+
+        shard = f"{self.prefix}-{self.state.next_shard_number():05d}.xml"
+        filename = os.path.join(self.output_dir, shard)
+        temp_filename = filename + ".tmp"
+
+        result = {"shard": None, "new": 0, "changed": 0, "unchanged": 0}
+        delivered = []
+
+        try:
+            with ErmsStreamWriter(temp_filename, erms.control.element,
+                                  pretty_print=self.pretty_print) as writer:
+                for source in sources:
+                    case_number = source[case_number_key]
+                    new_source_hash = source_hash(source)
+                    previous = self.state.get(case_number)
+
+                    if previous is not None and previous[0] == new_source_hash:
+                        result["unchanged"] += 1
+                        continue
+
+                    case = build_case(erms, source)
+                    new_content_hash = case.content_hash()
+                    erms.remove_case(case_number)
+
+                    if previous is not None and previous[1] == new_content_hash:
+                        # Källdatan ändrades men inte det som levereras
+                        self.state.update_source_hash(case_number, new_source_hash)
+                        result["unchanged"] += 1
+                        continue
+
+                    writer.write_aggregation(case.element)
+                    delivered.append((case_number, new_source_hash, new_content_hash))
+                    result["changed" if previous is not None else "new"] += 1
+        except BaseException:
+            self.state.rollback()
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
+
+        if delivered:
+            with open(temp_filename, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(temp_filename, filename)
+            self.state.record_delivery(shard, delivered)
+            result["shard"] = shard
+        else:
+            os.remove(temp_filename)
+        self.state.commit()
+
+        self.write_manifest()
+        return result
+
+    def write_manifest(self) -> dict:
+        """Skriv manifest över alla delleveranser"""
+        deliveries = self.state.deliveries()
+        manifest = {
+            "archive_creator": self.archive_creator,
+            "cases": self.state.case_count(),
+            "last_delivery": deliveries[-1]["shard"] if deliveries else None,
+            "deliveries": deliveries,
+        }
+        with open(os.path.join(self.output_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
@@ -0,0 +1,296 @@
+"""
+Inläsning av tabelldata
+=======================
+
+Bygger ärenden från tabellrader (CSV, JSONL eller vilken iterator av dicts
+som helst) med en deklarativ mappning från kolumner till fält.
+
+Varje rad beskriver en handling (eller ett ärende utan handlingar) och
+upprepar ärendets kolumner. Raderna läses strömmande och grupperas på
+ärendenummer; rader för samma ärende måste komma i följd.
+
+Usage:
+    mapping = CaseMapping(
+        case={"case_number": "arendenr", "title": "rubrik", "status": "status"},
+        case_dates={"opened": "oppnad", "closed": "avslutad"},
+        case_agents={"responsible_person": "handlaggare"},
+        record={"document_number": "dokumentnr", "title": "dokumenttitel"},
+        record_agents={"sender": "avsandare"},
+    )
+    ingest = TabularIngest(mapping, archive_creator="Sunne pastorat",
+                           org_number="1234567890")
+    ingest.ingest_to_file(read_csv("arenden.csv"), "leverans.xml")
+"""
+
+import csv
+import json
+import mmap
+import os
+from typing import Dict, Iterable, Iterator, List, Tuple
+from ..core.streaming import ErmsStreamWriter
+from .svk_erms import SVKErms
+from .svk_case import SVKCase
+
+# Läsbuffert för CSV-filer
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Fält som kan mappas för ärenden och handlingar
+CASE_FIELDS = ("case_number", "title", "archive_creator", "org_number", "aid",
+               "status", "classification")
+RECORD_FIELDS = ("document_number", "title", "record_type", "status", "direction",
+                 "other_direction")
+
+
+def read_csv(path: str, delimiter: str = ",", encoding: str = "utf-8") -> Iterator[dict]:
+    """
+    Läs en CSV-fil med rubrikrad strömmande.
+
+    Yields:
+        dict: En rad per kolumnnamn
+    """
+    with open(path, newline="", encoding=encoding, buffering=READ_BUFFER_SIZE) as f:
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+
+def read_jsonl(path: str) -> Iterator[dict]:
+    """
+    Läs en JSONL-fil (ett JSON-objekt per rad) via minnesmappning.
+
+    Yields:
+        dict: Ett objekt per icke-tom rad
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for line in iter(data.readline, b""):
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _value(row: dict, column: str):
+    """Värde i en kolumn, None för saknade och tomma värden"""
+    value = row.get(column)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return str(value)
+
+
+class CaseMapping:
+    """
+    Mappning från kolumnnamn till fält.
+
+    case och record mappar fält (se CASE_FIELDS och RECORD_FIELDS) till
+    kolumner. De övriga mappar datumtyp respektive aktörstyp till kolumner.
+    """
+
+    def __init__(self, case: Dict[str, str], case_dates: Dict[str, str] = None,
+                 case_agents: Dict[str, str] = None, record: Dict[str, str] = None,
+                 record_dates: Dict[str, str] = None, record_agents: Dict[str, str] = None):
+        """
+        Raises:
+            ValueError: Vid okända fält eller om ärendenummer inte är mappat
+        """
+        for fields, known, name in ((case, CASE_FIELDS, "case"),
+                                    (record or {}, RECORD_FIELDS, "record")):
+            unknown = sorted(set(fields) - set(known))
+            if unknown:
+                raise ValueError(f"Okända fält i {name}-mappningen: {', '.join(unknown)}")
+        if "case_number" not in case:
+            raise ValueError("Mappningen måste ange kolumn för case_number")
+
+        self.case = dict(case)
+        self.case_dates = dict(case_dates or {})
+        self.case_agents = dict(case_agents or {})
+        self.record = dict(record or {})
+        self.record_dates = dict(record_dates or {})
+        self.record_agents = dict(record_agents or {})
+
+    def case_number(self, row: dict) -> str:
+        """Ärendenummer för en rad"""
+        return _value(row, self.case["case_number"])
+
+    def has_record(self, row: dict) -> bool:
+        """Om raden beskriver en handling"""
+        return any(_value(row, column) is not None for column in self.record.values())
+
+
+class TabularIngest:
+    """Bygger SVK-ärenden från tabellrader enligt en CaseMapping"""
+
+    def __init__(self, mapping: CaseMapping, archive_creator: str = None,
+                 org_number: str = None, aid: str = None):
+        """
+        Args:
+            mapping: Kolumnmappning
+            archive_creator: Arkivbildare när den inte är mappad
+            org_number: Organisationsnummer när det inte är mappat
+            aid: ArkivbildarID när det inte är mappat
+        """
+        self.mapping = mapping
+        self.defaults = {"archive_creator": archive_creator, "org_number": org_number,
+                         "aid": aid}
+
+    def iter_groups(self, rows: Iterable[dict]) -> Iterator[Tuple[dict, List[dict]]]:
+        """
+        Gruppera rader per ärende.
+
+        Yields:
+            Tuple (första raden för ärendet, rader med handlingar)
+
+        Raises:
+            ValueError: Om ett ärendenummer saknas eller återkommer efter andra ärenden
+        """
+        seen = set()
+        current = None
+        first = None
+        records = []
+        for line, row in enumerate(rows, start=1):
+            case_number = self.mapping.case_number(row)
+            if case_number is None:
+                raise ValueError(f"Rad {line} saknar ärendenummer")
+            if case_number != current:
+                if current is not None:
+                    yield first, records
+                if case_number in seen:
+                    raise ValueError(f"Rader för ärende '{case_number}' kommer inte i följd "
+                                     f"(rad {line})")
+                seen.add(case_number)
+                current, first, records = case_number, row, []
+            if self.mapping.has_record(row):
+                records.append(row)
+        if current is not None:
+            yield first, records
+
+    def _field(self, row: dict, name: str):
+        column = self.mapping.case.get(name)
+        value = _value(row, column) if column else None
+        return value if value is not None else self.defaults.get(name)
+
+    def build_case(self, erms: SVKErms, row: dict, record_rows: List[dict]) -> SVKCase:
+        """
+        Bygg ett ärende med handlingar i ett dokument.
+
+        Args:
+            erms: Dokument att bygga i
+            row: Rad med ärendets kolumner
+            record_rows: Rader med handlingar
+
+        Returns:
+            SVKCase: Det byggda ärendet
+        """
+        mapping = self.mapping
+        case = erms.add_case(self._field(row, "case_number"), self._field(row, "title"),
+                             self._field(row, "archive_creator"),
+                             self._field(row, "org_number"), self._field(row, "aid"))
+
+        status = self._field(row, "status")
+        if status:
+            case.set_status_svk(status)
+        classification = self._field(row, "classification")
+        if classification:
+            case.add_classification(classification)
+        for agent_type, column in mapping.case_agents.items():
+            name = _value(row, column)
+            if name:
+                case.add_agent(agent_type, name)
+        for date_type, column in mapping.case_dates.items():
+            date = _value(row, column)
+            if date:
+                case.add_date(date, date_type)
+
+        for record_row in record_rows:
+            fields = {name: _value(record_row, column) for name, column in mapping.record.items()}
+            record = case.add_record_svk(fields.get("document_number"), fields.get("title"),
+                                         fields.get("record_type") or "ärendedokument")
+            if fields.get("status"):
+                record.set_status_svk(fields["status"])
+            if fields.get("direction"):
+                record.set_direction(fields["direction"], fields.get("other_direction"))
+            for agent_type, column in mapping.record_agents.items():
+                name = _value(record_row, column)
+                if name:
+                    record.add_agent(agent_type, name)
+            for date_type, column in mapping.record_dates.items():
+                date = _value(record_row, column)
+                if date:
+                    record.add_date(date, date_type)
+        return case
+
+    def iter_cases(self, rows: Iterable[dict], erms: SVKErms) -> Iterator[SVKCase]:
+        """
+        Bygg ärendena ett i taget i erms.
+
+        Ärendet ligger kvar i dokumentet; anroparen kan ta bort eller
+        mellanlagra det innan nästa ärende byggs.
+
+        Yields:
+            SVKCase: Byggda ärenden i indataordning
+        """
+        for row, record_rows in self.iter_groups(rows):
+            yield self.build_case(erms, row, record_rows)
+
+    def ingest(self, rows: Iterable[dict], erms: SVKErms = None) -> SVKErms:
+        """
+        Bygg alla ärenden i ett dokument.
+
+        Returns:
+            SVKErms: Dokumentet med ärendena
+        """
+        if erms is None:
+            erms = self._new_document()
+        for _ in self.iter_cases(rows, erms):
+            pass
+        return erms
+
+    def ingest_to_file(self, rows: Iterable[dict], output, pretty_print: bool = True) -> int:
+        """
+        Bygg och skriv ärendena strömmande, ett ärende i minnet åt gången.
+
+        Args:
+            rows: Tabellrader
+            output: Filnamn eller binärt filobjekt
+            pretty_print: Om utdata ska indenteras
+
+        Returns:
+            int: Antal skrivna ärenden
+
+        Raises:
+            ValueError: Om arkivbildare saknas både som standardvärde och i
+                första ärendet
+        """
+        erms = self._new_document()
+        writer = None
+        try:
+            for case in self.iter_cases(rows, erms):
+                erms.remove_case(case.object_id.text)
+                if writer is None:
+                    # Control kan sättas av första ärendet (arkivbildare från kolumn)
+                    writer = self._open_writer(erms, output, pretty_print)
+                writer.write_aggregation(case.element)
+            if writer is None:
+                writer = self._open_writer(erms, output, pretty_print)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        writer.close()
+        return writer.count
+
+    @staticmethod
+    def _open_writer(erms: SVKErms, output, pretty_print: bool) -> ErmsStreamWriter:
+        """Öppna utdata när control är klar"""
+        if not erms.control.identifications:
+            raise ValueError("Arkivbildare saknas: ange archive_creator som standardvärde "
+                             "eller mappa kolumnen")
+        return ErmsStreamWriter(output, erms.control.element, pretty_print=pretty_print)
+
+    def _new_document(self) -> SVKErms:
+        erms = SVKErms()
+        if self.defaults["archive_creator"]:
+            erms.setup_control_info(self.defaults["archive_creator"],
+                                    self.defaults["org_number"], self.defaults["aid"])
+        return erms
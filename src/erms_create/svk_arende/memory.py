@@ -0,0 +1,301 @@
+"""
+Minnesrapport per ärende
+========================
+
+Mäter vad delarna i ett dokument kostar i minne, så att kapacitetsplanering
+för stora leveranser bygger på mätningar: bytes per SVKCase, per SVKRecord,
+per aktör och per SVK-tillägg (anteckningar, ändringslogg, avtal, bilagor).
+
+Varje del byggs count gånger i ett eget dokument och mäts två gånger:
+
+- python_bytes: Python-objekt (wrappers, listor, dictar, lxml:s proxyobjekt)
+  mätt med tracemalloc, med fördelning per källrad i det här paketet
+- malloc_bytes: C-heapen mätt med glibc:s mallinfo2 i en separat körning
+  utan tracemalloc. Här syns libxml2:s noder och attribut, som tracemalloc
+  inte ser. None på plattformar utan mallinfo2.
+
+Det som byggs innan mätningen (t.ex. ärendet som handlingarna läggs i) och
+engångskostnader som cachade element räknas inte med.
+
+Usage:
+    report = measure_memory(count=1000)
+    print(format_memory_report(report))
+    report["components"]["record"]["python_bytes_per_item"]
+"""
+
+import ctypes
+import gc
+import os
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from .svk_erms import SVKErms
+from .synthetic import SyntheticDelivery, build_case
+
+# Rotkatalogen för erms_create; bara källrader härifrån redovisas
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_NAMES = ("Anna Andersson", "Per Persson", "Sunne kommun", "Karin Nilsson", "Byggfirman AB")
+
+
+class _MallInfo2(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_size_t) for name in (
+        "arena", "ordblks", "smblks", "hblks", "hblkhd", "usmblks", "fsmblks",
+        "uordblks", "fordblks", "keepcost")]
+
+
+def _load_mallinfo():
+    try:
+        function = ctypes.CDLL(None).mallinfo2
+    except (AttributeError, OSError, TypeError):
+        return None
+    function.restype = _MallInfo2
+    return function
+
+
+_mallinfo = _load_mallinfo()
+
+
+def malloc_in_use() -> int:
+    """Bytes i bruk på C-heapen (None om mallinfo2 saknas)"""
+    if _mallinfo is None:
+        return None
+    info = _mallinfo()
+    return info.uordblks + info.hblkhd
+
+
+def _case_number(index: int) -> str:
+    return f"M {2000 + index // 9999}-{index % 9999 + 1:04d}"
+
+
+def _new_case(erms: SVKErms, index: int):
+    case = erms.add_case(_case_number(index), f"Ärende {index}")
+    case.set_status_svk("closed")
+    case.add_required_dates("2024-01-15T10:00:00", "2024-03-01T12:00:00")
+    return case
+
+
+def _new_record(case, index: int, record_type: str = "ärendedokument"):
+    record = case.add_record_svk(f"{case.object_id.text}:{index}", f"Handling {index}",
+                                 record_type)
+    record.set_direction("incoming")
+    record.add_required_dates("2024-01-15T10:00:00", "2024-01-15T10:00:00")
+    return record
+
+
+# Del -> (förberedelse(count) -> tillstånd, bygg(tillstånd, count) -> objekt att behålla)
+def _case_component():
+    def prepare(count):
+        return SVKErms()
+
+    def build(erms, count):
+        return [_new_case(erms, index) for index in range(count)]
+    return prepare, build
+
+
+def _record_component():
+    def prepare(count):
+        return _new_case(SVKErms(), 0)
+
+    def build(case, count):
+        return [_new_record(case, index) for index in range(1, count + 1)]
+    return prepare, build
+
+
+def _agent_component():
+    def prepare(count):
+        return _new_case(SVKErms(), 0)
+
+    def build(case, count):
+        return [case.add_agent("counterpart", _NAMES[index % len(_NAMES)])
+                for index in range(count)]
+    return prepare, build
+
+
+def _extensions_component():
+    def prepare(count):
+        erms = SVKErms()
+        return [_new_case(erms, index) for index in range(count)]
+
+    def build(cases, count):
+        return [case.get_svk_extensions() for case in cases]
+    return prepare, build
+
+
+def _note_component():
+    def prepare(count):
+        case = _new_case(SVKErms(), 0)
+        case.get_svk_extensions().get_svk_notes()
+        return case
+
+    def build(case, count):
+        for index in range(count):
+            case.add_svk_note("generell anteckning", f"Anteckning {index}",
+                              _NAMES[index % len(_NAMES)], "2024-01-01")
+    return prepare, build
+
+
+def _audit_component():
+    def prepare(count):
+        case = _new_case(SVKErms(), 0)
+        case.get_svk_extensions().get_audit_log()
+        return case
+
+    def build(case, count):
+        for index in range(count):
+            case.add_audit_event("2024-01-01T00:00:00", _NAMES[index % len(_NAMES)],
+                                 "ansvarig", "update", "Anna Andersson", "Per Persson")
+    return prepare, build
+
+
+def _contract_component():
+    def prepare(count):
+        case = _new_case(SVKErms(), 0)
+        return [_new_record(case, index, "avtalsdokument") for index in range(1, count + 1)]
+
+    def build(records, count):
+        for index, record in enumerate(records):
+            record.add_contract_info("avtal", f"AVT-{index}", contract_value=100000,
+                                     start_date="2024-01-01", end_date="2026-12-31")
+    return prepare, build
+
+
+def _appendix_component():
+    def prepare(count):
+        record = _new_record(_new_case(SVKErms(), 0), 1)
+        record.get_svk_extensions()
+        return record
+
+    def build(record, count):
+        for index in range(count):
+            record.add_svk_appendix(f"fil_{index}.pdf", f"filer/{index}.pdf", "pdf",
+                                    version_number=1)
+    return prepare, build
+
+
+def _synthetic_component(seed: int):
+    def prepare(count):
+        return SVKErms(), list(SyntheticDelivery(seed).iter_specs(count))
+
+    def build(state, count):
+        erms, specs = state
+        return [build_case(erms, spec) for spec in specs]
+    return prepare, build
+
+
+COMPONENTS = ("case", "record", "agent", "svk_extensions", "note", "audit_event",
+              "contract_info", "appendix", "synthetic_case")
+
+
+def _components(seed: int) -> Dict[str, Tuple[Callable, Callable]]:
+    return {
+        "case": _case_component(),
+        "record": _record_component(),
+        "agent": _agent_component(),
+        "svk_extensions": _extensions_component(),
+        "note": _note_component(),
+        "audit_event": _audit_component(),
+        "contract_info": _contract_component(),
+        "appendix": _appendix_component(),
+        "synthetic_case": _synthetic_component(seed),
+    }
+
+
+def _relative(filename: str) -> str:
+    return os.path.relpath(filename, os.path.dirname(_PACKAGE_DIR))
+
+
+def _measure(prepare: Callable, build: Callable, count: int, top: int) -> dict:
+    # Uppvärmning: cacher, reguljära uttryck och liknande engångskostnader
+    build(prepare(1), 1)
+
+    state = prepare(count)
+    gc.collect()
+    malloc_before = malloc_in_use()
+    kept = build(state, count)
+    gc.collect()
+    malloc_after = malloc_in_use()
+    del kept, state
+
+    state = prepare(count)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        kept = build(state, count)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del kept, state
+
+    package = [tracemalloc.Filter(True, os.path.join(_PACKAGE_DIR, "*"))]
+    lines = []
+    for stat in after.filter_traces(package).compare_to(before.filter_traces(package),
+                                                          "lineno"):
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        lines.append({"file": _relative(frame.filename), "line": frame.lineno,
+                      "bytes": stat.size_diff, "blocks": stat.count_diff})
+    lines.sort(key=lambda line: line["bytes"], reverse=True)
+
+    # Ögonblicksbilden "before" skapas under mätningen och räknas inte med
+    own = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    python_bytes = sum(stat.size_diff for stat in after.filter_traces(own).compare_to(
+        before.filter_traces(own), "filename"))
+    malloc_bytes = (malloc_after - malloc_before) if malloc_before is not None else None
+    return {
+        "count": count,
+        "python_bytes": python_bytes,
+        "python_bytes_per_item": python_bytes / count,
+        "malloc_bytes": malloc_bytes,
+        "malloc_bytes_per_item": malloc_bytes / count if malloc_bytes is not None else None,
+        "lines": lines[:top],
+    }
+
+
+def measure_memory(count: int = 500, components: List[str] = None, top: int = 5,
+                   seed: int = 0) -> Dict[str, dict]:
+    """
+    Mät minnet per del av ett SVK-dokument.
+
+    Args:
+        count: Antal exemplar av varje del som byggs
+        components: Delar ur COMPONENTS (default: alla)
+        top: Antal källrader per del i fördelningen
+        seed: Seed för de syntetiska ärendena i "synthetic_case"
+
+    Returns:
+        Dict med "components": del -> python_bytes, malloc_bytes (totalt och
+        per exemplar) och "lines" med de källrader i paketet som allokerade mest
+
+    Raises:
+        ValueError: Om en del är okänd eller count är mindre än 1
+    """
+    if count < 1:
+        raise ValueError(f"count måste vara minst 1: {count}")
+    components = components or list(COMPONENTS)
+    for name in components:
+        if name not in COMPONENTS:
+            raise ValueError(f"Okänd del: '{name}'. Måste vara en av: {', '.join(COMPONENTS)}")
+    if tracemalloc.is_tracing():
+        raise ValueError("tracemalloc används redan; minnesrapporten behöver starta egen mätning")
+
+    available = _components(seed)
+    return {
+        "malloc_available": _mallinfo is not None,
+        "components": {name: _measure(*available[name], count, top) for name in components},
+    }
+
+
+def format_memory_report(report: dict) -> str:
+    """Minnesrapporten som läsbar tabell"""
+    lines = [f"{'del':<16} {'antal':>7} {'Python B/st':>12} {'malloc B/st':>12}"]
+    for name, result in report["components"].items():
+        native = result["malloc_bytes_per_item"]
+        lines.append(f"{name:<16} {result['count']:>7} {result['python_bytes_per_item']:>12.0f} "
+                     f"{native if native is not None else float('nan'):>12.0f}")
+        for line in result["lines"]:
+            lines.append(f"    {line['bytes'] / result['count']:>10.0f} B/st  "
+                         f"{line['file']}:{line['line']}")
+    return "\n".join(lines)
@@ -0,0 +1,159 @@
+"""
+Parallell export
+================
+
+Exporterar ärenden genom en pipeline med begränsade köer:
+hämta → bygga → validera → serialisera → skriva.
+
+Varje byggtråd bygger sina ärenden i ett eget SVKErms-dokument och kopplar
+loss dem innan de skickas vidare, så att inget lxml-träd ändras från flera
+trådar. Ärendena skrivs i samma ordning som källdatan.
+
+Usage:
+    def build_case(erms, row):
+        return erms.create_simple_case(row["case_number"], row["title"], ...)
+
+    result = export_cases(rows, build_case, "leverans.xml", "Sunne pastorat",
+                          org_number="1234567890", build_workers=4)
+    print(result["metrics"])
+
+    # Kontrollpunkt var 1000:e ärende; en avbruten export fortsätter med resume
+    export_cases(rows, build_case, "leverans.xml", "Sunne pastorat",
+                 org_number="1234567890", checkpoint_interval=1000)
+    export_cases(rows, build_case, "leverans.xml", "Sunne pastorat",
+                 org_number="1234567890", resume=True)
+"""
+
+import itertools
+import os
+import threading
+from typing import Callable, Iterable, Dict, Any
+from ..core.checkpoint import CheckpointWriter, DEFAULT_CHECKPOINT_INTERVAL
+from ..core.pipeline import Pipeline, DROP, DEFAULT_QUEUE_SIZE
+from ..core.streaming import ErmsStreamWriter
+from .svk_erms import SVKErms
+
+
+def export_cases(sources: Iterable[Dict[str, Any]],
+                 build_case: Callable[[SVKErms, Dict[str, Any]], Any],
+                 output: str, archive_creator: str, org_number: str = None,
+                 aid: str = None, validate: bool = True, on_invalid: str = "error",
+                 build_workers: int = 2, validate_workers: int = 1,
+                 serialize_workers: int = 2, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 pretty_print: bool = True, checkpoint_interval: int = None,
+                 resume: bool = False) -> dict:
+    """
+    Bygg, validera och skriv ärenden parallellt till en ERMS-fil.
+
+    Med checkpoint_interval sparas en kontrollpunkt (position i källdatan
+    och längd på utdata) var checkpoint_interval:e ärende, och den
+    temporära filen behålls om exporten avbryts. Med resume hoppar
+    exporten över de ärenden som redan skrivits och fortsätter efter
+    kontrollpunkten; källdatan måste då ge samma ärenden i samma ordning.
+    "rejected" omfattar bara ärenden som underkänts efter kontrollpunkten.
+
+    Args:
+        sources: Källdata, en dict per ärende
+        build_case: Funktion (erms, källdata) -> SVKCase som bygger ärendet
+        output: Fil att skriva (ersätts först när exporten är klar)
+        archive_creator: Arkivbildare (för control)
+        org_number: Organisationsnummer
+        aid: ArkivbildarID (alternativ till org_number)
+        validate: Om ärendena ska valideras med SVKCase.validate()
+        on_invalid: "error" för att avbryta eller "skip" för att hoppa över
+                    ogiltiga ärenden
+        build_workers: Antal trådar som bygger ärenden
+        validate_workers: Antal trådar som validerar
+        serialize_workers: Antal trådar som serialiserar
+        queue_size: Kapacitet för varje kö mellan stegen
+        pretty_print: Om utdata ska indenteras
+        checkpoint_interval: Antal ärenden i källdatan mellan kontrollpunkter
+        resume: Fortsätt en avbruten export från dess senaste kontrollpunkt
+
+    Returns:
+        Dict med antal skrivna ärenden, överhoppade ärenden och mätvärden per steg
+
+    Raises:
+        ValueError: Om ett ärende är ogiltigt och on_invalid är "error", eller
+                    om resume anges utan en kontrollpunkt för samma export
+    """
+    if on_invalid not in ("error", "skip"):
+        raise ValueError(f"Ogiltigt on_invalid: '{on_invalid}'. Måste vara error eller skip")
+
+    control_erms = SVKErms()
+    control_erms.setup_control_info(archive_creator, org_number, aid)
+
+    local = threading.local()
+    rejected = []
+    rejected_lock = threading.Lock()
+
+    # Källdatan numreras så att skrivsteget vet hur långt exporten kommit
+    def build(item):
+        position, source = item
+        erms = getattr(local, "erms", None)
+        if erms is None:
+            erms = local.erms = SVKErms()
+        case = build_case(erms, source)
+        erms.remove_case(case.object_id.text)
+        return position, case
+
+    def check(item):
+        position, case = item
+        report = case.validate()
+        if report["valid"]:
+            return item
+        if on_invalid == "error":
+            raise ValueError(f"Ärende {case.object_id.text} är ogiltigt: "
+                             + "; ".join(report["errors"]))
+        with rejected_lock:
+            rejected.append(case.object_id.text)
+        return DROP
+
+    temp_output = output + ".tmp"
+    checkpointed = resume or checkpoint_interval is not None
+    if checkpointed:
+        writer = CheckpointWriter(temp_output, control_erms.control.element,
+                                  pretty_print=pretty_print,
+                                  checkpoint_interval=(checkpoint_interval
+                                                       or DEFAULT_CHECKPOINT_INTERVAL),
+                                  resume=resume,
+                                  metadata={"archive_creator": archive_creator,
+                                            "org_number": org_number, "aid": aid,
+                                            "validate": validate, "on_invalid": on_invalid})
+
+        def write(item):
+            position, data = item
+            writer.write_raw(data)
+            # Underkända ärenden före det här räknas också som lästa
+            writer.advance(position + 1 - writer.input_position)
+    else:
+        writer = ErmsStreamWriter(temp_output, control_erms.control.element,
+                                  pretty_print=pretty_print)
+
+        def write(item):
+            writer.write_raw(item[1])
+
+    start = writer.input_position if checkpointed else 0
+    items = itertools.islice(enumerate(sources), start, None)
+    try:
+        with writer:
+            pipeline = Pipeline(queue_size)
+            pipeline.add_stage("build", build, workers=build_workers)
+            if validate:
+                pipeline.add_stage("validate", check, workers=validate_workers)
+            pipeline.add_stage("serialize",
+                               lambda item: (item[0], writer.serialize(item[1].element)),
+                               workers=serialize_workers)
+            pipeline.run(items, write)
+    except BaseException:
+        if not checkpointed and os.path.exists(temp_output):
+            os.remove(temp_output)
+        raise
+    os.replace(temp_output, output)
+
+    return {
+        "cases": writer.count,
+        "rejected": sorted(rejected),
+        "bytes": writer.bytes_written,
+        "metrics": pipeline.metrics(),
+    }
@@ -8,7 +8,9 @@ Utökad version av ERMS Aggregation med SVK-specifika funktioner och validering.
 from lxml import etree
 from ..core.aggregation import Aggregation  # Ändrat från erms_core till core
 from ..core.utils import add_in_element      # Ändrat från erms_core till core
+from ..core.canonical import invalidates_content_hash
 from ..core import namespaces as ns         # Ändrat från erms_core till core
+from ..core.instrumentation import instrumented
 from .svk_extensions import SVKExtensions
 from .validation import SVKValidator
 from . import value_lists
@@ -36,6 +38,12 @@ class SVKCase(Aggregation):
         if title:
             self.set_title(title)
 
+    def _bind_children(self):
+        """Koppla även SVK-specifika komponenter vid inläsning"""
+        super()._bind_children()
+        self.validator = SVKValidator()
+        self.svk_extensions = SVKExtensions.find_in(self.additional_information)
+
     def set_case_number(self, case_number: str):
         """
         Sätt ärendenummer med SVK-validering.
@@ -115,8 +123,14 @@ class SVKCase(Aggregation):
             self.add_agent("other", closing_person, other_agent_type="closing_person")
 
     def get_svk_extensions(self) -> SVKExtensions:
-        """Hämta eller skapa SVK-tillägg för ärendet"""
+        """
+        Hämta eller skapa SVK-tillägg för ärendet.
+
+        Hashen glöms bara när tilläggen skapas. Ändringar direkt via de
+        returnerade objekten ska följas av invalidate_content_hash().
+        """
         if self.svk_extensions is None:
+            self.invalidate_content_hash()
             self.svk_extensions = SVKExtensions("aggregation")
 
             # Skapa additionalInformation om det inte finns
@@ -130,23 +144,28 @@ class SVKCase(Aggregation):
 
         return self.svk_extensions
 
+    @invalidates_content_hash
     def set_initiative(self, initiative: str):
         """Sätt initiativ (eget/externt)"""
         extensions = self.get_svk_extensions()
         extensions.set_initiative(initiative)
 
+    @invalidates_content_hash
     def add_related_project(self, project_name: str, project_id: str, system_id: str = None):
         """Lägg till relaterat projekt"""
         extensions = self.get_svk_extensions()
         related_objects = extensions.get_related_objects()
         related_objects.add_object("project", project_name, project_id, system_id)
 
+    @invalidates_content_hash
     def add_related_property(self, property_name: str, property_id: str, system_id: str = None):
         """Lägg till relaterad fastighet"""
         extensions = self.get_svk_extensions()
         related_objects = extensions.get_related_objects()
         related_objects.add_object("realEstate", property_name, property_id, system_id)
 
+    @instrumented("extensions.note")
+    @invalidates_content_hash
     def add_svk_note(self, note_type: str, note_text: str, creator_name: str,
                      created_date: str, creator_org: str = None):
         """Lägg till SVK-anteckning"""
@@ -154,6 +173,8 @@ class SVKCase(Aggregation):
         svk_notes = extensions.get_svk_notes()
         svk_notes.add_note(note_type, note_text, creator_name, created_date, creator_org)
 
+    @instrumented("extensions.audit_event")
+    @invalidates_content_hash
     def add_audit_event(self, event_time: str, user: str, scope: str, action: str,
                        value_before: str = None, value_after: str = None):
         """Lägg till händelse i ändringsloggen"""
@@ -161,6 +182,8 @@ class SVKCase(Aggregation):
         audit_log = extensions.get_audit_log()
         audit_log.add_event(event_time, user, scope, action, value_before, value_after)
 
+    @instrumented("build.add_record_svk")
+    @invalidates_content_hash
     def add_record_svk(self, document_number: str = None, title: str = None,
                       record_type: str = "ärendedokument"):
         """
@@ -178,11 +201,44 @@ class SVKCase(Aggregation):
             record.set_document_number(document_number)
         if title:
             record.set_title(title)
+        record._parent = self
 
         # Lägg till i aggregation
         add_in_element(self.element, record.element)
         return record
 
+    def iter_records(self):
+        """
+        Iterera över ärendets handlingar.
+        Wrapper-objekten skapas först när de efterfrågas.
+
+        Yields:
+            SVKRecord: Handling kopplad till befintligt record-element
+        """
+        from .svk_record import SVKRecord
+
+        for element in self.element.iterchildren(ns.ERMS + "record"):
+            record = SVKRecord.from_element(element)
+            record._parent = self
+            yield record
+
+    def get_record(self, document_number: str):
+        """
+        Hämta en handling via dokumentnummer.
+
+        Returns:
+            SVKRecord eller None om handlingen inte finns
+        """
+        from .svk_record import SVKRecord
+
+        for element in self.element.iterchildren(ns.ERMS + "record"):
+            if element.findtext(ns.ERMS + "objectId") == document_number:
+                record = SVKRecord.from_element(element)
+                record._parent = self
+                return record
+        return None
+
+    @instrumented("validate.case")
     def validate(self) -> dict:
         """
         Validera ärendet enligt SVK-regler.
@@ -8,10 +8,18 @@ Utökad version av ERMS med SVK-specifika funktioner och convenience-metoder.
 from datetime import datetime
 from ..core.erms import Erms  # Ändrat från erms_core till core
 from ..core.control import Control  # Ändrat från erms_core till core
+from ..core.parsing import iterparse, is_top_level_aggregation
+from ..core.utils import natural_sort_key
+from ..core.instrumentation import instrumented
+from ..core import namespaces as ns
 from .svk_case import SVKCase
+from .svk_extensions import SVK_ROOT_NSMAP
 from .validation import SVKValidator, validate_complete_erms_document
 from . import value_lists
 
+# Identifikationer som måste vara samma i alla filer som slås ihop
+ARCHIVE_CREATOR_IDENTIFICATIONS = ("arkivbildare", "organisationsnummer", "aid")
+
 
 class SVKErms(Erms):
     """
@@ -19,14 +27,151 @@ class SVKErms(Erms):
     Lägger till SVK-specifik validering och convenience-metoder.
     """
 
-    def __init__(self):
+    def __init__(self, sorted_output: bool = False, hoist_namespaces: bool = False):
+        """
+        Args:
+            sorted_output: Sortera ärenden och handlingar på ärende-/dokumentnummer
+                           vid export så att utdata blir deterministisk
+            hoist_namespaces: Deklarera ERMS- och SVK-namnrymderna en gång på
+                              erms-roten (SVK-element skrivs med prefixet svk:)
+                              i stället för i varje additionalXMLData
+        """
         # Initiera som standard ERMS med aggregations
-        super().__init__(aggr=True)
+        super().__init__(aggr=True, sorted_output=sorted_output,
+                         nsmap=SVK_ROOT_NSMAP if hoist_namespaces else None)
         self.validator = SVKValidator()
 
+        # Ärenden per ärendenummer (element eller SVKCase när det efterfrågats)
+        self._cases = {}
+
         # Sätt upp kontroll-element med SVK-defaults
         self._setup_svk_control()
 
+    @classmethod
+    def load(cls, filename) -> "SVKErms":
+        """
+        Läs in en befintlig ERMS-fil.
+
+        Filen läses med iterparse och den delade parsern. Ärendena indexeras
+        på ärendenummer men SVKCase/SVKRecord-objekt skapas först när de
+        efterfrågas via get_case() eller iter_cases().
+
+        Args:
+            filename: Sökväg eller filobjekt
+
+        Returns:
+            SVKErms: Dokument kopplat till det inlästa trädet
+
+        Raises:
+            ValueError: Om filen inte är ett ERMS-dokument med aggregations
+        """
+        cases = {}
+        context = iterparse(filename, events=("end",), tag=ns.ERMS + "aggregation")
+        for _, element in context:
+            if is_top_level_aggregation(element):
+                case_number = element.findtext(ns.ERMS + "objectId")
+                if case_number:
+                    cases[case_number] = element
+
+        root = context.root
+        if root is None or root.tag != ns.ERMS + "erms":
+            raise ValueError(f"Filen är inte ett ERMS-dokument: {filename}")
+
+        control = root.find(ns.ERMS + "control")
+        aggregations = root.find(ns.ERMS + "aggregations")
+        if control is None or aggregations is None:
+            raise ValueError(f"ERMS-dokumentet saknar control eller aggregations: {filename}")
+
+        erms = cls.__new__(cls)
+        erms.element = root
+        erms.control = Control.from_element(control)
+        erms.aggregations = aggregations
+        erms.records = None
+        erms.sorted_output = False
+        erms.hoist_namespaces = False
+        erms.nsmap = dict(root.nsmap)
+        erms.validator = SVKValidator()
+        erms._cases = cases
+        return erms
+
+    @staticmethod
+    def merge_files(sources, output: str, on_duplicate: str = "error",
+                    pretty_print: bool = True, checkpoint_interval: int = None,
+                    resume: bool = False) -> dict:
+        """
+        Slå ihop flera ERMS-filer (t.ex. en per ärende) till en leverans.
+
+        Filerna strömmas så att bara ett ärende i taget hålls i minnet.
+        Alla filer måste ha samma arkivbildare; ärendenummer i control
+        som skiljer sig mellan filerna tas bort.
+
+        Args:
+            sources: Filer att slå ihop, i given ordning
+            output: Fil att skriva
+            on_duplicate: "error" eller "skip" vid dubblerade ärendenummer
+            pretty_print: Om utdata ska indenteras
+            checkpoint_interval: Antal ärenden mellan kontrollpunkter
+            resume: Fortsätt en avbruten sammanslagning från senaste kontrollpunkt
+
+        Returns:
+            Dict med sammanfattning av sammanslagningen
+        """
+        from ..core.merge import merge_erms_files
+
+        return merge_erms_files(sources, output,
+                                required_identifications=ARCHIVE_CREATOR_IDENTIFICATIONS,
+                                on_duplicate=on_duplicate, pretty_print=pretty_print,
+                                checkpoint_interval=checkpoint_interval, resume=resume)
+
+    def _wrap_case(self, element) -> SVKCase:
+        """Hämta eller skapa SVKCase för ett aggregation-element"""
+        case_number = element.findtext(ns.ERMS + "objectId")
+        entry = self._cases.get(case_number)
+        if isinstance(entry, SVKCase) and entry.element is element:
+            return entry
+
+        case = SVKCase.from_element(element)
+        if case_number:
+            self._cases[case_number] = case
+        return case
+
+    def get_case(self, case_number: str) -> SVKCase:
+        """
+        Hämta ett ärende via ärendenummer.
+
+        Returns:
+            SVKCase eller None om ärendet inte finns
+        """
+        entry = self._cases.get(case_number)
+        if entry is None:
+            return None
+        if isinstance(entry, SVKCase):
+            return entry
+        return self._wrap_case(entry)
+
+    def iter_cases(self):
+        """
+        Iterera över dokumentets ärenden i dokumentordning.
+
+        Yields:
+            SVKCase: Ärende kopplat till befintligt aggregation-element
+        """
+        for element in self.aggregations.iterchildren(ns.ERMS + "aggregation"):
+            yield self._wrap_case(element)
+
+    def sort_aggregations(self, include_records: bool = True):
+        """Sortera ärenden (och handlingar) på ärende-/dokumentnummer"""
+        super().sort_aggregations(include_records)
+        for entry in self._cases.values():
+            if isinstance(entry, SVKCase):
+                entry.invalidate_content_hash()
+        self._cases = dict(sorted(self._cases.items(),
+                                  key=lambda item: natural_sort_key(item[0])))
+
+    def case_numbers(self) -> list:
+        """Lista ärendenummer utan att skapa några SVKCase-objekt"""
+        return list(self._cases)
+
     def _setup_svk_control(self):
         """Konfigurera control-elementet med SVK-specifika inställningar"""
         # Sätt maintenance status till "new" för nya dokument
@@ -89,6 +234,7 @@ class SVKErms(Erms):
 
         self.control.maintenance_information.maintenance_agency.add_agency_name(archive_creator)
 
+    @instrumented("build.add_case")
     def add_case(self, case_number: str, title: str, archive_creator: str = None,
                 org_number: str = None, aid: str = None, **kwargs) -> SVKCase:
         """
@@ -118,9 +264,80 @@ class SVKErms(Erms):
 
         # Lägg till i aggregations
         self.aggregations.append(case.element)
+        self._cases[case_number] = case
+
+        return case
+
+    def insert_cases(self, cases) -> int:
+        """
+        Lägg till färdiga ärenden som byggts utanför dokumentet.
+
+        Ärendena läggs sist i dokumentet i given ordning. Element som hör
+        till ett annat träd flyttas hit.
+
+        Args:
+            cases: SVKCase-objekt
 
+        Returns:
+            int: Antal tillagda ärenden
+
+        Raises:
+            ValueError: Om ett ärendenummer redan finns i dokumentet
+        """
+        cases = list(cases)
+        numbers = [case.object_id.text for case in cases]
+        for number in numbers:
+            if number in self._cases:
+                raise ValueError(f"Ärendenummer '{number}' finns redan i dokumentet")
+        if len(set(numbers)) != len(numbers):
+            duplicate = next(n for n in numbers if numbers.count(n) > 1)
+            raise ValueError(f"Ärendenummer '{duplicate}' förekommer flera gånger")
+
+        self.aggregations.extend(case.element for case in cases)
+        self._cases.update(zip(numbers, cases))
+        return len(cases)
+
+    def remove_case(self, case_number: str) -> SVKCase:
+        """
+        Ta bort ett ärende ur dokumentet.
+
+        Elementet kopplas loss från trädet men kan fortfarande serialiseras,
+        t.ex. för att skrivas strömmande till en fil.
+
+        Returns:
+            SVKCase: Det borttagna ärendet, eller None om det inte finns
+        """
+        case = self.get_case(case_number)
+        if case is None:
+            return None
+        del self._cases[case_number]
+        if case.element.getparent() is self.aggregations:
+            self.aggregations.remove(case.element)
         return case
 
+    def stage_cases(self, store) -> int:
+        """
+        Flytta alla ärenden i dokumentet till ett mellanlager.
+
+        Ärendena serialiseras till lagret och tas bort ur trädet, så att
+        minnesanvändningen begränsas till de ärenden som byggts sedan förra
+        anropet.
+
+        Args:
+            store: StagingStore som dokumentet sätts ihop från
+
+        Returns:
+            int: Antal ärenden som lades till i lagret
+        """
+        if store.get_control() is None and self.control is not None:
+            store.set_control(self.control.element)
+        staged = 0
+        for case_number in list(self._cases):
+            case = self.remove_case(case_number)
+            if store.add(case.element):
+                staged += 1
+        return staged
+
     def create_simple_case(self, case_number: str, title: str, archive_creator: str,
                           org_number: str, opened_date: str = None, closed_date: str = None,
                           status: str = "closed", creator: str = None,
@@ -162,6 +379,7 @@ class SVKErms(Erms):
 
         return case
 
+    @instrumented("validate.document")
     def validate(self, use_schematron: bool = False, schematron_file: str = None) -> dict:
         """
         Validera hela ERMS-dokumentet.
@@ -205,6 +423,46 @@ class SVKErms(Erms):
         # Spara filen
         self.save_to_file(filename)
 
+    async def avalidate(self, use_schematron: bool = False, schematron_file: str = None,
+                        executor=None) -> dict:
+        """
+        Async validate(): validera i executorn utan att blockera event-loopen.
+
+        Args:
+            use_schematron: Om Schematron-validering ska användas
+            schematron_file: Sökväg till Schematron-fil
+            executor: AsyncExecutor (default: den delade executorn)
+
+        Returns:
+            Dict med valideringsresultat
+        """
+        from ..core.aio import get_default_executor  # asyncio laddas bara för async-API:t
+
+        executor = executor or get_default_executor()
+        return await executor.run(self.validate, use_schematron, schematron_file)
+
+    async def asave_with_validation(self, filename: str, validate_before_save: bool = True,
+                                    use_schematron: bool = False, schematron_file: str = None,
+                                    executor=None) -> int:
+        """
+        Async save_with_validation().
+
+        Returns:
+            int: Antal skrivna bytes
+
+        Raises:
+            ValueError: Om validering misslyckas
+        """
+        if validate_before_save:
+            validation_result = await self.avalidate(use_schematron, schematron_file, executor)
+            if not validation_result['valid']:
+                error_msg = f"Validering misslyckades:\n"
+                for error in validation_result['errors']:
+                    error_msg += f"- {error.get('message', str(error))}\n"
+                raise ValueError(error_msg)
+
+        return await self.asave(filename, executor=executor)
+
     def get_statistics(self) -> dict:
         """
         Få statistik om ERMS-dokumentet.
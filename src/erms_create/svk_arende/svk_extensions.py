@@ -9,6 +9,7 @@ Motsvarar elementen definierade i ERMS-SVK-element.xsd
 from lxml import etree
 from ..core.elements import Dates, Agents, Agent  # Ändrat från erms_core till core
 from ..core.utils import validate_value_list      # Ändrat från erms_core till core
+from ..core.namespaces import ERMS, ROOT_NSMAP
 from . import value_lists
 
 # Namespace för SVK-elementen
@@ -16,6 +17,9 @@ SVK_NAMESPACE = "https://xml.svenskakyrkan.se/ERMS-SVK-element"
 SVK = "{%s}" % SVK_NAMESPACE
 SVK_NSMAP = {None: SVK_NAMESPACE}
 
+# Namnrymder på erms-roten när namnrymderna lyfts upp (SVKErms(hoist_namespaces=True))
+SVK_ROOT_NSMAP = {**ROOT_NSMAP, "svk": SVK_NAMESPACE}
+
 
 class RelatedObject:
     """Ett relaterat objekt (projekt, fastighet etc.)"""
@@ -39,6 +43,13 @@ class RelatedObject:
             sys_id_elm = etree.SubElement(self.element, SVK + "deliveringSystemId", nsmap=SVK_NSMAP)
             sys_id_elm.text = delivery_system_id
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "RelatedObject":
+        """Koppla ett RelatedObject till ett befintligt element"""
+        obj = cls.__new__(cls)
+        obj.element = element
+        return obj
+
 
 class RelatedObjects:
     """Container för relaterade objekt"""
@@ -47,6 +58,15 @@ class RelatedObjects:
         self.element = etree.Element(SVK + "relatedObjects", nsmap=SVK_NSMAP)
         self.objects = []
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "RelatedObjects":
+        """Koppla en RelatedObjects-container till ett befintligt element"""
+        container = cls.__new__(cls)
+        container.element = element
+        container.objects = [RelatedObject.from_element(elm)
+                             for elm in element.findall(SVK + "relatedObject")]
+        return container
+
     def add_object(self, object_type: str, object_name: str, object_id: str,
                    delivery_system_id: str = None) -> RelatedObject:
         """Lägg till ett relaterat objekt"""
@@ -79,6 +99,13 @@ class SVKNote:
         dates.add_date(created_date, "created")
         self.element.append(dates.element)
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "SVKNote":
+        """Koppla en SVKNote till ett befintligt element"""
+        note = cls.__new__(cls)
+        note.element = element
+        return note
+
 
 class SVKNotes:
     """Container för SVK-anteckningar"""
@@ -87,6 +114,14 @@ class SVKNotes:
         self.element = etree.Element(SVK + "svkNotes", nsmap=SVK_NSMAP)
         self.notes = []
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "SVKNotes":
+        """Koppla en SVKNotes-container till ett befintligt element"""
+        container = cls.__new__(cls)
+        container.element = element
+        container.notes = [SVKNote.from_element(elm) for elm in element.findall(SVK + "svkNote")]
+        return container
+
     def add_note(self, note_type: str, note_text: str, creator_name: str,
                  created_date: str, creator_org: str = None) -> SVKNote:
         """Lägg till en anteckning"""
@@ -128,6 +163,13 @@ class AuditLogEvent:
             after_elm = etree.SubElement(self.element, SVK + "valueAfterChange", nsmap=SVK_NSMAP)
             after_elm.text = value_after
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "AuditLogEvent":
+        """Koppla en AuditLogEvent till ett befintligt element"""
+        event = cls.__new__(cls)
+        event.element = element
+        return event
+
 
 class AuditLogEvents:
     """Container för ändringslogg"""
@@ -136,6 +178,15 @@ class AuditLogEvents:
         self.element = etree.Element(SVK + "auditLogEvents", nsmap=SVK_NSMAP)
         self.events = []
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "AuditLogEvents":
+        """Koppla en AuditLogEvents-container till ett befintligt element"""
+        container = cls.__new__(cls)
+        container.element = element
+        container.events = [AuditLogEvent.from_element(elm)
+                            for elm in element.findall(SVK + "auditLogEvent")]
+        return container
+
     def add_event(self, event_time: str, user: str, scope: str, action: str,
                   value_before: str = None, value_after: str = None) -> AuditLogEvent:
         """Lägg till en händelse i ändringsloggen"""
@@ -152,6 +203,15 @@ class ContractInfo:
         self.element = etree.Element(SVK + "contractInfo", nsmap=SVK_NSMAP)
         self.dates = None
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> "ContractInfo":
+        """Koppla en ContractInfo till ett befintligt element"""
+        info = cls.__new__(cls)
+        info.element = element
+        dates = element.find(ERMS + "dates")
+        info.dates = Dates.from_element(dates) if dates is not None else None
+        return info
+
     def set_external_reference(self, reference: str):
         """Sätt avsändares referens"""
         ref_elm = etree.SubElement(self.element, SVK + "externalReference", nsmap=SVK_NSMAP)
@@ -215,6 +275,46 @@ class SVKExtensions:
         self.audit_log = None
         self.contract_info = None
 
+    @classmethod
+    def from_element(cls, root_element: etree._Element) -> "SVKExtensions":
+        """
+        Koppla SVK-tillägg till ett befintligt ermsSvkArende-element.
+        Används vid inläsning av befintliga dokument.
+        """
+        extensions = cls.__new__(cls)
+        extensions.root_element = root_element
+
+        element = root_element.find(SVK + "ermsSvkAggregation")
+        if element is not None:
+            extensions.extension_type = "aggregation"
+        else:
+            element = root_element.find(SVK + "ermsSvkRecord")
+            extensions.extension_type = "record"
+        extensions.element = element
+
+        def bind(tag, wrapper):
+            elm = element.find(SVK + tag) if element is not None else None
+            return wrapper.from_element(elm) if elm is not None else None
+
+        extensions.related_objects = bind("relatedObjects", RelatedObjects)
+        extensions.svk_notes = bind("svkNotes", SVKNotes)
+        extensions.audit_log = bind("auditLogEvents", AuditLogEvents)
+        extensions.contract_info = bind("contractInfo", ContractInfo)
+        return extensions
+
+    @classmethod
+    def find_in(cls, additional_information: etree._Element) -> "SVKExtensions":
+        """
+        Leta upp SVK-tillägg i ett additionalInformation-element.
+
+        Returns:
+            SVKExtensions eller None om inga SVK-tillägg finns
+        """
+        if additional_information is None:
+            return None
+        root_element = additional_information.find(ERMS + "additionalXMLData/" + SVK + "ermsSvkArende")
+        return cls.from_element(root_element) if root_element is not None else None
+
     def set_initiative(self, initiative: str):
         """Sätt initiativ (endast för aggregation)"""
         if self.extension_type != "aggregation":
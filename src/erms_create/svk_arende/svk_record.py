@@ -8,7 +8,9 @@ Utökad version av ERMS Record med SVK-specifika funktioner.
 from lxml import etree
 from ..core.record import Record              # Ändrat från erms_core till core
 from ..core.utils import add_in_element       # Ändrat från erms_core till core
+from ..core.canonical import invalidates_content_hash
 from ..core import namespaces as ns          # Ändrat från erms_core till core
+from ..core.instrumentation import instrumented
 from .svk_extensions import SVKExtensions
 from .validation import SVKValidator
 from . import value_lists
@@ -37,6 +39,13 @@ class SVKRecord(Record):
         # SVK-specifika element
         self.direction = None
 
+    def _bind_children(self):
+        """Koppla även SVK-specifika komponenter vid inläsning"""
+        super()._bind_children()
+        self.validator = SVKValidator()
+        self.svk_extensions = SVKExtensions.find_in(self.additional_information)
+        self.direction = self.element.find(ns.ERMS + "direction")
+
     def set_document_number(self, document_number: str):
         """
         Sätt dokumentnummer med SVK-validering.
@@ -54,6 +63,7 @@ class SVKRecord(Record):
 
         self.set_status(status)
 
+    @invalidates_content_hash
     def set_direction(self, direction: str, other_direction: str = None):
         """
         Sätt riktning för handlingen.
@@ -115,8 +125,14 @@ class SVKRecord(Record):
             self.add_agent("receiver", receiver)
 
     def get_svk_extensions(self) -> SVKExtensions:
-        """Hämta eller skapa SVK-tillägg för handlingen"""
+        """
+        Hämta eller skapa SVK-tillägg för handlingen.
+
+        Hashen glöms bara när tilläggen skapas. Ändringar direkt via de
+        returnerade objekten ska följas av invalidate_content_hash().
+        """
         if self.svk_extensions is None:
+            self.invalidate_content_hash()
             self.svk_extensions = SVKExtensions("record")
 
             # Skapa additionalInformation om det inte finns
@@ -130,6 +146,8 @@ class SVKRecord(Record):
 
         return self.svk_extensions
 
+    @instrumented("extensions.note")
+    @invalidates_content_hash
     def add_svk_note(self, note_type: str, note_text: str, creator_name: str,
                      created_date: str, creator_org: str = None):
         """Lägg till SVK-anteckning"""
@@ -137,6 +155,8 @@ class SVKRecord(Record):
         svk_notes = extensions.get_svk_notes()
         svk_notes.add_note(note_type, note_text, creator_name, created_date, creator_org)
 
+    @instrumented("extensions.contract_info")
+    @invalidates_content_hash
     def add_contract_info(self, agreement_type: str, external_ref: str = None,
                          call_off_value: int = None, contract_value: int = None,
                          start_date: str = None, end_date: str = None):
@@ -157,6 +177,8 @@ class SVKRecord(Record):
         if end_date:
             contract_info.add_date(end_date, "end")
 
+    @instrumented("extensions.appendix")
+    @invalidates_content_hash
     def add_svk_appendix(self, name: str, path: str, file_format: str,
                         description: str = None, version_number: int = None,
                         variant: str = "preservation"):
@@ -198,6 +220,7 @@ class SVKRecord(Record):
                 variant_elm = etree.SubElement(file_info, "variant")
                 variant_elm.text = variant
 
+    @instrumented("validate.record")
     def validate(self) -> dict:
         """
         Validera handlingen enligt SVK-regler.
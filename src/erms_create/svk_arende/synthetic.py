@@ -0,0 +1,399 @@
+"""
+Syntetiska leveranser
+=====================
+
+Seedad generator för realistiska SVK-leveranser till last- och
+uthållighetstester, så att skalproblem kan återskapas lokalt utan
+produktionsdata.
+
+Generatorn tar fram ärendebeskrivningar ("specs"): vanliga dictar med
+JSON-kompatibla värden som följer SVK:s format för ärende- och
+dokumentnummer och bara använder värden ur value_lists. Samma seed och
+samma profil ger alltid samma ärenden, i samma ordning.
+
+Antal per ärende eller handling anges som:
+- ett heltal (alltid så många)
+- (min, max) för likformig fördelning
+- (min, max, typvärde) för triangelfördelning, t.ex. många små ärenden
+  och några få stora
+
+Usage:
+    generator = SyntheticDelivery(seed=42, records_per_case=(0, 200, 3))
+
+    erms = generator.document(10000)                 # SVKErms i minnet
+    generator.write_delivery("leverans.xml", 10**6)  # strömmande, konstant minne
+
+    # Som källa till andra byggare, t.ex. export_cases
+    export_cases(generator.iter_specs(10**5), build_case, "leverans.xml",
+                 "Sunne pastorat", org_number="2520001234")
+"""
+
+import itertools
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+from ..core.checkpoint import CheckpointWriter, DEFAULT_CHECKPOINT_INTERVAL
+from ..core.streaming import ErmsStreamWriter
+from . import value_lists
+from .svk_case import SVKCase
+from .svk_erms import SVKErms
+
+# Standardprofil; alla värden kan ersättas med nyckelordsargument
+DEFAULT_PROFILE = {
+    "archive_creator": "Sunne pastorat",
+    "org_number": "2520001234",
+    "diary_codes": ("F", "P", "E", "K"),
+    "years": (2010, 2024),
+    "records_per_case": (0, 40, 3),
+    "counterparts_per_case": (0, 3, 1),
+    "notes_per_case": (0, 3, 0),
+    "notes_per_record": (0, 2, 0),
+    "audit_events_per_case": (0, 8, 1),
+    "appendices_per_record": (0, 3, 1),
+    "record_types": {
+        "ärendedokument": 70,
+        "avtalsdokument": 10,
+        "personalaktsdokument": 5,
+        "projektdokument": 8,
+        "bild": 3,
+        "video": 1,
+        "fil": 3,
+    },
+    "obliterated_share": 0.02,
+    "closing_person_share": 0.5,
+    "initiative_share": 0.6,
+}
+
+_FIRST_NAMES = ("Anna", "Per", "Maria", "Erik", "Karin", "Lars", "Eva", "Johan", "Sara",
+                "Anders", "Lena", "Mikael", "Ingrid", "Nils", "Emma", "Olof")
+_LAST_NAMES = ("Andersson", "Johansson", "Karlsson", "Nilsson", "Eriksson", "Larsson",
+               "Olsson", "Persson", "Svensson", "Gustafsson", "Lindberg", "Holm")
+_ORGANISATIONS = ("Sunne kommun", "Länsstyrelsen i Värmlands län", "Skatteverket",
+                  "Riksantikvarieämbetet", "Byggfirman AB", "Fastighetsbolaget AB",
+                  "Karlstads stift", "Försäkringskassan", "Orgelbyggarna HB")
+_SUBJECTS = ("Renovering av kyrkorummet", "Avtal om lokalvård", "Anställning av kantor",
+             "Begravningsplatsens underhåll", "Projekt församlingshem", "Ansökan om bidrag",
+             "Inköp av inventarier", "Tillstånd för ändring", "Uthyrning av lokal",
+             "Klagomål på kyrkogårdsskötsel", "Arrende av mark", "Skötsel av orgel")
+_DOCUMENTS = ("Ansökan", "Beslut", "Protokoll", "Skrivelse", "Avtal", "Offert", "Faktura",
+              "Tjänsteanteckning", "Ritning", "Fotografi", "Yttrande", "Kvitto")
+_FILE_FORMATS = ("pdf", "docx", "xlsx", "jpg", "png", "mp4", "txt")
+_DIRECTIONS = ("incoming", "outgoing", "other")
+_NUMBERS_PER_YEAR = 9999
+
+# Profilvärden som anger fördelningar av antal
+_COUNTS = ("records_per_case", "counterparts_per_case", "notes_per_case", "notes_per_record",
+           "audit_events_per_case", "appendices_per_record")
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class SyntheticDelivery:
+    """
+    Seedad generator av SVK-ärenden.
+
+    Args:
+        seed: Seed för slumptalsgeneratorn
+        **profile: Värden som ersätter DEFAULT_PROFILE
+
+    Raises:
+        ValueError: Om profilen har okända nycklar eller ogiltiga värden
+    """
+
+    def __init__(self, seed: int = 0, **profile):
+        unknown = set(profile) - set(DEFAULT_PROFILE)
+        if unknown:
+            raise ValueError(f"Okända profilvärden: {', '.join(sorted(unknown))}. "
+                             f"Giltiga: {', '.join(DEFAULT_PROFILE)}")
+        self.seed = seed
+        self.profile = {**DEFAULT_PROFILE, **profile}
+
+        for name in _COUNTS:
+            value = self.profile[name]
+            if not isinstance(value, int) and (
+                    not isinstance(value, (tuple, list)) or len(value) not in (2, 3)
+                    or min(value) < 0 or value[0] > value[1]):
+                raise ValueError(f"Ogiltig fördelning för {name}: {value!r}. Ange ett "
+                                 f"heltal, (min, max) eller (min, max, typvärde)")
+
+        record_types = self.profile["record_types"]
+        for record_type in record_types:
+            if record_type not in value_lists.RECORD_TYPE_SVK:
+                raise ValueError(f"Ogiltig handlingstyp: {record_type}")
+        self._record_types = list(record_types)
+        self._record_weights = [record_types[name] for name in self._record_types]
+
+        first, last = self.profile["years"]
+        if first > last:
+            raise ValueError(f"Ogiltigt årsintervall: {first}-{last}")
+        self._years = list(range(first, last + 1))
+        self._codes = list(self.profile["diary_codes"])
+
+    def _count(self, rng: random.Random, name: str) -> int:
+        """Antal enligt profilens fördelning"""
+        spec = self.profile[name]
+        if isinstance(spec, int):
+            return spec
+        if len(spec) == 2:
+            return rng.randint(*spec)
+        low, high, mode = spec
+        return min(high, int(rng.triangular(low, high + 1, mode)))
+
+    def _person(self, rng: random.Random) -> str:
+        return f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+
+    def _case_number(self, rng: random.Random, used: Dict[tuple, int]) -> tuple:
+        """Unikt ärendenummer; ett annat år eller en annan kod väljs när ett år är fullt"""
+        key = (rng.choice(self._codes), rng.choice(self._years))
+        if used.get(key, 0) >= _NUMBERS_PER_YEAR:
+            free = [(code, year) for code in self._codes for year in self._years
+                    if used.get((code, year), 0) < _NUMBERS_PER_YEAR]
+            if not free:
+                raise ValueError("Inga lediga ärendenummer kvar för profilens "
+                                 "diariekoder och år")
+            key = free[0]
+        used[key] = used.get(key, 0) + 1
+        code, year = key
+        return f"{code} {year}-{used[key]:04d}", year
+
+    def _note(self, rng: random.Random, after: datetime) -> dict:
+        return {
+            "note_type": rng.choice(value_lists.NOTE_TYPE),
+            "note_text": f"{rng.choice(_DOCUMENTS)} diskuterad med {self._person(rng)}",
+            "creator_name": self._person(rng),
+            "created_date": (after + timedelta(days=rng.randint(0, 30))).date().isoformat(),
+        }
+
+    def _record(self, rng: random.Random, case_number: str, index: int,
+                opened: datetime, closed: datetime, status: str) -> dict:
+        record_type = rng.choices(self._record_types, self._record_weights)[0]
+        created = opened + (closed - opened) * rng.random()
+        direction = rng.choice(_DIRECTIONS)
+        record = {
+            "document_number": f"{case_number}:{index}",
+            "title": f"{rng.choice(_DOCUMENTS)} {index}",
+            "record_type": record_type,
+            "status": status,
+            "direction": direction,
+            "created": _timestamp(created),
+            "originated": _timestamp(created + timedelta(hours=rng.randint(0, 48))),
+            "agents": {"creator": self._person(rng)},
+        }
+        if direction == "incoming":
+            record["received"] = _timestamp(created)
+            record["agents"]["sender"] = rng.choice(_ORGANISATIONS)
+        elif direction == "outgoing":
+            record["expedited"] = _timestamp(created + timedelta(days=rng.randint(0, 5)))
+            record["agents"]["receiver"] = rng.choice(_ORGANISATIONS)
+
+        record["notes"] = [self._note(rng, created)
+                           for _ in range(self._count(rng, "notes_per_record"))]
+
+        if record_type == "avtalsdokument":
+            start = created.date() + timedelta(days=rng.randint(0, 60))
+            record["contract"] = {
+                "agreement_type": rng.choice(value_lists.AGREEMENT_TYPE),
+                "external_ref": f"AVT-{rng.randint(1000, 99999)}",
+                "contract_value": rng.randint(1, 500) * 1000,
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=365 * rng.randint(1, 5))).isoformat(),
+            }
+
+        stem = record["title"].lower().replace(" ", "_")
+        appendices = []
+        for number in range(1, self._count(rng, "appendices_per_record") + 1):
+            file_format = rng.choice(_FILE_FORMATS)
+            appendices.append({
+                "name": f"{stem}_{number}.{file_format}",
+                "path": f"filer/{case_number.replace(' ', '_')}/{index}/{number}.{file_format}",
+                "file_format": file_format,
+                "version_number": rng.randint(1, 3),
+                "variant": rng.choice(value_lists.FILE_VARIANT),
+            })
+        record["appendices"] = appendices
+        return record
+
+    def iter_specs(self, count: int) -> Iterator[Dict[str, Any]]:
+        """
+        Generera ärendebeskrivningar.
+
+        Args:
+            count: Antal ärenden
+
+        Yields:
+            dict: Ett ärende med handlingar, aktörer, anteckningar och ändringslogg.
+                  Används med build_case() eller som källdata till andra byggare.
+        """
+        rng = random.Random(self.seed)
+        used = {}
+        profile = self.profile
+        for _ in range(count):
+            case_number, year = self._case_number(rng, used)
+            opened = datetime(year, 1, 1) + timedelta(seconds=rng.randint(0, 364 * 86400))
+            closed = opened + timedelta(days=rng.randint(1, 400), hours=rng.randint(0, 23))
+            status = "obliterated" if rng.random() < profile["obliterated_share"] else "closed"
+
+            agents = {"creator": self._person(rng), "responsible_person": self._person(rng)}
+            counterparts = [
+                {"name": rng.choice(_ORGANISATIONS),
+                 "id_number": f"{rng.randint(0, 10**10 - 1):010d}",
+                 "id_type": "organisationsnummer"}
+                for _ in range(self._count(rng, "counterparts_per_case"))]
+            if counterparts:
+                agents["counterparts"] = counterparts
+            if rng.random() < profile["closing_person_share"]:
+                agents["closing_person"] = self._person(rng)
+
+            spec = {
+                "case_number": case_number,
+                "title": rng.choice(_SUBJECTS),
+                "archive_creator": profile["archive_creator"],
+                "org_number": profile["org_number"],
+                "status": status,
+                "opened": _timestamp(opened),
+                "closed": _timestamp(closed),
+                "agents": agents,
+            }
+            if rng.random() < profile["initiative_share"]:
+                spec["initiative"] = rng.choice(value_lists.INITIATIVE)
+            spec["notes"] = [self._note(rng, opened)
+                             for _ in range(self._count(rng, "notes_per_case"))]
+            audit = []
+            for _ in range(self._count(rng, "audit_events_per_case")):
+                event_time = opened + (closed - opened) * rng.random()
+                action = rng.choice(value_lists.AUDIT_ACTION)
+                event = {"event_time": _timestamp(event_time), "user": self._person(rng),
+                         "scope": rng.choice(value_lists.AUDIT_SCOPE), "action": action}
+                if action == "update":
+                    event["value_before"] = self._person(rng)
+                    event["value_after"] = self._person(rng)
+                audit.append(event)
+            spec["audit_events"] = sorted(audit, key=lambda event: event["event_time"])
+            spec["records"] = [self._record(rng, case_number, index, opened, closed, status)
+                               for index in range(1, self._count(rng, "records_per_case") + 1)]
+            yield spec
+
+    def document(self, count: int, **kwargs) -> SVKErms:
+        """
+        Bygg ett SVKErms-dokument med count ärenden.
+
+        Args:
+            count: Antal ärenden
+            **kwargs: Skickas till SVKErms (t.ex. sorted_output)
+        """
+        erms = SVKErms(**kwargs)
+        erms.setup_control_info(self.profile["archive_creator"], self.profile["org_number"])
+        for spec in self.iter_specs(count):
+            build_case(erms, spec)
+        return erms
+
+    def write_delivery(self, output, count: int, pretty_print: bool = True,
+                       checkpoint_interval: int = None, resume: bool = False) -> int:
+        """
+        Bygg och skriv count ärenden strömmande, ett ärende i minnet åt gången.
+
+        Med checkpoint_interval sparas en kontrollpunkt var
+        checkpoint_interval:e ärende, och med resume fortsätter en avbruten
+        körning efter den senaste. Eftersom generatorn är seedad blir
+        resultatet detsamma som för en körning utan avbrott.
+
+        Args:
+            output: Filnamn eller binärt filobjekt (filnamn med kontrollpunkter)
+            count: Antal ärenden
+            pretty_print: Om utdata ska indenteras
+            checkpoint_interval: Antal ärenden mellan kontrollpunkter
+            resume: Fortsätt från den senaste kontrollpunkten för output
+
+        Returns:
+            int: Antal skrivna ärenden
+
+        Raises:
+            ValueError: Om resume anges utan en kontrollpunkt för samma seed,
+                        profil och antal
+        """
+        erms = SVKErms()
+        erms.setup_control_info(self.profile["archive_creator"], self.profile["org_number"])
+        checkpointed = resume or checkpoint_interval is not None
+        if checkpointed:
+            writer = CheckpointWriter(
+                output, erms.control.element, pretty_print=pretty_print,
+                checkpoint_interval=checkpoint_interval or DEFAULT_CHECKPOINT_INTERVAL,
+                resume=resume, metadata={"seed": self.seed, "profile": self.profile,
+                                         "count": count})
+        else:
+            writer = ErmsStreamWriter(output, erms.control.element, pretty_print=pretty_print)
+
+        with writer:
+            start = writer.input_position if checkpointed else 0
+            for spec in itertools.islice(self.iter_specs(count), start, None):
+                case = build_case(erms, spec)
+                erms.remove_case(spec["case_number"])
+                writer.write_aggregation(case.element)
+                if checkpointed:
+                    writer.advance()
+            return writer.count
+
+
+def build_case(erms: SVKErms, spec: Dict[str, Any]) -> SVKCase:
+    """
+    Bygg ett ärende från en spec från SyntheticDelivery.iter_specs().
+
+    Signaturen passar som build_case till export_cases().
+
+    Args:
+        erms: Dokument att lägga ärendet i
+        spec: Ärendebeskrivning
+
+    Returns:
+        SVKCase: Det byggda ärendet
+    """
+    case = erms.add_case(spec["case_number"], spec["title"], spec["archive_creator"],
+                         spec["org_number"])
+    case.set_status_svk(spec["status"])
+    case.add_case_agents(**spec["agents"])
+    case.add_required_dates(spec["opened"], spec["closed"])
+    if "initiative" in spec:
+        case.set_initiative(spec["initiative"])
+    for note in spec.get("notes", ()):
+        case.add_svk_note(**note)
+    for event in spec.get("audit_events", ()):
+        case.add_audit_event(**event)
+
+    for item in spec.get("records", ()):
+        record = case.add_record_svk(item["document_number"], item["title"], item["record_type"])
+        record.set_status_svk(item["status"])
+        if item["direction"] == "other":
+            record.set_direction("other", "internal")
+        else:
+            record.set_direction(item["direction"])
+        record.add_required_dates(item["created"], item["originated"],
+                                  item.get("received"), item.get("expedited"))
+        record.add_document_agents(**item["agents"])
+        for note in item.get("notes", ()):
+            record.add_svk_note(**note)
+        if "contract" in item:
+            record.add_contract_info(**item["contract"])
+        for appendix in item.get("appendices", ()):
+            record.add_svk_appendix(**appendix)
+    return case
+
+
+def generate_document(count: int, seed: int = 0, **profile) -> SVKErms:
+    """Bygg ett syntetiskt SVKErms-dokument; se SyntheticDelivery"""
+    return SyntheticDelivery(seed, **profile).document(count)
+
+
+def spec_sizes(specs: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Totalt antal ärenden, handlingar, anteckningar, händelser, avtal och bilagor"""
+    records = [record for spec in specs for record in spec["records"]]
+    return {
+        "cases": len(specs),
+        "records": len(records),
+        "notes": sum(len(spec["notes"]) for spec in specs)
+                 + sum(len(record["notes"]) for record in records),
+        "audit_events": sum(len(spec["audit_events"]) for spec in specs),
+        "contracts": sum("contract" in record for record in records),
+        "appendices": sum(len(record["appendices"]) for record in records),
+    }
@@ -0,0 +1,66 @@
+"""
+ERMS Validate command
+=====================
+
+Entry point of the erms-validate command. The validation modules (and
+lxml) are imported when a file is validated, not when the command starts.
+
+Usage:
+    erms-validate leverans.xml
+    erms-validate arende-*.xml --schematron regler.sch
+"""
+
+import argparse
+import json
+import sys
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser"""
+    parser = argparse.ArgumentParser(prog="erms-validate",
+                                     description="Validate ERMS SVK deliveries")
+    parser.add_argument("files", nargs="+", help="ERMS files to validate")
+    parser.add_argument("--schematron", help="Also validate against a Schematron file")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    return parser
+
+
+def validate_file(filename: str, schematron_file: str = None) -> dict:
+    """
+    Validate one ERMS file.
+
+    Returns:
+        dict: Result of validate_complete_erms_document()
+    """
+    from .svk_arende.validation import validate_complete_erms_document
+
+    with open(filename, encoding="utf-8") as f:
+        xml_content = f.read()
+    return validate_complete_erms_document(xml_content, bool(schematron_file), schematron_file)
+
+
+def main(argv=None) -> int:
+    """Entry point for the erms-validate command; returns 1 if any file is invalid"""
+    args = build_parser().parse_args(argv)
+    results = {}
+    for filename in args.files:
+        try:
+            results[filename] = validate_file(filename, args.schematron)
+        except (OSError, ValueError) as e:
+            results[filename] = {"valid": False, "errors": [str(e)], "warnings": []}
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2, default=str))
+    else:
+        for filename, result in results.items():
+            print(f"{filename}: {'valid' if result['valid'] else 'invalid'}")
+            for error in result["errors"]:
+                message = error.get("message", str(error)) if isinstance(error, dict) else error
+                print(f"  error: {message}")
+            for warning in result.get("warnings", ()):
+                print(f"  warning: {warning}")
+    return 0 if all(result["valid"] for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
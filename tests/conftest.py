@@ -0,0 +1,56 @@
+"""
+Gemensamma fixturer för testerna
+================================
+"""
+
+import re
+
+import pytest
+
+from erms_create import SVKErms
+
+# Värden som genereras på nytt vid varje bygge (uuid4 och tidsstämplar)
+_VOLATILE = re.compile(rb'systemIdentifier="[^"]*"|<eventDateTime>[^<]*')
+
+
+def _case_file(directory, number, archive_creator="Sunne pastorat"):
+    erms = SVKErms()
+    erms.create_simple_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                            archive_creator, "1234567890",
+                            opened_date="2024-01-01T00:00:00",
+                            closed_date="2024-02-01T00:00:00")
+    filename = str(directory / f"arende-{number}.xml")
+    erms.save_to_file(filename)
+    return filename
+
+
+def _build_case(erms, source):
+    case = erms.create_simple_case(source["case_number"], source["title"],
+                                   "Sunne pastorat", "1234567890",
+                                   opened_date="2024-01-01T00:00:00",
+                                   closed_date="2024-02-01T00:00:00")
+    if "status" in source:
+        # Felaktig status från källsystemet, upptäcks först vid validering
+        case.status.set("value", source["status"])
+    # Samma systemIdentifier vid varje bygge, så att utdata kan jämföras byte för byte
+    for number, element in enumerate(case.element.iter("{*}aggregation", "{*}record")):
+        element.set("systemIdentifier", f"{source['case_number']}/{number}")
+    return case
+
+
+@pytest.fixture
+def case_file():
+    """Funktion (katalog, nummer, arkivbildare) -> fil med ett ärende"""
+    return _case_file
+
+
+@pytest.fixture
+def build_case():
+    """Funktion (erms, källrad) -> ärende, för export_cases och IncrementalExporter"""
+    return _build_case
+
+
+@pytest.fixture
+def strip_volatile():
+    """Funktion som tar bort värden som skiljer mellan byggen ur serialiserad XML"""
+    return lambda data: _VOLATILE.sub(b"", data)
@@ -0,0 +1,58 @@
+"""
+Tester för asynkron export och validering
+=========================================
+"""
+
+import asyncio
+
+from erms_create import SVKErms
+from erms_create.core.aio import AsyncExecutor, export_documents
+
+
+def _document(number):
+    erms = SVKErms()
+    erms.create_simple_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                            "Sunne pastorat", "1234567890",
+                            opened_date="2024-01-01T00:00:00",
+                            closed_date="2024-02-01T00:00:00")
+    return erms
+
+
+def test_asave_equals_save_to_file(tmp_path):
+    """asave() ska skriva samma fil som save_to_file()"""
+    erms = _document(1)
+    erms.save_to_file(str(tmp_path / "synkron.xml"))
+
+    async def main():
+        async with AsyncExecutor(max_workers=2) as executor:
+            report = await erms.avalidate(executor=executor)
+            size = await erms.asave(str(tmp_path / "asynkron.xml"), executor=executor)
+        return report, size
+
+    report, size = asyncio.run(main())
+    assert report["valid"]
+    expected = (tmp_path / "synkron.xml").read_bytes()
+    assert (tmp_path / "asynkron.xml").read_bytes() == expected
+    assert size == len(expected)
+
+
+def test_export_documents_concurrently(tmp_path):
+    """Många dokument ska kunna exporteras med begränsad samtidighet"""
+    jobs = [(_document(number), str(tmp_path / f"arende-{number}.xml"))
+            for number in range(1, 21)]
+    jobs.append((_document(21), str(tmp_path / "saknas" / "arende-21.xml")))
+
+    async def main():
+        async with AsyncExecutor(max_workers=3) as executor:
+            return [result async for result in
+                    export_documents(jobs, executor=executor, max_concurrency=4)]
+
+    results = asyncio.run(main())
+    assert len(results) == 21
+    failed = [result for result in results if "error" in result]
+    assert [result["filename"] for result in failed] == [jobs[-1][1]]
+    assert all(result["valid"] and result["bytes"] > 0
+               for result in results if "error" not in result)
+
+    loaded = SVKErms.load(str(tmp_path / "arende-7.xml"))
+    assert loaded.case_numbers() == ["F 2024-0007"]
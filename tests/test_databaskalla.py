@@ -0,0 +1,138 @@
+"""
+Tester för databaskällan
+========================
+"""
+
+import sqlite3
+import threading
+
+from erms_create import SVKErms
+from erms_create.svk_arende.dbsource import ConnectionPool, DatabaseSource
+
+CASE_QUERY = "SELECT arendenr AS case_number, rubrik AS title FROM arenden ORDER BY arendenr"
+DETAILS = {
+    "records": ("SELECT arendenr, dokumentnr, titel FROM handlingar "
+                "WHERE arendenr IN ({ids}) ORDER BY dokumentnr", "arendenr"),
+    "agents": ("SELECT arendenr, typ, namn FROM aktorer WHERE arendenr IN ({ids})", "arendenr"),
+}
+
+
+def _database(path, count=10):
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE arenden (arendenr TEXT PRIMARY KEY, rubrik TEXT);
+        CREATE TABLE handlingar (arendenr TEXT, dokumentnr TEXT, titel TEXT);
+        CREATE TABLE aktorer (arendenr TEXT, typ TEXT, namn TEXT);
+    """)
+    for number in range(1, count + 1):
+        case_number = f"F 2024-{number:04d}"
+        connection.execute("INSERT INTO arenden VALUES (?, ?)", (case_number, f"Ärende {number}"))
+        for document in range(1, number % 3 + 1):
+            connection.execute("INSERT INTO handlingar VALUES (?, ?, ?)",
+                               (case_number, f"{case_number}:{document}", f"Handling {document}"))
+        connection.execute("INSERT INTO aktorer VALUES (?, 'responsible_person', 'Anna')",
+                           (case_number,))
+    connection.commit()
+    connection.close()
+
+
+def test_batched_detail_queries(tmp_path):
+    """Detaljrader ska hämtas med en fråga per sats och tabell"""
+    path = str(tmp_path / "arenden.db")
+    _database(path)
+    statements = []
+
+    def connect():
+        connection = sqlite3.connect(path)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    with ConnectionPool(connect, size=2) as pool:
+        source = DatabaseSource(pool, CASE_QUERY, DETAILS, batch_size=4)
+        cases = list(source)
+
+    assert [case["case_number"] for case in cases] == [f"F 2024-{n:04d}" for n in range(1, 11)]
+    assert [record["dokumentnr"] for record in cases[1]["records"]] == \
+        ["F 2024-0002:1", "F 2024-0002:2"]
+    assert cases[2]["records"] == []
+    assert cases[0]["agents"] == [{"arendenr": "F 2024-0001", "typ": "responsible_person",
+                                   "namn": "Anna"}]
+    # En ärendefråga och två detaljfrågor för var och en av de tre satserna
+    selects = [statement for statement in statements if statement.startswith("SELECT")]
+    assert len(selects) == 1 + 3 * 2
+
+
+def test_parallel_sources_share_pool(tmp_path):
+    """Flera trådar ska kunna läsa från samma pool och bygga ärenden"""
+    path = str(tmp_path / "arenden.db")
+    _database(path, count=20)
+    pool = ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), size=4)
+    results = {}
+
+    def read(name, query, parameters):
+        erms = SVKErms()
+        source = DatabaseSource(pool, query, DETAILS, parameters=parameters, batch_size=3)
+        for case in source:
+            built = erms.add_case(case["case_number"], case["title"],
+                                  "Sunne pastorat", "1234567890")
+            for record in case["records"]:
+                built.add_record_svk(record["dokumentnr"], record["titel"])
+        results[name] = erms.case_numbers()
+
+    query = ("SELECT arendenr AS case_number, rubrik AS title FROM arenden "
+             "WHERE arendenr {} ? ORDER BY arendenr")
+    threads = [threading.Thread(target=read, args=("a", query.format("<"), ("F 2024-0011",))),
+               threading.Thread(target=read, args=("b", query.format(">="), ("F 2024-0011",)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.close()
+
+    assert len(results["a"]) == 10 and len(results["b"]) == 10
+    assert results["b"][0] == "F 2024-0011"
+
+
+def test_detail_query_with_braces(tmp_path):
+    """Bara {ids} ska ersättas; andra klamrar i frågan ska lämnas orörda"""
+    path = str(tmp_path / "arenden.db")
+    _database(path, count=3)
+    details = {"agents": ("SELECT arendenr, '{\"roll\": 1}' AS extra FROM aktorer "
+                          "WHERE arendenr IN ({ids})", "arendenr")}
+
+    with ConnectionPool(lambda: sqlite3.connect(path), size=1) as pool:
+        cases = list(DatabaseSource(pool, CASE_QUERY, details))
+
+    assert cases[0]["agents"] == [{"arendenr": "F 2024-0001", "extra": '{"roll": 1}'}]
+
+
+def test_concurrent_sources_with_small_pool(tmp_path):
+    """Två källor som läses samtidigt ur en pool med två anslutningar ska inte låsa sig"""
+    path = str(tmp_path / "arenden.db")
+    _database(path, count=12)
+    pool = ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), size=2)
+    both_have_case_connection = threading.Barrier(2)
+    results = {}
+
+    def cursor_factory(connection):
+        # Före rättningen höll båda källorna här en anslutning var
+        try:
+            both_have_case_connection.wait(timeout=0.5)
+        except threading.BrokenBarrierError:
+            pass
+        return connection.cursor()
+
+    def read(name):
+        source = DatabaseSource(pool, CASE_QUERY, DETAILS, batch_size=5,
+                                cursor_factory=cursor_factory)
+        results[name] = [case["case_number"] for case in source]
+
+    threads = [threading.Thread(target=read, args=(name,), daemon=True) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    pool.close()
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert results["a"] == results["b"] == [f"F 2024-{n:04d}" for n in range(1, 13)]
@@ -0,0 +1,136 @@
+"""
+Tester för direktskrivning utan lxml-träd
+=========================================
+
+Direktskrivningen ska ge exakt samma bytes som lxml-backenden.
+"""
+
+import io
+
+import pytest
+
+from erms_create import SVKCase, SVKErms
+from erms_create.core.streaming import ErmsStreamWriter
+from erms_create.svk_arende.emitter import DirectCase, DirectCaseWriter
+from erms_create.svk_arende.svk_extensions import SVK_ROOT_NSMAP
+
+_TEXTS = [
+    "Bygglov för Gustav Vasa kyrka",
+    "Offert & avtal <utkast> \"A\" 'B'",
+    "Rad ett\r\nrad två\ttabb",
+    "Åäö ÅÄÖ – ‘citat’ 𝔘𝔫𝔦𝔠𝔬𝔡𝔢",
+]
+
+
+def _build(target, number: int, text: str):
+    """Bygg samma ärende med SVKErms-/SVKCase- eller DirectCaseWriter-API:t"""
+    case = target.add_case(f"F 2024-{number:04d}", text, "Sunne pastorat", "1234567890",
+                           aid="SE/123/ABC")
+    # Anrop i en annan ordning än elementordningen i schemat
+    case.add_required_dates("2024-01-15T10:00:00", "2024-02-01T09:00:00",
+                            created_date="2024-01-10T08:00:00")
+    case.add_classification(text, class_code="1.2")
+    case.set_status_svk("closed")
+    case.add_case_agents(creator="Anna", responsible_person=text,
+                         counterparts=["Kommunen", {"name": text, "organisation": "Org AB",
+                                                    "id_number": "5561234567",
+                                                    "id_type": "organisationsnummer"}],
+                         closing_person="Per")
+    case.add_agent("other", text, other_agent_type=text, unit_name="Enhet", role="Roll",
+                   protected_identity=True)
+    first = case.add_record_svk(f"F 2024-{number:04d}:1", text)
+    first.add_required_dates("2024-01-15T10:00:00", "2024-01-15T10:00:00",
+                             received_date="2024-01-14T12:00:00")
+    first.set_direction("incoming")
+    first.add_document_agents(sender=text, creator="Anna")
+    first.set_status_svk("closed")
+    second = case.add_record_svk(f"F 2024-{number:04d}:2", "Beslut", record_type="avtalsdokument")
+    second.set_direction("other", "internal")
+    second.add_date("2024-02-01T09:00:00", "other", other_date_type=text)
+    second.set_running_number(2)
+    _add_extensions(case, first, second, text)
+    return case
+
+
+def _add_extensions(case, first, second, text: str):
+    """SVK-tillägg i additionalXMLData, i en annan ordning än schemat"""
+    case.add_audit_event("2024-01-20T10:00:00", text, "ansvarig", "update", "Anna", text)
+    case.set_initiative("eget")
+    case.add_related_project(text, "P-1", system_id="S-1")
+    case.add_svk_note("generell anteckning", text, "Anna", "2024-01-16", creator_org=text)
+    case.add_audit_event("2024-01-21T10:00:00", "Per", "status", "update")
+    case.add_related_property("Kyrkogården", "Sunne 1:1")
+    first.add_svk_note("generell anteckning", "Anteckning", text, "2024-01-16")
+    first.add_svk_appendix(f"{text}.pdf", "filer/bilaga.pdf", "pdf", description=text,
+                           version_number=2)
+    second.add_contract_info("avtal", text, call_off_value=500, contract_value=100000,
+                             start_date="2024-01-01", end_date="2026-12-31")
+    second.add_svk_appendix("utan_info.pdf", "filer/utan_info.pdf", "pdf", variant=None)
+
+
+@pytest.mark.parametrize("pretty_print", [True, False])
+def test_document_is_byte_identical(pretty_print, strip_volatile):
+    """Hela filen ska vara identisk med lxml-backenden"""
+    erms = SVKErms()
+    for number, text in enumerate(_TEXTS, start=1):
+        _build(erms, number, text)
+    expected = io.BytesIO()
+    with ErmsStreamWriter(expected, erms.control.element, pretty_print=pretty_print) as writer:
+        for element in erms.aggregations:
+            writer.write_aggregation(element)
+
+    output = io.BytesIO()
+    with DirectCaseWriter(output, pretty_print=pretty_print) as direct:
+        for number, text in enumerate(_TEXTS, start=1):
+            _build(direct, number, text)
+
+    assert direct.count == len(_TEXTS)
+    assert strip_volatile(output.getvalue()) == strip_volatile(expected.getvalue())
+
+
+def test_fragment_matches_serialized_element():
+    """Ett ärende ska serialiseras som motsvarande lxml-element på alla nivåer"""
+    lxml_case = SVKCase("F 2024-0001", _TEXTS[1])
+    lxml_case.element.set("systemIdentifier", "ärende-1")
+    lxml_record = lxml_case.add_record_svk("F 2024-0001:1")
+    lxml_record.element.set("systemIdentifier", "handling-1")
+    lxml_record.add_agent("creator", "Anna")
+    lxml_case.add_agent("creator", "Anna")
+
+    direct = DirectCase("F 2024-0001", _TEXTS[1], system_identifier="ärende-1")
+    record = direct.add_record_svk("F 2024-0001:1")
+    record.attributes["systemIdentifier"] = "handling-1"
+    record.add_agent("creator", "Anna")
+    direct.add_agent("creator", "Anna")
+
+    writer = ErmsStreamWriter(io.BytesIO(), None)
+    for level in (0, 2, 5):
+        assert direct.serialize(True, level) == writer.serialize(lxml_case.element, level)
+    writer.pretty_print = False
+    assert direct.serialize(False) == writer.serialize(lxml_case.element)
+
+
+def test_validation_matches_lxml_backend():
+    """Ogiltiga värden ska ge samma fel som i lxml-backenden"""
+    case = DirectCase("F 2024-0001", "Ärende")
+    with pytest.raises(ValueError, match="Ogiltigt ärendenummer"):
+        DirectCase("2024-1")
+    with pytest.raises(ValueError, match="Ogiltig status"):
+        case.set_status_svk("open")
+    with pytest.raises(ValueError, match="agent type"):
+        case.add_agent("okänd", "Anna")
+    with pytest.raises(ValueError, match="other_date_type"):
+        case.add_date("2024-01-01", "other")
+    with pytest.raises(ValueError, match="Ogiltig riktning"):
+        case.add_record_svk().set_direction("other")
+    with pytest.raises(ValueError, match="XML compatible"):
+        DirectCase("F 2024-0001", "Styrtecken \x01").serialize()
+    with pytest.raises(ValueError, match="audit scope"):
+        case.add_audit_event("2024-01-01T00:00:00", "Anna", "okänd", "update")
+    with pytest.raises(ValueError, match="Contract info"):
+        case.get_svk_extensions().get_contract_info()
+    with pytest.raises(ValueError, match="prefix"):
+        DirectCaseWriter(io.BytesIO(), nsmap=SVK_ROOT_NSMAP)
+
+    report = case.validate()
+    assert report == SVKCase("F 2024-0001", "Ärende").validate()
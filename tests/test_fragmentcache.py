@@ -0,0 +1,76 @@
+"""
+Tester för cachen med färdigbyggda aktörs- och datumelement
+===========================================================
+"""
+
+import pytest
+from lxml import etree
+
+from erms_create import SVKErms
+from erms_create.core.elements import FRAGMENT_CACHE, Dates, FragmentCache
+
+
+@pytest.fixture
+def cache():
+    maxsize = FRAGMENT_CACHE.maxsize
+    FRAGMENT_CACHE.clear()
+    yield FRAGMENT_CACHE
+    FRAGMENT_CACHE.resize(maxsize)
+    FRAGMENT_CACHE.clear()
+
+
+def _document() -> bytes:
+    erms = SVKErms()
+    for number in range(1, 4):
+        case = erms.add_case(f"F 2024-{number:04d}", "Ärende", "Sunne pastorat", "1234567890")
+        case.add_case_agents(creator="Anna", responsible_person="Per")
+        case.add_required_dates("2024-01-01T00:00:00", "2024-02-01T00:00:00")
+    erms.control.element.find(".//{*}eventDateTime").text = "2024-01-01T00:00:00"
+    for number, case in enumerate(erms.aggregations):
+        case.set("systemIdentifier", str(number))
+    return erms.to_xml_string().encode("utf-8")
+
+
+def test_cache_gives_same_output_and_counts_hits(cache):
+    """Cachade element ska ge samma dokument och räknas som träffar"""
+    cache.resize(0)
+    uncached = _document()
+    cache.resize(512)
+    cache.clear()
+
+    assert _document() == uncached
+    info = cache.info()
+    # Två aktörer och två datum per ärende; ett element cachas först när det
+    # byggs andra gången, så tredje ärendet är det första som får träffar
+    assert info["hits"] == 4
+    assert info["misses"] == 9  # inklusive leverantörsaktören i control
+
+    # Kopiorna är oberoende av cachen
+    dates = Dates()
+    dates.add_date("2024-01-01T00:00:00", "opened").text = "ändrad"
+    assert Dates().add_date("2024-01-01T00:00:00", "opened").text == "2024-01-01T00:00:00"
+
+
+def test_lru_eviction_and_invalid_values():
+    """Äldst använda element ska tas bort och ogiltiga värden aldrig cachas"""
+    cache = FragmentCache(maxsize=2)
+    for key in ("a", "b", "a", "b", "a", "c", "c"):
+        cache.get((key,), lambda key=key: etree.Element(key))
+    assert cache.info() == {"hits": 1, "misses": 6, "size": 2, "maxsize": 2}
+    cache.get(("b",), lambda: etree.Element("b"))
+    assert cache.misses == 7  # b togs bort när c lades till
+
+    cache.resize(1)
+    assert cache.info()["size"] == 1
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            Dates().add_date("2024-01-01", "okänd")
+
+
+def test_unique_keys_are_not_cached():
+    """Nycklar som bara förekommer en gång ska inte kopieras in i cachen"""
+    cache = FragmentCache(maxsize=4)
+    for number in range(10):
+        cache.get((number,), lambda: etree.Element("date"))
+    assert cache.info() == {"hits": 0, "misses": 10, "size": 0, "maxsize": 4}
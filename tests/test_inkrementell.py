@@ -0,0 +1,60 @@
+"""
+Tester för inkrementell leverans
+================================
+"""
+
+import json
+
+from erms_create import SVKErms
+from erms_create.svk_arende.incremental import DeliveryState, IncrementalExporter
+
+
+def _sources(count):
+    return [{"case_number": f"F 2024-{number:04d}", "title": f"Ärende {number}"}
+            for number in range(1, count + 1)]
+
+
+def _export(tmp_path, sources, build_case):
+    with DeliveryState(str(tmp_path / "status.sqlite")) as state:
+        exporter = IncrementalExporter(state, str(tmp_path / "leveranser"),
+                                       "Sunne pastorat", org_number="1234567890")
+        return exporter.export(sources, build_case)
+
+
+def test_only_changed_cases_are_delivered(tmp_path, build_case):
+    """Bara nya och ändrade ärenden ska hamna i en ny delleverans"""
+    sources = _sources(5)
+
+    result = _export(tmp_path, sources, build_case)
+    assert result == {"shard": "delta-00001.xml", "new": 5, "changed": 0, "unchanged": 0}
+
+    # Oförändrad källdata ger ingen ny delleverans
+    result = _export(tmp_path, sources, build_case)
+    assert result == {"shard": None, "new": 0, "changed": 0, "unchanged": 5}
+    assert not (tmp_path / "leveranser" / "delta-00002.xml").exists()
+
+    sources[2]["title"] = "Ändrad ärendemening"
+    sources.append({"case_number": "F 2024-0006", "title": "Ärende 6"})
+    result = _export(tmp_path, sources, build_case)
+    assert result == {"shard": "delta-00002.xml", "new": 1, "changed": 1, "unchanged": 4}
+
+    delta = SVKErms.load(str(tmp_path / "leveranser" / "delta-00002.xml"))
+    assert delta.case_numbers() == ["F 2024-0003", "F 2024-0006"]
+    assert delta.get_case("F 2024-0003").title.text == "Ändrad ärendemening"
+
+    manifest = json.loads((tmp_path / "leveranser" / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["cases"] == 6
+    assert [d["shard"] for d in manifest["deliveries"]] == ["delta-00001.xml", "delta-00002.xml"]
+
+
+def test_source_change_without_content_change(tmp_path, build_case):
+    """Ändrad källdata som inte påverkar innehållet ska inte levereras igen"""
+    sources = _sources(2)
+    _export(tmp_path, sources, build_case)
+
+    sources[0]["internal_note"] = "Används inte i leveransen"
+    result = _export(tmp_path, sources, build_case)
+    assert result == {"shard": None, "new": 0, "changed": 0, "unchanged": 2}
+
+    with DeliveryState(str(tmp_path / "status.sqlite")) as state:
+        assert state.get("F 2024-0001")[2] == "delta-00001.xml"
@@ -0,0 +1,93 @@
+"""
+Tester för inläsning av befintliga ERMS-filer
+=============================================
+"""
+
+from lxml import etree
+
+from erms_create import SVKErms, SVKCase, SVKRecord
+
+
+def _build_document():
+    erms = SVKErms()
+    for number in range(1, 4):
+        case = erms.create_simple_case(
+            case_number=f"F 2024-000{number}",
+            title=f"Ärende {number}",
+            archive_creator="Sunne pastorat",
+            org_number="1234567890",
+            opened_date="2024-01-01T00:00:00",
+            closed_date="2024-02-01T00:00:00",
+            creator="Anna Andersson",
+        )
+        case.add_svk_note("intern anteckning", "Anteckning", "Anna Andersson",
+                          "2024-01-02T00:00:00")
+        record = case.add_record_svk(f"F 2024-000{number}:1", "Handling")
+        record.set_direction("incoming")
+        record.add_document_agents(sender="Försäkringskassan")
+    return erms
+
+
+def test_load_binds_cases_lazily(tmp_path):
+    """Inläsning ska indexera ärenden utan att skapa SVKCase-objekt"""
+    filename = tmp_path / "leverans.xml"
+    _build_document().save_to_file(str(filename))
+
+    erms = SVKErms.load(str(filename))
+
+    assert erms.case_numbers() == ["F 2024-0001", "F 2024-0002", "F 2024-0003"]
+    assert not any(isinstance(entry, SVKCase) for entry in erms._cases.values())
+
+    case = erms.get_case("F 2024-0002")
+    assert isinstance(case, SVKCase)
+    assert case.title.text == "Ärende 2"
+    assert case.status.get("value") == "closed"
+    assert len(case.agents.agents) == 1
+    assert len(case.svk_extensions.svk_notes.notes) == 1
+    assert erms.get_case("F 2024-0002") is case
+    assert sum(isinstance(entry, SVKCase) for entry in erms._cases.values()) == 1
+
+    record = case.get_record("F 2024-0002:1")
+    assert isinstance(record, SVKRecord)
+    assert record.direction.get("directionDefinition") == "incoming"
+    assert erms.get_case("X 2024-0001") is None
+
+
+def test_load_modify_and_save(tmp_path):
+    """Ett inläst ärende ska kunna ändras och sparas igen"""
+    filename = tmp_path / "leverans.xml"
+    _build_document().save_to_file(str(filename))
+
+    erms = SVKErms.load(str(filename))
+    case = erms.get_case("F 2024-0001")
+    case.add_agent("responsible_person", "Bo Bengtsson")
+    case.set_initiative("eget")
+    erms.add_case("F 2024-0004", "Nytt ärende", org_number="1234567890")
+    erms.save_to_file(str(filename))
+
+    reloaded = SVKErms.load(str(filename))
+    assert reloaded.case_numbers()[-1] == "F 2024-0004"
+    case = reloaded.get_case("F 2024-0001")
+    assert [agent.element.get("agentType") for agent in case.agents.agents] == [
+        "creator", "responsible_person"]
+    assert len([c for c in reloaded.iter_cases()]) == 4
+
+    # Omformatering ska fungera eftersom blanktext tas bort vid inläsning
+    content = filename.read_text(encoding="utf-8")
+    assert "\n      <agents>" in content
+    etree.fromstring(content.encode("utf-8"))
+
+
+def test_system_information_is_saved_and_loaded(tmp_path):
+    """Systeminformation ska hamna sist i control och bindas vid inläsning"""
+    erms = _build_document()
+    erms.control.set_system_information("Ärendesystem", "1.0")
+    erms.control.set_system_information("Ärendesystem", "2.0")
+    filename = tmp_path / "leverans.xml"
+    erms.save_to_file(str(filename))
+
+    control = SVKErms.load(str(filename)).control
+    assert etree.QName(control.element[-1]).localname == "systemInformation"
+    assert [(etree.QName(child).localname, child.text)
+            for child in control.system_information] == [("name", "Ärendesystem"),
+                                                         ("version", "2.0")]
@@ -0,0 +1,65 @@
+"""
+Tester för insamling av ärenden från flera trådar
+=================================================
+"""
+
+import threading
+
+import pytest
+
+from erms_create import SVKErms
+from erms_create.svk_arende.collector import CaseCollector
+
+
+def _produce(collector, numbers):
+    for number in numbers:
+        case = collector.add_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                                  "Sunne pastorat", "1234567890")
+        case.add_record_svk(f"F 2024-{number:04d}:1", f"Handling {number}")
+    collector.flush()
+
+
+def test_threads_give_deterministic_document():
+    """Ärenden från flera trådar ska hamna sorterade i ett dokument"""
+    erms = SVKErms()
+    erms.setup_control_info("Sunne pastorat", "1234567890")
+    collector = CaseCollector(erms, batch_size=7)
+
+    threads = [threading.Thread(target=_produce, args=(collector, range(start, 200, 4)))
+               for start in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    collector.finalize()
+
+    expected = [f"F 2024-{number:04d}" for number in range(200)]
+    assert erms.case_numbers() == expected
+    assert [case.object_id.text for case in erms.iter_cases()] == expected
+    assert len(erms.get_case("F 2024-0042").element.findall(
+        "{https://DILCIS.eu/XML/ERMS}record")) == 1
+    assert collector.merged_batches >= 4 * (50 // 7)
+
+    with pytest.raises(ValueError):
+        collector.add_case("F 2024-0500", "För sent")
+
+
+def test_duplicate_case_numbers_are_rejected():
+    """Samma ärendenummer från två trådar ska ge fel"""
+    erms = SVKErms()
+    collector = CaseCollector(erms, batch_size=1)
+    _produce(collector, [1])
+
+    errors = []
+
+    def produce_duplicate():
+        try:
+            _produce(collector, [1])
+        except ValueError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=produce_duplicate)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+    assert "F 2024-0001" in str(errors[0])
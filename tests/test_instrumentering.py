@@ -0,0 +1,65 @@
+"""
+Tester för tidmätning och räknare per fas
+=========================================
+"""
+
+import io
+
+from erms_create import SVKErms
+from erms_create.cli import main
+from erms_create.core import instrumentation
+from erms_create.core.streaming import ErmsStreamWriter
+
+
+def _build() -> SVKErms:
+    erms = SVKErms()
+    case = erms.add_case("F 2024-0001", "Ärende", "Sunne pastorat", "1234567890")
+    case.add_svk_note("generell anteckning", "Anteckning", "Anna", "2024-01-01")
+    record = case.add_record_svk("F 2024-0001:1", "Handling")
+    record.set_direction("incoming")
+    return erms
+
+
+def test_phases_are_recorded_only_when_enabled():
+    """Faserna ska bara mätas när instrumenteringen är påslagen"""
+    instrumentation.REGISTRY.reset()
+    _build()
+    assert instrumentation.snapshot() == {"timers": {}, "counters": {}}
+
+    calls = []
+    with instrumentation.enabled(callback=lambda phase, seconds: calls.append(phase)) as registry:
+        erms = _build()
+        erms.validate()
+        output = io.BytesIO()
+        with ErmsStreamWriter(output, erms.control.element) as writer:
+            writer.write_aggregation(erms.aggregations[0])
+    assert not instrumentation.REGISTRY.enabled
+
+    values = registry.snapshot()
+    timers = values["timers"]
+    assert timers["build.add_case"]["calls"] == 1
+    assert timers["build.add_record_svk"]["calls"] == 1
+    assert timers["extensions.note"]["calls"] == 1
+    assert timers["validate.document"]["calls"] == 1
+    assert timers["serialize.document"]["calls"] == 1
+    assert timers["order.add_in_element"]["calls"] >= 2
+    assert values["counters"]["write.bytes"] > 0
+    assert sorted(set(calls)) == sorted(timers)
+
+    # Återuppringningen används inte längre efter blocket
+    instrumentation.enable()
+    _build()
+    instrumentation.disable()
+    assert len(calls) == sum(timer["calls"] for timer in timers.values())
+    assert "validate.document" not in instrumentation.snapshot()["timers"]
+
+
+def test_cli_prints_phase_breakdown(tmp_path, capsys):
+    """--profile ska skriva tid per fas när kommandot är klart"""
+    output = tmp_path / "leverans.xml"
+    assert main(["--profile", "synth", str(output), "--cases", "3"]) == 0
+    report = capsys.readouterr().err
+    assert report.splitlines()[0].split()[:3] == ["phase", "calls", "seconds"]
+    assert "build.add_case" in report
+    assert "write.bytes" in report
+    assert not instrumentation.REGISTRY.enabled
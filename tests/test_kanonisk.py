@@ -0,0 +1,71 @@
+"""
+Tester för kanonisk utdata och innehållshashar
+==============================================
+"""
+
+from erms_create import SVKErms
+
+
+def _document():
+    erms = SVKErms()
+    case = erms.create_simple_case("F 2024-0001", "Ärende", "Sunne pastorat", "1234567890",
+                                   opened_date="2024-01-01T00:00:00",
+                                   closed_date="2024-02-01T00:00:00")
+    case.set_initiative("eget")
+    record = case.add_record_svk("F 2024-0001:1", "Handling")
+    record.set_direction("incoming")
+    return erms, case, record
+
+
+def test_same_content_gives_same_hash():
+    """Två byggen med samma innehåll ska ge samma kanoniska form och hash"""
+    first, first_case, first_record = _document()
+    second, second_case, second_record = _document()
+
+    assert first.to_xml_string() != second.to_xml_string()  # uuid4 skiljer sig
+    assert first.to_c14n(exclude_volatile=True) == second.to_c14n(exclude_volatile=True)
+    assert first_case.content_hash() == second_case.content_hash()
+    assert first_record.content_hash() == second_record.content_hash()
+    assert b"systemIdentifier" in first_case.to_c14n()
+    assert b"systemIdentifier" not in first_case.to_c14n(exclude_volatile=True)
+
+
+def test_hash_is_invalidated_on_change():
+    """Hashen ska räknas om när ärendet eller en handling ändras"""
+    erms, case, record = _document()
+    original = case.content_hash()
+    assert case._content_hash == original
+
+    record.add_svk_note("intern anteckning", "Ny", "Anna Andersson", "2024-01-03T00:00:00")
+    assert case._content_hash is None
+    changed = case.content_hash()
+    assert changed != original
+
+    case.add_agent("creator", "Anna Andersson")
+    assert case.content_hash() != changed
+
+    # Att läsa befintliga tillägg ändrar inget och ska behålla hashen
+    changed = case.content_hash()
+    record.get_svk_extensions()
+    assert case._content_hash == changed
+
+
+def test_hash_of_loaded_case(tmp_path):
+    """Ett inläst ärende ska ha samma hash som när det skapades"""
+    erms, case, _ = _document()
+    filename = str(tmp_path / "leverans.xml")
+    erms.save_to_file(filename)
+
+    loaded = SVKErms.load(filename).get_case("F 2024-0001")
+    assert loaded.content_hash() == case.content_hash()
+
+
+def test_save_canonical(tmp_path):
+    """Kanonisk sparning ska skriva C14N 2.0 utan XML-deklaration"""
+    erms, _, _ = _document()
+    filename = tmp_path / "kanonisk.xml"
+    erms.save_to_file(str(filename), canonical=True)
+
+    content = filename.read_bytes()
+    assert content == erms.to_c14n()
+    assert content.startswith(b"<erms")
@@ -0,0 +1,151 @@
+"""
+Tester för generering av tabeller från XML Schema och elementordning
+====================================================================
+"""
+
+import random
+
+import pytest
+from lxml import etree
+
+from erms_create.cli import main
+from erms_create.core import namespaces as ns
+from erms_create.core.codegen import read_schemas
+from erms_create.core.utils import (AGGREGATION_SORT_ORDER, SORT_RANKS, add_in_element,
+                                    register_sort_ranks)
+
+_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           xmlns="urn:test" targetNamespace="urn:test" elementFormDefault="qualified">
+  <xs:complexType name="baseType">
+    <xs:sequence>
+      <xs:element name="objectId" type="xs:string"/>
+    </xs:sequence>
+  </xs:complexType>
+  <xs:element name="note">
+    <xs:complexType>
+      <xs:complexContent>
+        <xs:extension base="baseType">
+          <xs:sequence>
+            <xs:element name="text" type="xs:string"/>
+            <xs:choice>
+              <xs:element ref="author"/>
+              <xs:element name="system" type="xs:string"/>
+            </xs:choice>
+          </xs:sequence>
+          <xs:attribute name="noteType">
+            <xs:simpleType>
+              <xs:restriction base="xs:string">
+                <xs:enumeration value="intern"/>
+                <xs:enumeration value="extern"/>
+              </xs:restriction>
+            </xs:simpleType>
+          </xs:attribute>
+        </xs:extension>
+      </xs:complexContent>
+    </xs:complexType>
+  </xs:element>
+  <xs:element name="author" type="xs:string"/>
+  <xs:element name="notes">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="status" type="statusType" minOccurs="0"/>
+        <xs:element ref="note" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+  <xs:simpleType name="statusType">
+    <xs:restriction base="xs:string">
+      <xs:enumeration value="closed"/>
+      <xs:enumeration value="obliterated"/>
+    </xs:restriction>
+  </xs:simpleType>
+</xs:schema>
+"""
+
+
+def test_generated_tables(tmp_path):
+    """Ordning och värdelistor ska läsas ur schemat och kunna användas för sortering"""
+    schema = tmp_path / "test.xsd"
+    schema.write_text(_SCHEMA, encoding="utf-8")
+    model = read_schemas([schema])
+
+    assert model.children["{urn:test}note"] == [
+        "{urn:test}objectId", "{urn:test}text", "{urn:test}author", "{urn:test}system"]
+    assert model.value_lists == {"noteType": ["intern", "extern"],
+                                 "statusType": ["closed", "obliterated"]}
+
+    output = tmp_path / "tables.py"
+    assert main(["codegen", str(schema), "-o", str(output)]) == 0
+    tables = {}
+    exec(output.read_text(encoding="utf-8"), tables)
+    assert tables["TAGS"]["author"] == "{urn:test}author"
+
+    register_sort_ranks(tables["SORT_RANKS"])
+    try:
+        note = etree.Element("{urn:test}note")
+        for name in ("author", "text", "objectId"):
+            add_in_element(note, etree.Element("{urn:test}" + name))
+        assert [child.tag for child in note] == [
+            "{urn:test}objectId", "{urn:test}text", "{urn:test}author"]
+    finally:
+        del SORT_RANKS["{urn:test}note"]
+
+
+def test_generated_builder_classes(tmp_path):
+    """Byggklasserna ska ha __slots__, färdiga taggar och kontrollera värdelistor"""
+    schema = tmp_path / "test.xsd"
+    schema.write_text(_SCHEMA, encoding="utf-8")
+    output = tmp_path / "tables.py"
+    assert main(["codegen", str(schema), "-o", str(output)]) == 0
+    module = {}
+    exec(output.read_text(encoding="utf-8"), module)
+    Note, Notes = module["Note"], module["Notes"]
+
+    assert Note.TAG == "{urn:test}note"
+    notes = Notes()
+    note = notes.add_note(note_type="intern")
+    assert not hasattr(note, "__dict__")
+    note.set_author("Anna")
+    note.set_text("Första")
+    note.set_object_id("F 2024-0001")
+    note.set_text("Andra")
+    notes.add_note()
+    notes.set_status("closed")
+
+    assert [child.tag for child in notes.element] == [
+        "{urn:test}status", "{urn:test}note", "{urn:test}note"]
+    assert [(child.tag, child.text) for child in note.element] == [
+        ("{urn:test}objectId", "F 2024-0001"), ("{urn:test}text", "Andra"),
+        ("{urn:test}author", "Anna")]
+    assert note.element.get("noteType") == "intern"
+
+    with pytest.raises(ValueError, match="noteType"):
+        Note(note_type="hemlig")
+    with pytest.raises(ValueError, match="status"):
+        notes.set_status("open")
+    assert Note.from_element(note.element).element is note.element
+
+
+def test_add_in_element_follows_sort_order():
+    """Barn ska hamna i schemaordning och behålla inbördes ordning oavsett anropsordning"""
+    tags = [tag for tag in AGGREGATION_SORT_ORDER if tag != ns.ERMS + "aggregation"]
+    children = [(tag, number) for tag in tags for number in range(2)]
+    generator = random.Random(7)
+    for _ in range(5):
+        shuffled = children[:]
+        generator.shuffle(shuffled)
+        aggregation = etree.Element(ns.ERMS + "aggregation")
+        aggregation.append(etree.Comment("kommentar"))
+        for tag, number in shuffled:
+            element = etree.Element(tag)
+            element.text = str(number)
+            add_in_element(aggregation, element)
+
+        result = [(child.tag, child.text) for child in aggregation
+                  if isinstance(child.tag, str)]
+        assert [tag for tag, _ in result] == [tag for tag in tags for _ in range(2)]
+        for tag in tags:
+            texts = [text for child_tag, text in result if child_tag == tag]
+            expected = [str(number) for other, number in shuffled if other == tag]
+            assert texts == expected
@@ -0,0 +1,102 @@
+"""
+Tester för kolumnvisa ärendesatser
+==================================
+"""
+
+import pytest
+
+from erms_create import SVKErms
+from erms_create.svk_arende.batch import CaseBatch
+from erms_create.svk_arende.batch import np as numpy
+
+BACKENDS = [False, pytest.param(True, marks=pytest.mark.skipif(numpy is None,
+                                                                 reason="NumPy saknas"))]
+
+
+def _batch(use_numpy):
+    return CaseBatch(
+        case_number=["F 2024-0001", "F 2024-2", "F 2024-0003", "F 2024-0004",
+                     "F 2024-0005", "F 2024-0006"],
+        title=["Ett", "Två", "Tre", "Fyra", "Fem", "Sex"],
+        org_number=["1234567890", "1234567890", "123456789", "1234567890",
+                    "1234567890", "1234567890"],
+        status=["closed", "closed", "closed", "open", "obliterated", "closed"],
+        opened=["2024-01-01T00:00:00"] * 5 + ["2024-05-01T00:00:00"],
+        closed=["2024-02-01T00:00:00", "2024-02-01T00:00:00", "2024-02-01T00:00:00",
+                "2024-02-01T00:00:00", "ogiltigt", "2024-02-01T00:00:00"],
+        archive_creator="Sunne pastorat",
+        use_numpy=use_numpy,
+    )
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_rejects_are_returned_as_row_mask(use_numpy):
+    """Avvisade rader ska anges med en radmask och skälen per rad"""
+    batch = _batch(use_numpy)
+
+    assert [bool(value) for value in batch.rejects()] == [False, True, True, True, True, True]
+    assert batch.reject_reasons() == {
+        1: ["case_number"],
+        2: ["org_number"],
+        3: ["status"],
+        4: ["dates"],
+        5: ["dates"],
+    }
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_valid_rows_are_built_in_one_call(use_numpy):
+    """Bara giltiga rader ska byggas och läggas till i dokumentet"""
+    erms = SVKErms()
+    cases = _batch(use_numpy).build(erms)
+
+    assert [case.object_id.text for case in cases] == ["F 2024-0001"]
+    assert erms.case_numbers() == ["F 2024-0001"]
+    assert erms.get_case("F 2024-0001").validate()["valid"]
+    identifications = {elm.get("identificationType"): elm.text
+                       for elm in erms.control.identifications}
+    assert identifications["arkivbildare"] == "Sunne pastorat"
+    assert identifications["organisationsnummer"] == "1234567890"
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_dates_with_and_without_timezone(use_numpy):
+    """Datum med och utan tidszon ska jämföras som UTC i båda varianterna"""
+    batch = CaseBatch(case_number=["F 2024-0001", "F 2024-0002"], title="Ärende",
+                      org_number="1234567890", status="closed",
+                      opened=["2024-01-01T10:00:00+02:00", "2024-01-01T10:00:00"],
+                      closed=["2024-01-01T09:00:00", "2024-01-01T09:00:00+02:00"],
+                      use_numpy=use_numpy)
+    assert list(batch.validate()["dates"]) == [True, False]
+
+
+def test_column_lengths_must_match():
+    """Kolumner med olika längd ska ge fel"""
+    with pytest.raises(ValueError, match="title"):
+        CaseBatch(case_number=["F 2024-0001"], title=["Ett", "Två"])
+
+
+@pytest.mark.skipif(numpy is None, reason="NumPy saknas")
+def test_numpy_arrays_are_used_as_is():
+    """Arrayer ska inte konverteras och ge samma resultat som listor i ren Python"""
+    numbers = numpy.array(["F 2024-0001", "ÅÄÖ 2024-0002", "f 2024-0003", "F 2024-0004\n",
+                           " 2024-0005", "F  2024-0006", "F 2024-00007", "FÖR 1999-9999", ""])
+    opened = numpy.full(len(numbers), "2024-01-01T00:00", dtype="datetime64[s]")
+    closed = opened + numpy.arange(-1, len(numbers) - 1).astype("timedelta64[D]")
+    columns = dict(case_number=numbers, title=numbers, org_number="1234567890",
+                   status="closed", opened=opened, closed=closed)
+
+    batch = CaseBatch(**columns, use_numpy=True)
+    assert batch.columns["case_number"] is numbers
+    assert batch.columns["opened"] is opened
+
+    python = CaseBatch(**columns, use_numpy=False)
+    assert list(batch.validate()["case_number"]) == python.validate()["case_number"] == \
+        [True, True, True, False, False, False, False, True, False]
+    assert list(batch.valid_mask()) == python.valid_mask()
+
+    erms = SVKErms()
+    cases = batch.build(erms)
+    assert [case.object_id.text for case in cases] == ["ÅÄÖ 2024-0002", "f 2024-0003",
+                                                   "FÖR 1999-9999"]
+    assert erms.get_case("FÖR 1999-9999").validate()["valid"]
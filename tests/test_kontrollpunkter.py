@@ -0,0 +1,161 @@
+"""
+Tester för kontrollpunkter och återupptagna körningar
+=====================================================
+"""
+
+import os
+import time
+
+import pytest
+from lxml import etree
+
+from erms_create import SVKErms
+from erms_create.cli import main
+from erms_create.core.checkpoint import CheckpointWriter, read_checkpoint
+from erms_create.svk_arende import synthetic
+from erms_create.svk_arende.pipeline import export_cases
+from erms_create.svk_arende.synthetic import SyntheticDelivery
+
+def test_resumed_writer_gives_identical_output(tmp_path):
+    """En avbruten och återupptagen skrivning ska ge samma bytes som en hel"""
+    erms = SVKErms()
+    erms.setup_control_info("Sunne pastorat", "1234567890")
+    for number in range(1, 8):
+        erms.add_case(f"F 2024-{number:04d}", f"Ärende {number}")
+    elements = [case.element for case in erms.iter_cases()]
+
+    complete = str(tmp_path / "hel.xml")
+    with CheckpointWriter(complete, erms.control.element, checkpoint_interval=3) as writer:
+        for element in elements:
+            writer.write_aggregation(element)
+            writer.advance()
+    assert read_checkpoint(complete) is None
+
+    interrupted = str(tmp_path / "avbruten.xml")
+    writer = CheckpointWriter(interrupted, erms.control.element, checkpoint_interval=3)
+    for element in elements[:5]:
+        writer.write_aggregation(element)
+        writer.advance()
+    writer.abort()
+    assert read_checkpoint(interrupted)["input_position"] == 3
+
+    with CheckpointWriter(interrupted, erms.control.element, checkpoint_interval=3,
+                          resume=True) as writer:
+        assert writer.resumed
+        for element in elements[writer.input_position:]:
+            writer.write_aggregation(element)
+            writer.advance()
+
+    with open(complete, "rb") as a, open(interrupted, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_resume_merge_after_failure(tmp_path, case_file):
+    """En sammanslagning som avbryts ska kunna fortsätta från kontrollpunkten"""
+    sources = [case_file(tmp_path, number) for number in range(1, 6)]
+    expected = str(tmp_path / "hel.xml")
+    SVKErms.merge_files(sources, expected)
+
+    # Fjärde filen är trasig första gången
+    with open(sources[3], "rb") as f:
+        intact = f.read()
+    with open(sources[3], "wb") as f:
+        f.write(intact[:-40])
+
+    output = str(tmp_path / "leverans.xml")
+    with pytest.raises(etree.XMLSyntaxError):
+        SVKErms.merge_files(sources, output, checkpoint_interval=2)
+    assert not os.path.exists(output)
+    assert read_checkpoint(output + ".tmp")["input_position"] == 2
+
+    with open(sources[3], "wb") as f:
+        f.write(intact)
+    assert main(["merge", "-o", output, "--resume"] + sources) == 0
+
+    with open(expected, "rb") as a, open(output, "rb") as b:
+        assert a.read() == b.read()
+    assert read_checkpoint(output + ".tmp") is None
+
+
+def test_resume_requires_same_input(tmp_path, case_file):
+    """Återupptagning med andra indatafiler ska ge fel"""
+    sources = [case_file(tmp_path, number) for number in range(1, 4)]
+    output = str(tmp_path / "leverans.xml")
+
+    with pytest.raises(ValueError, match="No checkpoint"):
+        SVKErms.merge_files(sources, output, resume=True)
+
+    CheckpointWriter(output + ".tmp", None, metadata={"sources": sources}).abort()
+    with pytest.raises(ValueError, match="different input"):
+        SVKErms.merge_files(sources[:2], output, resume=True)
+
+
+def test_resume_export_cases(tmp_path, build_case):
+    """En export som avbryts mitt i ska kunna återupptas och ge samma bytes"""
+    sources = [{"case_number": f"F 2024-{number:04d}", "title": f"Ärende {number}"}
+               for number in range(1, 41)]
+    sources[12]["status"] = "ogiltig"
+    options = dict(org_number="1234567890", on_invalid="skip", checkpoint_interval=5)
+
+    expected = str(tmp_path / "hel.xml")
+    export_cases(sources, build_case, expected, "Sunne pastorat", **options)
+
+    output = str(tmp_path / "leverans.xml")
+
+    def build_until_killed(erms, source):
+        # Avbryt när de första 20 ärendena har passerat en kontrollpunkt
+        if source["case_number"] == "F 2024-0026":
+            deadline = time.monotonic() + 10
+            while (read_checkpoint(output + ".tmp") or {}).get("input_position", 0) < 20:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            raise RuntimeError("avbruten")
+        return build_case(erms, source)
+
+    with pytest.raises(RuntimeError, match="avbruten"):
+        export_cases(sources, build_until_killed, output, "Sunne pastorat",
+                     build_workers=1, **options)
+    assert not os.path.exists(output)
+    assert 20 <= read_checkpoint(output + ".tmp")["input_position"] < 40
+
+    result = export_cases(sources, build_case, output, "Sunne pastorat", resume=True,
+                          **options)
+    assert result["cases"] == 39
+    with open(expected, "rb") as a, open(output, "rb") as b:
+        assert a.read() == b.read()
+    assert read_checkpoint(output + ".tmp") is None
+
+
+def test_resume_synthetic_delivery(tmp_path, monkeypatch, strip_volatile):
+    """En avbruten syntetisk leverans ska kunna återupptas med samma resultat"""
+    expected = str(tmp_path / "hel.xml")
+    SyntheticDelivery(seed=5).write_delivery(expected, 30)
+
+    output = str(tmp_path / "leverans.xml")
+    calls = []
+    build_case = synthetic.build_case
+
+    def build_until_killed(erms, spec):
+        calls.append(spec)
+        if len(calls) == 17:
+            raise RuntimeError("avbruten")
+        return build_case(erms, spec)
+
+    monkeypatch.setattr(synthetic, "build_case", build_until_killed)
+    with pytest.raises(RuntimeError):
+        SyntheticDelivery(seed=5).write_delivery(output, 30, checkpoint_interval=4)
+    monkeypatch.setattr(synthetic, "build_case", build_case)
+    assert read_checkpoint(output)["input_position"] == 16
+
+    assert main(["synth", output, "--cases", "30", "--seed", "5", "--resume"]) == 0
+    with open(expected, "rb") as a, open(output, "rb") as b:
+        assert strip_volatile(a.read()) == strip_volatile(b.read())
+
+
+def test_resume_without_output(tmp_path):
+    """En kontrollpunkt utan utdatafil ska ge ValueError"""
+    output = str(tmp_path / "leverans.xml")
+    CheckpointWriter(output, None).abort()
+    os.remove(output)
+    with pytest.raises(ValueError, match="output is missing"):
+        CheckpointWriter(output, None, resume=True)
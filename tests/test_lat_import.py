@@ -0,0 +1,75 @@
+"""
+Tester för lat import av paketen och kommandot erms-validate
+============================================================
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import erms_create
+from erms_create import core, svk_arende
+from erms_create.benchmark import measure_import_times
+from erms_create.validation import main as validate_main
+
+
+def test_package_import_does_not_load_lxml():
+    """Import av paketet ska inte ladda lxml eller asyncio förrän klasserna används"""
+    code = ("import sys, erms_create, erms_create.core, erms_create.svk_arende; "
+            "before = 'lxml.etree' in sys.modules; "
+            "from erms_create import SVKErms; "
+            "print(before, 'lxml.etree' in sys.modules, 'asyncio' in sys.modules)")
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                               env=dict(os.environ,
+                                        PYTHONPATH=os.path.dirname(erms_create.__path__[0])),
+                               check=True)
+    assert completed.stdout.split() == ["False", "True", "False"]
+
+    [result] = measure_import_times(["erms_create"], repeat=1)
+    assert not result["loads_lxml"] and result["import_seconds"] > 0
+
+
+def test_lazy_attributes():
+    """De publika namnen ska gå att nå och listas som förut"""
+    assert erms_create.SVKErms is svk_arende.svk_erms.SVKErms
+    assert core.ns.ERMS.startswith("{")
+    assert core.Dates is core.elements.Dates
+    assert svk_arende.value_lists.STATUS_SVK == ["closed", "obliterated"]
+    for module in (erms_create, core, svk_arende):
+        assert set(module.__all__) <= set(dir(module))
+        with pytest.raises(AttributeError):
+            module.finns_inte
+    erms, case = erms_create.create_simple_case("F 2024-0001", "Ärende", "Sunne pastorat",
+                                                "1234567890")
+    assert case.object_id.text == "F 2024-0001"
+
+
+def test_subpackages_as_attributes():
+    """Underpaketen ska nås som attribut efter bara import erms_create"""
+    code = ("import erms_create; "
+            "print(erms_create.core.Erms.__name__, erms_create.svk_arende.SVKErms.__name__, "
+            "erms_create.validation.main.__name__, "
+            "{'core', 'svk_arende', 'validation'} <= set(dir(erms_create)))")
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                               env=dict(os.environ,
+                                        PYTHONPATH=os.path.dirname(erms_create.__path__[0])),
+                               check=True)
+    assert completed.stdout.split() == ["Erms", "SVKErms", "main", "True"]
+
+
+def test_validate_command(tmp_path, capsys):
+    """erms-validate ska ge 0 för giltiga filer och 1 om någon fil är ogiltig"""
+    erms, _ = erms_create.create_simple_case("F 2024-0001", "Ärende", "Sunne pastorat",
+                                             "1234567890")
+    valid = tmp_path / "giltig.xml"
+    erms.save_to_file(str(valid))
+    broken = tmp_path / "trasig.xml"
+    broken.write_text("<erms><aggregations>", encoding="utf-8")
+
+    assert validate_main([str(valid)]) == 0
+    assert validate_main([str(valid), str(broken), str(tmp_path / "saknas.xml")]) == 1
+    output = capsys.readouterr().out
+    assert f"{valid}: valid" in output
+    assert f"{broken}: invalid" in output and "XML syntax error" in output
@@ -0,0 +1,79 @@
+"""
+Tester för mellanlagring av serialiserade ärenden
+=================================================
+"""
+
+import pytest
+
+from erms_create import SVKErms
+from erms_create.core.staging import StagingStore
+
+
+def _add_case(erms, number):
+    erms.create_simple_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                            "Sunne pastorat", "1234567890",
+                            opened_date="2024-01-01T00:00:00",
+                            closed_date="2024-02-01T00:00:00")
+
+
+def test_assembled_document_equals_in_memory_document(tmp_path):
+    """Dokumentet från lagret ska vara identiskt med det som byggs i minnet"""
+    in_memory = SVKErms()
+    in_memory.setup_control_info("Sunne pastorat", "1234567890")
+    staged = SVKErms()
+    staged.control = in_memory.control
+
+    with StagingStore(str(tmp_path / "leverans.staging")) as store:
+        for number in range(1, 6):
+            _add_case(in_memory, number)
+            _add_case(staged, number)
+            # Samma systemIdentifier i båda dokumenten
+            for new, old in zip(staged.get_case(f"F 2024-{number:04d}").element.iter(),
+                                in_memory.get_case(f"F 2024-{number:04d}").element.iter()):
+                if old.get("systemIdentifier"):
+                    new.set("systemIdentifier", old.get("systemIdentifier"))
+            assert staged.stage_cases(store) == 1
+            assert staged.case_numbers() == []
+
+        assert len(store) == 5
+        assert store.assemble(str(tmp_path / "leverans.xml")) == 5
+
+    expected = in_memory.to_xml_string().encode("utf-8")
+    assert (tmp_path / "leverans.xml").read_bytes() == expected
+
+
+def test_resume_after_crash(tmp_path):
+    """Ärenden som redan mellanlagrats ska inte läggas till igen"""
+    path = str(tmp_path / "leverans.staging")
+    erms = SVKErms()
+    erms.setup_control_info("Sunne pastorat", "1234567890")
+
+    store = StagingStore(path, commit_interval=2)
+    for number in range(1, 4):
+        _add_case(erms, number)
+        erms.stage_cases(store)
+    # Avbrott utan close(): bara de två första ärendena är committade
+    store.connection.close()
+
+    with StagingStore(path) as store:
+        assert store.object_ids() == ["F 2024-0001", "F 2024-0002"]
+        for number in range(1, 5):
+            if f"F 2024-{number:04d}" in store:
+                continue
+            _add_case(erms, number)
+            erms.stage_cases(store)
+        store.assemble(str(tmp_path / "leverans.xml"))
+
+        assert store.get("F 2024-0003").findtext("{https://DILCIS.eu/XML/ERMS}objectId") == "F 2024-0003"
+
+    result = SVKErms.load(str(tmp_path / "leverans.xml"))
+    assert result.case_numbers() == [f"F 2024-{number:04d}" for number in range(1, 5)]
+
+
+def test_options_must_match(tmp_path):
+    """Ett lager kan inte öppnas igen med andra serialiseringsinställningar"""
+    path = str(tmp_path / "leverans.staging")
+    StagingStore(path, pretty_print=False).close()
+
+    with pytest.raises(ValueError, match="pretty_print"):
+        StagingStore(path, pretty_print=True)
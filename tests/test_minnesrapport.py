@@ -0,0 +1,47 @@
+"""
+Tester för minnesrapporten per ärende
+=====================================
+"""
+
+import tracemalloc
+
+import pytest
+
+from erms_create.svk_arende.memory import COMPONENTS, format_memory_report, measure_memory
+
+
+def test_report_per_component():
+    """Varje del ska få bytes per exemplar och källrader i paketet"""
+    report = measure_memory(count=50, components=["case", "record", "note"], top=3)
+    assert list(report["components"]) == ["case", "record", "note"]
+    for name, result in report["components"].items():
+        assert result["count"] == 50
+        assert result["python_bytes_per_item"] > 0
+        assert 0 < len(result["lines"]) <= 3
+        assert all(line["file"].startswith("erms_create") for line in result["lines"])
+        if report["malloc_available"]:
+            assert result["malloc_bytes_per_item"] > 0
+
+    # Ett ärende med datum kostar mer än en anteckning i Python-objekt
+    components = report["components"]
+    assert components["case"]["python_bytes_per_item"] > \
+        components["note"]["python_bytes_per_item"]
+
+    text = format_memory_report(report)
+    assert text.splitlines()[0].split()[0] == "del"
+    assert "erms_create/core/utils.py" in text
+
+
+def test_invalid_arguments():
+    """Okända delar, för litet antal och pågående tracemalloc ska ge ValueError"""
+    assert "synthetic_case" in COMPONENTS
+    with pytest.raises(ValueError):
+        measure_memory(count=10, components=["okänd"])
+    with pytest.raises(ValueError):
+        measure_memory(count=0)
+    tracemalloc.start()
+    try:
+        with pytest.raises(ValueError):
+            measure_memory(count=10, components=["agent"])
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,71 @@
+"""
+Tester för upplyfta namnrymdsdeklarationer
+==========================================
+"""
+
+import io
+
+from lxml import etree
+
+from erms_create import SVKErms
+from erms_create.core.streaming import ErmsStreamWriter
+from erms_create.svk_arende.svk_extensions import SVK_ROOT_NSMAP
+
+
+def _document(hoist_namespaces: bool) -> SVKErms:
+    erms = SVKErms(hoist_namespaces=hoist_namespaces)
+    for number in (1, 2):
+        case = erms.add_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                             "Sunne pastorat", "1234567890")
+        case.add_svk_note("generell anteckning", "Anteckning", "Anna", "2024-01-01")
+        case.add_audit_event("2024-01-01T00:00:00", "Anna", "ansvarig", "update",
+                             "Per", "Anna")
+        record = case.add_record_svk(f"F 2024-{number:04d}:1", "Handling")
+        record.add_svk_note("intern anteckning", "Intern", "Per", "2024-01-02")
+    return erms
+
+
+def _canonical(data: str) -> str:
+    tree = etree.fromstring(data.encode("utf-8"))
+    return etree.canonicalize(tree, rewrite_prefixes=True, strip_text=True)
+
+
+def test_namespaces_are_declared_once_on_root(tmp_path):
+    """Namnrymderna ska bara deklareras på roten och innehållet vara detsamma"""
+    plain = _document(False)
+    hoisted = _document(True)
+    for erms in (plain, hoisted):
+        erms.control.element.find(".//{*}eventDateTime").text = "2024-01-01T00:00:00"
+        for case, number in zip(erms.aggregations, (1, 2)):
+            case.set("systemIdentifier", f"ärende-{number}")
+            case.find("{*}record").set("systemIdentifier", f"handling-{number}")
+
+    data = hoisted.to_xml_string()
+    assert data.count("xmlns") == 3
+    assert "<svk:svkNote " in data
+    assert _canonical(data) == _canonical(plain.to_xml_string())
+
+    # Inläsning hittar SVK-tilläggen även med prefix
+    filename = tmp_path / "leverans.xml"
+    hoisted.save_to_file(str(filename))
+    loaded = SVKErms.load(str(filename))
+    assert loaded.get_case("F 2024-0002").svk_extensions.svk_notes is not None
+
+
+def test_stream_writer_with_hoisted_namespaces():
+    """ErmsStreamWriter med SVK_ROOT_NSMAP ska ge samma fil som save_to_file"""
+    erms = _document(True)
+    expected = erms.to_xml_string().encode("utf-8")
+
+    output = io.BytesIO()
+    with ErmsStreamWriter(output, erms.control.element, nsmap=SVK_ROOT_NSMAP) as writer:
+        for element in erms.aggregations:
+            writer.write_aggregation(element)
+    assert output.getvalue() == expected
+
+    # Element som byggts i ett vanligt dokument lyfts upp vid skrivning
+    output = io.BytesIO()
+    with ErmsStreamWriter(output, erms.control.element, nsmap=SVK_ROOT_NSMAP) as writer:
+        for element in _document(False).aggregations:
+            writer.write_aggregation(element)
+    assert output.getvalue().count(b"xmlns") == 3
@@ -0,0 +1,100 @@
+"""
+Tester för parallell export genom pipeline
+==========================================
+"""
+
+import threading
+import time
+
+import pytest
+
+from erms_create import SVKErms
+from erms_create.core.pipeline import Pipeline, DROP
+from erms_create.svk_arende.pipeline import export_cases
+
+
+def test_pipeline_keeps_order_and_bounds_queues():
+    """Utdata ska komma i indataordning och köerna ska vara begränsade"""
+    active = []
+    lock = threading.Lock()
+
+    def slow_square(value):
+        with lock:
+            active.append(value)
+        time.sleep(0.001 * (value % 3))
+        return value * value
+
+    pipeline = Pipeline(queue_size=4)
+    pipeline.add_stage("square", slow_square, workers=3)
+    pipeline.add_stage("odd", lambda value: value if value % 2 else DROP, workers=2)
+    result = []
+    assert pipeline.run(range(50), result.append) == 25
+
+    assert result == [value * value for value in range(50) if value % 2]
+    metrics = pipeline.metrics()
+    assert list(metrics) == ["fetch", "square", "odd", "write", "elapsed_seconds"]
+    assert metrics["square"]["items"] == 50
+    assert metrics["odd"]["dropped"] == 25
+    assert metrics["square"]["max_queue_depth"] <= 4
+
+
+def test_slow_item_bounds_items_in_flight():
+    """Ett långsamt första element ska inte låta omordningsbufferten växa med indata"""
+    first_done = threading.Event()
+    read_while_waiting = []
+
+    def source():
+        for value in range(2000):
+            if not first_done.is_set():
+                read_while_waiting.append(value)
+            yield value
+
+    def slow_first(value):
+        if value == 0:
+            time.sleep(0.5)
+            first_done.set()
+        return value
+
+    pipeline = Pipeline(queue_size=4)
+    pipeline.add_stage("slow", slow_first, workers=2)
+    result = []
+    assert pipeline.run(source(), result.append) == 2000
+
+    assert result == list(range(2000))
+    # Två köer med plats för fyra, plus det element som källan redan har läst
+    assert len(read_while_waiting) <= 4 * 2 + 1
+
+
+def test_pipeline_raises_stage_errors():
+    """Ett fel i ett steg ska stoppa pipelinen och kastas vidare"""
+    def fail_on_seven(value):
+        if value == 7:
+            raise ValueError("sju")
+        return value
+
+    pipeline = Pipeline(queue_size=2)
+    pipeline.add_stage("check", fail_on_seven, workers=2)
+    with pytest.raises(ValueError, match="sju"):
+        pipeline.run(range(1000), lambda value: None)
+
+
+def test_export_cases_matches_sequential_build(tmp_path, build_case):
+    """Parallell export ska ge samma ärenden i samma ordning som källdatan"""
+    sources = [{"case_number": f"F 2024-{number:04d}", "title": f"Ärende {number}"}
+               for number in range(1, 31)]
+    sources[4]["status"] = "ogiltig"
+
+    output = str(tmp_path / "leverans.xml")
+    with pytest.raises(ValueError):
+        export_cases(sources, build_case, output, "Sunne pastorat", org_number="1234567890")
+
+    result = export_cases(sources, build_case, output, "Sunne pastorat",
+                          org_number="1234567890", on_invalid="skip",
+                          build_workers=3, serialize_workers=2)
+    assert result["cases"] == 29
+    assert result["rejected"] == ["F 2024-0005"]
+    assert result["metrics"]["serialize"]["items"] == 29
+
+    erms = SVKErms.load(output)
+    expected = [source["case_number"] for source in sources if "status" not in source]
+    assert erms.case_numbers() == expected
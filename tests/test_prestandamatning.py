@@ -0,0 +1,45 @@
+"""
+Tester för prestandamätningarna
+===============================
+"""
+
+import json
+
+from erms_create.benchmark import STEPS, case_number, compare_results, run_benchmarks
+from erms_create.cli import main
+from erms_create.svk_arende import value_lists
+
+
+def test_benchmark_report(tmp_path):
+    """Alla steg ska rapporteras per form och skala och kunna skrivas som JSON"""
+    report = run_benchmarks(scales=[200], trace_memory=True)
+
+    assert [(result["shape"], result["benchmark"]) for result in report["results"]] == [
+        (shape, step) for shape in ("many-small", "few-large") for step in STEPS]
+    for result in report["results"]:
+        assert result["ops"] > 0 and result["ops_per_sec"] > 0
+        assert result["traced_peak_bytes"] >= 0
+    serialize = [result for result in report["results"] if result["benchmark"] == "serialize"]
+    assert all(result["bytes_per_sec"] > 0 for result in serialize)
+    assert report["results"][-1]["records"] == 200
+
+    output = tmp_path / "resultat.json"
+    assert main(["bench", "--cases", "50", "--shape", "many-small", "--no-memory",
+                 "-o", str(output)]) == 0
+    assert len(json.loads(output.read_text(encoding="utf-8"))["results"]) == len(STEPS)
+
+
+def test_compare_results_and_case_numbers():
+    """Försämringar över toleransen ska rapporteras och ärendenumren vara giltiga"""
+    def report(ops_per_sec):
+        return {"results": [{"shape": "many-small", "scale": 1000, "benchmark": "serialize",
+                             "ops_per_sec": ops_per_sec}]}
+
+    assert compare_results(report(100.0), report(95.0)) == []
+    regressions = compare_results(report(100.0), report(80.0))
+    assert len(regressions) == 1
+    assert round(regressions[0]["change"], 2) == -0.20
+
+    numbers = [case_number(index) for index in range(0, 2_000_000, 997)]
+    assert len(set(numbers)) == len(numbers)
+    assert all(value_lists.validate_case_number(number) for number in numbers)
@@ -0,0 +1,63 @@
+"""
+Tester för sammanslagning av ERMS-filer
+=======================================
+"""
+
+import os
+
+import pytest
+
+from erms_create import SVKErms
+from erms_create.cli import main
+
+
+def test_merge_files(tmp_path, case_file):
+    """Ärenden från flera filer ska hamna i en leverans med en control"""
+    sources = [case_file(tmp_path, number) for number in range(1, 6)]
+    output = str(tmp_path / "leverans.xml")
+
+    summary = SVKErms.merge_files(sources, output)
+
+    assert summary["aggregations"] == 5
+    erms = SVKErms.load(output)
+    assert erms.case_numbers() == [f"F 2024-{number:04d}" for number in range(1, 6)]
+    id_types = [elm.get("identificationType") for elm in erms.control.identifications]
+    # Ärendenumret skiljer sig mellan filerna och tas därför bort
+    assert id_types == ["arkivbildare", "organisationsnummer"]
+
+
+def test_merge_duplicates(tmp_path, case_file):
+    """Dubblerade ärendenummer ska ge fel eller hoppas över"""
+    sources = [case_file(tmp_path, 1), case_file(tmp_path, 2)]
+    duplicate_dir = tmp_path / "kopia"
+    duplicate_dir.mkdir()
+    sources.append(case_file(duplicate_dir, 1))
+    output = str(tmp_path / "leverans.xml")
+
+    with pytest.raises(ValueError, match="F 2024-0001"):
+        SVKErms.merge_files(sources, output)
+    assert not os.path.exists(output)
+    assert not os.path.exists(output + ".tmp")
+
+    summary = SVKErms.merge_files(sources, output, on_duplicate="skip")
+    assert summary["duplicates_skipped"] == ["F 2024-0001"]
+    assert SVKErms.load(output).case_numbers() == ["F 2024-0001", "F 2024-0002"]
+
+
+def test_merge_different_archive_creators(tmp_path, case_file):
+    """Filer från olika arkivbildare får inte slås ihop"""
+    sources = [case_file(tmp_path, 1), case_file(tmp_path, 2, "Arvika pastorat")]
+
+    with pytest.raises(ValueError, match="arkivbildare"):
+        SVKErms.merge_files(sources, str(tmp_path / "leverans.xml"))
+
+
+def test_cli_merge_from_list(tmp_path, case_file):
+    """Kommandoradsverktyget ska kunna läsa filnamn från en lista"""
+    sources = [case_file(tmp_path, number) for number in range(1, 4)]
+    file_list = tmp_path / "filer.txt"
+    file_list.write_text("\n".join(sources), encoding="utf-8")
+    output = str(tmp_path / "leverans.xml")
+
+    assert main(["merge", "-o", output, "--from-list", str(file_list)]) == 0
+    assert len(SVKErms.load(output).case_numbers()) == 3
@@ -0,0 +1,60 @@
+"""
+Tester för sorterad utdata
+==========================
+"""
+
+import random
+
+from erms_create import SVKErms
+from erms_create.core.sorting import sort_erms_file
+
+NUMBERS = list(range(1, 26))
+
+
+def _document(numbers, sorted_output=False):
+    erms = SVKErms(sorted_output=sorted_output)
+    for number in numbers:
+        case = erms.add_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                             "Sunne pastorat", "1234567890")
+        for record_number in (10, 2, 1):
+            case.add_record_svk(f"F 2024-{number:04d}:{record_number}", "Handling")
+    return erms
+
+
+def _record_numbers(case):
+    return [record.object_id.text.split(":")[1] for record in case.iter_records()]
+
+
+def test_sorted_output_mode():
+    """Ärenden och handlingar ska sorteras på nummer vid export"""
+    numbers = NUMBERS[:]
+    random.Random(1).shuffle(numbers)
+    erms = _document(numbers, sorted_output=True)
+
+    xml = erms.to_xml_string()
+
+    assert erms.case_numbers() == [f"F 2024-{number:04d}" for number in NUMBERS]
+    assert xml.index("F 2024-0002<") < xml.index("F 2024-0010<")
+    case = erms.get_case("F 2024-0003")
+    assert _record_numbers(case) == ["1", "2", "10"]
+
+
+def test_external_sort_is_byte_stable(tmp_path):
+    """Extern sortering med små körningar ska ge samma bytes som sortering i minnet"""
+    numbers = NUMBERS[:]
+    random.Random(2).shuffle(numbers)
+    erms = _document(numbers)
+    source = str(tmp_path / "osorterad.xml")
+    erms.save_to_file(source)
+
+    output = str(tmp_path / "sorterad.xml")
+    assert sort_erms_file(source, output, run_size=4) == len(NUMBERS)
+
+    erms.sort_aggregations()
+    with open(output, encoding="utf-8") as f:
+        assert f.read() == erms.to_xml_string()
+
+    again = str(tmp_path / "sorterad2.xml")
+    sort_erms_file(output, again, run_size=7)
+    with open(output, "rb") as first, open(again, "rb") as second:
+        assert first.read() == second.read()
@@ -0,0 +1,74 @@
+"""
+Tester för storleksprofilen av serialiserade leveranser
+=======================================================
+"""
+
+import io
+
+import pytest
+
+from erms_create import SVKErms
+from erms_create.cli import main
+from erms_create.core.size_profile import (CATEGORIES, format_size_report, profile_size,
+                                           rank_contributors)
+
+_XML = (b"<?xml version='1.0' encoding='UTF-8'?>\n"
+        b'<erms xmlns="urn:a">\n'
+        b'  <agents>\n'
+        b'    <agent agentType="creator"><name>Anna</name></agent>\n'
+        b'    <agent agentType="creator"><name>Anna</name></agent>\n'
+        b'  </agents>\n'
+        b'  <note xmlns="urn:a"><!-- x > y --><![CDATA[a<b]]></note>\n'
+        b'</erms>')
+
+
+def test_bytes_are_attributed_by_kind_tag_and_path():
+    """Alla bytes ska fördelas på sorter, taggar och sökvägar oavsett läsblockens storlek"""
+    report = profile_size(_XML)
+    assert report["total_bytes"] == len(_XML)
+    assert sum(report["categories"].values()) == len(_XML)
+    assert report["elements"] == 7
+    assert report["categories"]["namespaces"] == 2 * len(b' xmlns="urn:a"')
+    assert report["redundant_namespace_bytes"] == len(b' xmlns="urn:a"')
+    assert report["categories"]["other"] == len(b"<?xml version='1.0' encoding='UTF-8'?>") \
+        + len(b"<!-- x > y -->")
+    assert report["categories"]["text"] == len(b"Anna") * 2 + len(b"<![CDATA[a<b]]>")
+
+    agent = report["tags"]["agent"]
+    block = len(b'<agent agentType="creator"><name>Anna</name></agent>')
+    assert agent["count"] == 2
+    assert agent["bytes"] == 2 * block
+    assert agent["attributes"] == 2 * len(b' agentType="creator"')
+    assert agent["duplicate_count"] == 1 and agent["duplicate_bytes"] == block
+    assert report["paths"]["/erms/agents/agent/name"]["count"] == 2
+
+    for chunk_size in (1, 5, 64):
+        assert profile_size(io.BytesIO(_XML), chunk_size=chunk_size) == report
+
+    with pytest.raises(ValueError):
+        profile_size(b"<erms><agents></agents")
+    with pytest.raises(ValueError):
+        profile_size(b"<erms><!-- ofullst")
+
+
+def test_document_ranking_and_cli(tmp_path, capsys):
+    """Indentering och upprepade block ska rankas; CLI ska skriva rapporten"""
+    erms = SVKErms()
+    for number in range(1, 4):
+        case = erms.add_case(f"F 2024-{number:04d}", "Ärende", "Sunne pastorat", "1234567890")
+        case.add_case_agents(creator="Anna Andersson", responsible_person="Per Persson")
+
+    pretty = profile_size(erms)
+    compact = profile_size(erms, pretty_print=False)
+    assert pretty["total_bytes"] - compact["total_bytes"] == \
+        pretty["categories"]["whitespace"] - compact["categories"]["whitespace"]
+    kinds = [item["kind"] for item in rank_contributors(pretty)]
+    assert kinds[0] == "whitespace" and "duplicates" in kinds
+    assert all(category in format_size_report(pretty) for category in CATEGORIES)
+
+    filename = tmp_path / "leverans.xml"
+    erms.save_to_file(str(filename))
+    assert main(["size", str(filename), "--top", "3"]) == 0
+    output = capsys.readouterr().out
+    assert "repeated <agent> blocks" in output
+    assert profile_size(str(filename)) == pretty
@@ -0,0 +1,94 @@
+"""
+Tester för inläsning av tabelldata
+==================================
+"""
+
+import json
+
+import pytest
+
+from erms_create import SVKErms
+from erms_create.svk_arende.ingest import CaseMapping, TabularIngest, read_csv, read_jsonl
+
+ERMS = "{https://DILCIS.eu/XML/ERMS}"
+
+MAPPING = CaseMapping(
+    case={"case_number": "arendenr", "title": "rubrik", "status": "status"},
+    case_dates={"opened": "oppnad", "closed": "avslutad"},
+    case_agents={"responsible_person": "handlaggare"},
+    record={"document_number": "dokumentnr", "title": "dokumenttitel"},
+    record_agents={"sender": "avsandare"},
+)
+
+CSV = """arendenr;rubrik;status;oppnad;avslutad;handlaggare;dokumentnr;dokumenttitel;avsandare
+F 2024-0001;Bygglov;closed;2024-01-01T00:00:00;2024-02-01T00:00:00;Anna;F 2024-0001:1;Ansökan;Kalle
+F 2024-0001;Bygglov;closed;2024-01-01T00:00:00;2024-02-01T00:00:00;Anna;F 2024-0001:2;Beslut;
+F 2024-0002;Tillsyn;closed;2024-03-01T00:00:00;2024-04-01T00:00:00;Bo;;;
+"""
+
+
+def _ingest():
+    return TabularIngest(MAPPING, archive_creator="Sunne pastorat", org_number="1234567890")
+
+
+def test_csv_rows_are_grouped_by_case(tmp_path):
+    """Rader för samma ärende ska bli ett ärende med handlingar"""
+    path = tmp_path / "arenden.csv"
+    path.write_text(CSV, encoding="utf-8")
+
+    erms = _ingest().ingest(read_csv(str(path), delimiter=";"))
+
+    assert erms.case_numbers() == ["F 2024-0001", "F 2024-0002"]
+    case = erms.get_case("F 2024-0001")
+    records = list(case.iter_records())
+    assert [record.object_id.text for record in records] == ["F 2024-0001:1", "F 2024-0001:2"]
+    assert records[0].element.findtext(f"{ERMS}agents/{ERMS}agent/{ERMS}name") == "Kalle"
+    assert case.element.findtext(f"{ERMS}agents/{ERMS}agent/{ERMS}name") == "Anna"
+    assert list(erms.get_case("F 2024-0002").iter_records()) == []
+
+
+def test_jsonl_streaming_equals_in_memory(tmp_path):
+    """Strömmande skrivning ska ge samma ärenden som inläsning i minnet"""
+    rows = [dict(zip(CSV.splitlines()[0].split(";"), line.split(";")))
+            for line in CSV.splitlines()[1:]]
+    path = tmp_path / "arenden.jsonl"
+    path.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\n\n",
+                    encoding="utf-8")
+    assert list(read_jsonl(str(path))) == rows
+
+    output = str(tmp_path / "leverans.xml")
+    assert _ingest().ingest_to_file(read_jsonl(str(path)), output) == 2
+    loaded = SVKErms.load(output)
+    assert loaded.case_numbers() == ["F 2024-0001", "F 2024-0002"]
+    assert len(list(loaded.get_case("F 2024-0001").iter_records())) == 2
+
+
+def test_invalid_input():
+    """Okända fält och ärenden som inte kommer i följd ska ge fel"""
+    with pytest.raises(ValueError, match="rubrik_x"):
+        CaseMapping(case={"case_number": "arendenr", "rubrik_x": "rubrik"})
+
+    rows = [{"arendenr": "F 2024-0001", "rubrik": "A"},
+            {"arendenr": "F 2024-0002", "rubrik": "B"},
+            {"arendenr": "F 2024-0001", "rubrik": "A"}]
+    with pytest.raises(ValueError, match="i följd"):
+        _ingest().ingest(rows)
+
+
+def test_archive_creator_from_column(tmp_path):
+    """Arkivbildare som bara finns i en kolumn ska hamna i control vid strömmande skrivning"""
+    mapping = CaseMapping(case={"case_number": "arendenr", "title": "rubrik",
+                                "archive_creator": "arkivbildare", "org_number": "orgnr"})
+    rows = [{"arendenr": f"F 2024-000{number}", "rubrik": "Ärende",
+             "arkivbildare": "Sunne pastorat", "orgnr": "1234567890"} for number in (1, 2)]
+    output = str(tmp_path / "leverans.xml")
+
+    assert TabularIngest(mapping).ingest_to_file(rows, output) == 2
+    control = SVKErms.load(output).control
+    identifications = {elm.get("identificationType"): elm.text
+                       for elm in control.identifications}
+    assert identifications["arkivbildare"] == "Sunne pastorat"
+    assert identifications["organisationsnummer"] == "1234567890"
+
+    with pytest.raises(ValueError, match="Arkivbildare saknas"):
+        TabularIngest(MAPPING).ingest_to_file([], str(tmp_path / "tom.xml"))
@@ -0,0 +1,92 @@
+"""
+Tester för att lägga till ärenden i en befintlig ERMS-fil
+=========================================================
+"""
+
+import os
+
+from lxml import etree
+
+from erms_create import SVKErms
+from erms_create.core.append import JOURNAL_SUFFIX, append_aggregations, recover_append
+
+
+def _document(*numbers):
+    erms = SVKErms()
+    for number in numbers:
+        erms.create_simple_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                                "Sunne pastorat", "1234567890",
+                                opened_date="2024-01-01T00:00:00",
+                                closed_date="2024-02-01T00:00:00")
+    return erms
+
+
+def _reformatted(filename):
+    parser = etree.XMLParser(remove_blank_text=True)
+    tree = etree.parse(filename, parser)
+    return etree.tostring(tree, pretty_print=True, xml_declaration=True, encoding="UTF-8")
+
+
+def test_append_to_file(tmp_path):
+    """Nya ärenden ska hamna sist i aggregations med korrekt indrag"""
+    filename = str(tmp_path / "leverans.xml")
+    _document(1, 2).save_to_file(filename)
+
+    assert _document(3, 4).append_to_file(filename) == 2
+    assert not os.path.exists(filename + JOURNAL_SUFFIX)
+
+    erms = SVKErms.load(filename)
+    assert erms.case_numbers() == ["F 2024-0001", "F 2024-0002", "F 2024-0003", "F 2024-0004"]
+
+    with open(filename, "rb") as f:
+        assert f.read() == _reformatted(filename)
+
+
+def test_append_to_empty_aggregations(tmp_path):
+    """Ett tomt <aggregations/> ska ersättas med öppnings- och sluttagg"""
+    filename = str(tmp_path / "tom.xml")
+    SVKErms().save_to_file(filename)
+
+    _document(1).append_to_file(filename)
+
+    assert SVKErms.load(filename).case_numbers() == ["F 2024-0001"]
+    with open(filename, "rb") as f:
+        assert f.read() == _reformatted(filename)
+
+
+def test_append_compact_file(tmp_path):
+    """Filer utan pretty_print ska fortsätta vara kompakta"""
+    filename = str(tmp_path / "kompakt.xml")
+    _document(1).save_to_file(filename, pretty_print=False)
+
+    _document(2).append_to_file(filename)
+
+    with open(filename, "rb") as f:
+        content = f.read()
+    assert b"</aggregation><aggregation" in content
+    assert SVKErms.load(filename).case_numbers() == ["F 2024-0001", "F 2024-0002"]
+
+
+def test_recover_interrupted_append(tmp_path):
+    """Ett avbrutet tillägg ska rullas tillbaka med hjälp av journalen"""
+    filename = str(tmp_path / "leverans.xml")
+    _document(1).save_to_file(filename)
+    with open(filename, "rb") as f:
+        original = f.read()
+
+    # Simulera ett avbrott efter att journalen skrivits
+    offset = original.rindex(b"  </aggregations>")
+    with open(filename + JOURNAL_SUFFIX, "wb") as f:
+        f.write(b'{"offset": %d}\n' % offset + original[offset:])
+    with open(filename, "r+b") as f:
+        f.seek(offset)
+        f.write(b"    <aggregation><objectId>ofullst")
+        f.truncate()
+
+    assert recover_append(filename)
+    with open(filename, "rb") as f:
+        assert f.read() == original
+
+    # Tillägg efter återställning fungerar som vanligt
+    append_aggregations(filename, _document(2).aggregations)
+    assert SVKErms.load(filename).case_numbers() == ["F 2024-0001", "F 2024-0002"]
@@ -0,0 +1,74 @@
+"""
+Tester för strömmande skrivning och uppdelning av ERMS-filer
+============================================================
+"""
+
+import io
+import json
+import os
+
+from erms_create import SVKErms
+from erms_create.core.split import MANIFEST_FILENAME, split_erms_file
+from erms_create.core.streaming import ErmsStreamWriter
+
+
+def _document(count):
+    erms = SVKErms()
+    for number in range(1, count + 1):
+        case = erms.create_simple_case(f"F 2024-{number:04d}", f"Ärende {number}",
+                                       "Sunne pastorat", "1234567890",
+                                       opened_date="2024-01-01T00:00:00",
+                                       closed_date="2024-02-01T00:00:00")
+        case.add_svk_note("intern anteckning", "Anteckning", "Anna Andersson",
+                          "2024-01-02T00:00:00")
+        case.add_record_svk(f"F 2024-{number:04d}:1", "Handling")
+    return erms
+
+
+def test_stream_writer_matches_save_to_file():
+    """Strömmande skrivning ska ge samma bytes som to_xml_string()"""
+    erms = _document(3)
+    for pretty_print in (True, False):
+        output = io.BytesIO()
+        with ErmsStreamWriter(output, erms.control.element, pretty_print=pretty_print) as writer:
+            for aggregation in erms.aggregations:
+                writer.write_aggregation(aggregation)
+        assert output.getvalue() == erms.to_xml_string(pretty_print=pretty_print).encode("utf-8")
+
+
+def test_split_by_aggregation_count(tmp_path):
+    """Uppdelning på antal ärenden med kopia av control i varje del"""
+    source = str(tmp_path / "leverans.xml")
+    _document(10).save_to_file(source)
+    output_dir = str(tmp_path / "delar")
+
+    manifest = split_erms_file(source, output_dir, max_aggregations=3)
+
+    assert [shard["aggregations"] for shard in manifest["shards"]] == [3, 3, 3, 1]
+    assert manifest["total_aggregations"] == 10
+    assert manifest["shards"][1]["first_object_id"] == "F 2024-0004"
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), encoding="utf-8") as f:
+        assert json.load(f) == manifest
+
+    numbers = []
+    for shard in manifest["shards"]:
+        filename = os.path.join(output_dir, shard["file"])
+        assert os.path.getsize(filename) == shard["bytes"]
+        erms = SVKErms.load(filename)
+        assert erms.control.identifications[0].text == "Sunne pastorat"
+        numbers.extend(erms.case_numbers())
+    assert numbers == [f"F 2024-{number:04d}" for number in range(1, 11)]
+
+
+def test_split_by_size(tmp_path):
+    """Ingen del får bli större än max_bytes"""
+    source = str(tmp_path / "leverans.xml")
+    _document(10).save_to_file(source)
+    max_bytes = os.path.getsize(source) // 3
+
+    manifest = split_erms_file(source, str(tmp_path / "delar"), max_bytes=max_bytes)
+
+    assert len(manifest["shards"]) > 3
+    assert manifest["total_aggregations"] == 10
+    for shard in manifest["shards"]:
+        assert shard["bytes"] <= max_bytes